@@ -0,0 +1,66 @@
+"""
+Benchmark de la asignación de habitaciones (utils/asignacion.py).
+
+1. Calidad: compara el costo de la programación dinámica con el óptimo por
+   fuerza bruta en casos chicos aleatorios (deben coincidir).
+2. Tiempo: mide la asignación para hoteles de miles de habitaciones.
+
+No usa la base de datos.
+
+Uso: python -m benchmarks.asignacion_habitaciones [casos]
+"""
+import random
+import sys
+import time
+
+from utils.asignacion import asignar_fuerza_bruta, asignar_habitaciones
+
+TIPOS = [(1, 80.0), (2, 120.0), (3, 160.0), (4, 190.0), (6, 300.0)]  # (capacidad, valor por noche)
+PENALIZACIONES = [0.0, 0.0, 0.0, 40.0, 80.0]
+
+
+def hotel_aleatorio(generador, habitaciones: int, noches: int = 3) -> list:
+    candidatas = []
+    for numero in range(habitaciones):
+        id_tipo = generador.randrange(len(TIPOS))
+        capacidad, valor = TIPOS[id_tipo]
+        candidatas.append({
+            "id_habitacion": numero + 1,
+            "numero_habitacion": 100 + numero,
+            "id_tipo": id_tipo,
+            "capacidad": capacidad,
+            "costo": valor * noches + generador.choice(PENALIZACIONES),
+        })
+    return candidatas
+
+
+def costo(seleccion):
+    return None if seleccion is None else round(sum(c["costo"] for c in seleccion), 6)
+
+
+def calidad(casos: int):
+    generador = random.Random(42)
+    iguales = 0
+    for _ in range(casos):
+        candidatas = hotel_aleatorio(generador, generador.randint(1, 12))
+        personas = generador.randint(1, 20)
+        if costo(asignar_habitaciones([dict(c) for c in candidatas], personas)) == costo(asignar_fuerza_bruta(candidatas, personas)):
+            iguales += 1
+    print(f"Casos chicos: {iguales}/{casos} con el mismo costo que la fuerza bruta")
+
+
+def tiempos():
+    generador = random.Random(7)
+    print(f"{'habitaciones':>12} {'personas':>9} {'elegidas':>9} {'ms':>9}")
+    for habitaciones in (500, 2000, 5000):
+        candidatas = hotel_aleatorio(generador, habitaciones)
+        for personas in (4, 40, 200):
+            inicio = time.perf_counter()
+            elegidas = asignar_habitaciones([dict(c) for c in candidatas], personas)
+            ms = (time.perf_counter() - inicio) * 1000
+            print(f"{habitaciones:>12} {personas:>9} {len(elegidas or []):>9} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    calidad(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
+    tiempos()
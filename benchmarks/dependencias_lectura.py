@@ -0,0 +1,76 @@
+"""
+Costo fijo por request de la dependencia de base de datos en handlers mínimos.
+
+Monta handlers del tamaño de ``/health`` que ejecutan un ``SELECT 1`` con cada
+dependencia: ``get_db`` (Session del ORM en transacción de lectura/escritura),
+``get_lectura`` (Connection Core en transacción READ ONLY) y ``get_consulta``
+(Connection Core en autocommit), más uno sin base de datos como referencia.
+Las requests pasan por la pila ASGI completa con TestClient y se informan el
+tiempo medio, el p50 y los round trips que cuenta ``ViajesMiddleware``.
+
+Uso: DATABASE_URL=... python -m benchmarks.dependencias_lectura [repeticiones]
+"""
+import statistics
+import sys
+import time
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from database import get_consulta, get_db, get_lectura
+from utils.pipeline import ViajesMiddleware
+
+SELECT_1 = text("SELECT 1")
+
+
+def crear_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ViajesMiddleware)
+
+    @app.get("/sin-bd")
+    def sin_bd():
+        return {"status": "ok"}
+
+    @app.get("/session")
+    def con_session(db=Depends(get_db)):
+        return {"status": db.execute(SELECT_1).scalar()}
+
+    @app.get("/lectura")
+    def con_lectura(db=Depends(get_lectura)):
+        return {"status": db.execute(SELECT_1).scalar()}
+
+    @app.get("/consulta")
+    def con_consulta(db=Depends(get_consulta)):
+        return {"status": db.execute(SELECT_1).scalar()}
+
+    return app
+
+
+def medir(cliente: TestClient, ruta: str, repeticiones: int):
+    """Tiempos por request (ms) y round trips de la última"""
+    cliente.get(ruta)  # Calentar el pool y las sentencias preparadas
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        respuesta = cliente.get(ruta)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos, respuesta.headers.get("X-Round-Trips")
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"{repeticiones} requests por handler:")
+    print(f"  {'handler':<10}{'media ms':>10}{'p50 ms':>10}{'round trips':>13}")
+    with TestClient(crear_app()) as cliente:
+        for ruta in ("/sin-bd", "/session", "/lectura", "/consulta"):
+            tiempos, viajes = medir(cliente, ruta, repeticiones)
+            print(
+                f"  {ruta:<10}{statistics.mean(tiempos):>10.3f}"
+                f"{statistics.median(tiempos):>10.3f}{viajes:>13}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark de liberación de habitaciones: un UPDATE por habitación vs. un
+único UPDATE ... FROM HABITACION_RESERVA, para reservas de 1 a 50 habitaciones.
+
+Trabaja sobre tablas temporales con los mismos nombres (pg_temp tiene
+prioridad en el search_path), así que no toca datos reales.
+
+Uso: DATABASE_URL=... python -m benchmarks.liberacion_habitaciones [repeticiones]
+"""
+import sys
+import time
+
+from sqlalchemy import text
+
+from database import engine
+
+TAMANOS = [1, 5, 10, 25, 50]
+
+SQL_TABLAS = """
+CREATE TEMP TABLE HABITACION (id_habitacion SERIAL PRIMARY KEY, ocupado BOOLEAN NOT NULL DEFAULT TRUE);
+CREATE TEMP TABLE HABITACION_RESERVA (id_habitacion INTEGER, id_reserva INTEGER);
+"""
+
+
+def preparar(conexion, habitaciones: int):
+    conexion.execute(text("TRUNCATE HABITACION, HABITACION_RESERVA RESTART IDENTITY"))
+    conexion.execute(text("INSERT INTO HABITACION (ocupado) SELECT TRUE FROM generate_series(1, :n)"), {"n": habitaciones})
+    conexion.execute(text("INSERT INTO HABITACION_RESERVA SELECT id_habitacion, 1 FROM HABITACION"))
+
+
+def por_fila(conexion):
+    """Versión anterior: SELECT de habitaciones y un UPDATE por cada una"""
+    filas = conexion.execute(text("SELECT id_habitacion FROM HABITACION_RESERVA WHERE id_reserva = 1")).fetchall()
+    for fila in filas:
+        conexion.execute(text("UPDATE HABITACION SET ocupado = FALSE WHERE id_habitacion = :id"), {"id": fila[0]})
+    return 1 + len(filas)
+
+
+def por_conjunto(conexion):
+    """Versión actual: un solo UPDATE ... FROM HABITACION_RESERVA"""
+    conexion.execute(text("""
+        UPDATE HABITACION h SET ocupado = FALSE
+        FROM HABITACION_RESERVA hr
+        WHERE hr.id_reserva = 1 AND h.id_habitacion = hr.id_habitacion
+    """))
+    return 1
+
+
+def main(repeticiones=50):
+    with engine.connect() as conexion:
+        for sentencia in SQL_TABLAS.strip().split(";")[:-1]:
+            conexion.execute(text(sentencia))
+        print(f"{'habitaciones':>12}{'modo':>12}{'round trips':>14}{'ms':>10}")
+        for n in TAMANOS:
+            for nombre, liberar in (("por_fila", por_fila), ("conjunto", por_conjunto)):
+                total = 0.0
+                for _ in range(repeticiones):
+                    preparar(conexion, n)
+                    inicio = time.perf_counter()
+                    viajes = liberar(conexion)
+                    total += time.perf_counter() - inicio
+                print(f"{n:>12}{nombre:>12}{viajes:>14}{total / repeticiones * 1000:>10.3f}")
+        conexion.rollback()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
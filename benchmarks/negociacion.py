@@ -0,0 +1,81 @@
+"""
+Benchmark de tamaño de payload y tiempo de codificación por endpoint y formato.
+
+Uso: python -m benchmarks.negociacion [filas]
+"""
+import json
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from utils.negociacion import MEDIA_CBOR, MEDIA_MSGPACK, codificar
+
+
+def filas_registros_hospedaje(n):
+    inicio = datetime(2024, 1, 1, 14, 0)
+    return [
+        {
+            "id_registro": i,
+            "id_reserva": 1000 + i // 2,
+            "nombre_huesped": f"Huésped {i}",
+            "numero_habitacion": 100 + i % 300,
+            "fecha_hora_checkin": (inicio + timedelta(minutes=i)).isoformat(),
+            "fecha_checkout": None if i % 3 else (date(2024, 1, 3) + timedelta(days=i % 5)).isoformat(),
+            "responsable": i % 2 == 0,
+            "mascota": i % 7 == 0,
+        }
+        for i in range(n)
+    ]
+
+
+def filas_habitaciones(n):
+    return [
+        {
+            "id_habitacion": i,
+            "numero_habitacion": 100 + i % 300,
+            "nombre_hotel": f"Hotel {i % 20}",
+            "tipo_habitacion": ("Sencilla", "Doble", "Suite")[i % 3],
+            "ocupado": i % 4 == 0,
+        }
+        for i in range(n)
+    ]
+
+
+def filas_servicios(n):
+    return [
+        {"id_servicio": i, "nombre": f"Servicio {i}", "costo": str(Decimal(15000 + i * 250) / 100)}
+        for i in range(n)
+    ]
+
+
+ENDPOINTS = {
+    "GET /registro-hospedaje": filas_registros_hospedaje,
+    "GET /habitaciones": filas_habitaciones,
+    "GET /servicios": filas_servicios,
+}
+
+
+def medir(funcion, repeticiones=20):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return resultado, (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main(n=2000):
+    print(f"{'endpoint':<26}{'formato':<10}{'bytes':>10}{'ms':>10}")
+    for endpoint, generar in ENDPOINTS.items():
+        filas = generar(n)
+        formatos = {
+            "json": lambda: json.dumps(filas, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            "msgpack": lambda: codificar(filas, MEDIA_MSGPACK),
+            "cbor": lambda: codificar(filas, MEDIA_CBOR),
+        }
+        for nombre, funcion in formatos.items():
+            cuerpo, ms = medir(funcion)
+            print(f"{endpoint:<26}{nombre:<10}{len(cuerpo):>10}{ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
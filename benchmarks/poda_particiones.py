@@ -0,0 +1,99 @@
+"""
+Verificación con EXPLAIN de la poda de particiones en las consultas de las
+rutas sobre ESTADO_RESERVA y REGISTRO_HOSPEDAJE (sql/006_particiones.sql).
+
+Para cada consulta muestra cuántas particiones quedan en el plan, cuántas se
+descartan en ejecución ("Subplans Removed") y el total de la tabla. Ejecuta
+EXPLAIN ANALYZE dentro de una transacción que se revierte.
+
+REGISTRO_HOSPEDAJE va por mes de check-in: los filtros por hospedajes activos
+no podan particiones, leen el índice parcial idx_registro_hospedaje_activos.
+
+Uso: DATABASE_URL=... python -m benchmarks.poda_particiones [id_reserva] [id_hotel]
+"""
+import json
+import sys
+
+from sqlalchemy import text
+
+from database import engine
+from routes.reservas import QUERY_ULTIMO_ESTADO
+from utils.particiones import TABLAS_PARTICIONADAS
+
+CONSULTAS = {
+    "hospedajes activos (listar_registros_hospedaje)": (
+        "registro_hospedaje",
+        "SELECT rh.id_registro FROM REGISTRO_HOSPEDAJE rh WHERE rh.fecha_checkout IS NULL",
+    ),
+    "menores hospedados": (
+        "registro_hospedaje",
+        """
+        SELECT h.numero_id FROM HUESPED h
+        INNER JOIN REGISTRO_HOSPEDAJE rh ON h.numero_id = rh.id_huesped
+        WHERE h.tipo_id = 'Tarjeta de Identidad' AND rh.fecha_checkout IS NULL
+        """,
+    ),
+    "estancias del tablero": (
+        "registro_hospedaje",
+        """
+        SELECT rh.id_registro FROM REGISTRO_HOSPEDAJE rh
+        INNER JOIN HABITACION ha ON rh.id_habitacion = ha.id_habitacion
+        WHERE ha.id_hotel = :id_hotel AND (rh.fecha_checkout IS NULL OR rh.fecha_checkout >= CURRENT_DATE)
+        """,
+    ),
+    "estancias del calendario": (
+        "registro_hospedaje",
+        """
+        SELECT rh.id_registro FROM REGISTRO_HOSPEDAJE rh
+        WHERE rh.fecha_hora_checkin < CURRENT_DATE + 30
+        AND (rh.fecha_checkout IS NULL OR rh.fecha_checkout > CURRENT_DATE - 7)
+        """,
+    ),
+    "estado actual de una reserva": (
+        "estado_reserva",
+        f"SELECT er.estado FROM RESERVA r CROSS JOIN LATERAL ({QUERY_ULTIMO_ESTADO}) er WHERE r.id_reserva = :id_reserva",
+    ),
+    "listado de reservas con estado": (
+        "estado_reserva",
+        f"SELECT r.id_reserva, er.estado FROM RESERVA r CROSS JOIN LATERAL ({QUERY_ULTIMO_ESTADO}) er "
+        "WHERE r.fecha_inicio >= CURRENT_DATE",
+    ),
+}
+
+
+def recorrer(plan, prefijo: str, resumen: dict):
+    """Acumular particiones escaneadas y subplanes descartados en ejecución"""
+    relacion = plan.get("Relation Name", "")
+    if relacion.startswith(prefijo + "_"):
+        resumen["particiones"].add(relacion)
+    resumen["descartadas"] += plan.get("Subplans Removed", 0)
+    for hijo in plan.get("Plans", []):
+        recorrer(hijo, prefijo, resumen)
+
+
+def total_particiones(conexion, tabla: str) -> int:
+    query = "SELECT COUNT(*) FROM pg_inherits WHERE inhparent = CAST(:tabla AS REGCLASS)"
+    return conexion.execute(text(query), {"tabla": tabla}).scalar()
+
+
+def main():
+    id_reserva = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    id_hotel = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    params = {"id_reserva": id_reserva, "id_hotel": id_hotel}
+
+    with engine.connect() as conexion:
+        totales = {tabla: total_particiones(conexion, tabla) for tabla in TABLAS_PARTICIONADAS}
+        print(f"{'consulta':<50} {'en plan':>8} {'podadas ej.':>12} {'total':>6}")
+        for nombre, (tabla, query) in CONSULTAS.items():
+            fila = conexion.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}"), params).scalar()
+            plan = (json.loads(fila) if isinstance(fila, str) else fila)[0]["Plan"]
+            resumen = {"particiones": set(), "descartadas": 0}
+            recorrer(plan, tabla, resumen)
+            print(
+                f"{nombre:<50} {len(resumen['particiones']):>8} {resumen['descartadas']:>12} {totales[tabla]:>6}"
+            )
+        conexion.rollback()
+
+
+if __name__ == "__main__":
+    main()
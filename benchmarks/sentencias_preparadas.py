@@ -0,0 +1,82 @@
+"""
+Ahorro de parse/plan por request con sentencias preparadas en el servidor.
+
+Repite la sentencia de ``PUT /hoteles/{id}`` (UPDATE parcial que devuelve la
+fila con sus teléfonos) con dos engines: sin preparar (``prepare_threshold=None``)
+y preparando desde la primera ejecución. Cada repetición se revierte. Muestra
+el tiempo medio por request y el "Planning Time" que informa EXPLAIN para
+cada sentencia sin preparar, que es lo que se deja de pagar al reutilizar el
+plan preparado.
+
+Uso: DATABASE_URL=... python -m benchmarks.sentencias_preparadas [repeticiones] [id_hotel]
+"""
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from database import engine
+from routes.hoteles import ACTUALIZAR_HOTEL
+
+
+def sentencias_request(id_hotel: int):
+    valores = {"nombre": "Benchmark"}
+    return [(ACTUALIZAR_HOTEL.sentencia(valores), {**valores, "id_hotel": id_hotel})]
+
+
+def medir(prepare_threshold, repeticiones: int, id_hotel: int):
+    """Tiempos por request (ms) y sentencias preparadas que quedaron en la conexión"""
+    motor = create_engine(engine.url, pool_size=1, connect_args={"prepare_threshold": prepare_threshold})
+    tiempos = []
+    with motor.connect() as conexion:
+        for _ in range(repeticiones):
+            transaccion = conexion.begin()
+            inicio = time.perf_counter()
+            for sentencia, params in sentencias_request(id_hotel):
+                conexion.execute(sentencia, params)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            transaccion.rollback()
+        preparadas = conexion.execute(text("SELECT COUNT(*) FROM pg_prepared_statements")).scalar()
+    motor.dispose()
+    return tiempos[1:], preparadas  # La primera incluye la preparación
+
+
+def tiempos_planificacion(id_hotel: int) -> list:
+    resultado = []
+    with engine.connect() as conexion:
+        transaccion = conexion.begin()
+        for sentencia, params in sentencias_request(id_hotel):
+            plan = conexion.execute(
+                text("EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) " + sentencia.text), params
+            ).scalar()
+            resultado.append((sentencia.text.split()[0], plan[0]["Planning Time"]))
+        transaccion.rollback()
+    return resultado
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    id_hotel = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    print("Planning Time sin preparar:")
+    total = 0.0
+    for tipo, ms in tiempos_planificacion(id_hotel):
+        total += ms
+        print(f"  {tipo:<8} {ms:.3f} ms")
+    print(f"  total    {total:.3f} ms por request")
+
+    print(f"\n{repeticiones} requests ({len(sentencias_request(id_hotel))} sentencias cada una):")
+    base = None
+    for nombre, umbral in (("sin preparar", None), ("preparadas", 1)):
+        tiempos, preparadas = medir(umbral, repeticiones, id_hotel)
+        media = statistics.mean(tiempos)
+        base = base or media
+        print(
+            f"  {nombre:<13} media {media:.3f} ms  p50 {statistics.median(tiempos):.3f} ms  "
+            f"({media / base:.0%} del base, {preparadas} preparadas en el servidor)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,3 +13,36 @@ DATABASE_URL = os.getenv(
 APP_NAME = "TRANQUIDESCANSO API"
 APP_VERSION = "1.0.0"
 DEBUG = os.getenv("DEBUG", "False") == "True"
+
+# Compresión de respuestas (bytes mínimos para comprimir)
+COMPRESION_MINIMO_BYTES = int(os.getenv("COMPRESION_MINIMO_BYTES", "1024"))
+
+# Caché de identidad de huéspedes (bytes máximos por worker)
+CACHE_HUESPEDES_MAX_BYTES = int(os.getenv("CACHE_HUESPEDES_MAX_BYTES", str(4 * 1024 * 1024)))
+
+# Segundos que se reutiliza el tablero de recepción de cada hotel
+TABLERO_TTL_SEGUNDOS = float(os.getenv("TABLERO_TTL_SEGUNDOS", "5"))
+
+# Eventos en vivo (GET /eventos): cola por suscriptor y latido en segundos
+EVENTOS_MAX_PENDIENTES = int(os.getenv("EVENTOS_MAX_PENDIENTES", "1000"))
+EVENTOS_LATIDO_SEGUNDOS = float(os.getenv("EVENTOS_LATIDO_SEGUNDOS", "15"))
+
+# Calendarios de ocupación en memoria: días antes y después de hoy que se mantienen
+CALENDARIO_DIAS_ATRAS = int(os.getenv("CALENDARIO_DIAS_ATRAS", "60"))
+CALENDARIO_DIAS_ADELANTE = int(os.getenv("CALENDARIO_DIAS_ADELANTE", "365"))
+
+# Sentencias preparadas de psycopg: ejecuciones de un mismo SQL en una conexión
+# antes de prepararlo en el servidor (vacío para desactivar, p. ej. con PgBouncer
+# en modo transacción) y máximo de sentencias preparadas por conexión
+DB_PREPARE_THRESHOLD = os.getenv("DB_PREPARE_THRESHOLD", "2")
+DB_PREPARED_MAX = int(os.getenv("DB_PREPARED_MAX", "256"))
+
+# Modo pipeline de psycopg en las escrituras que lo admiten (utils/pipeline.py)
+DB_PIPELINE = os.getenv("DB_PIPELINE", "False") == "True"
+
+# Réplicas de lectura para los GET (URLs separadas por comas; vacío para leer
+# siempre del primario), retraso de replicación máximo aceptado y segundos
+# entre verificaciones de su estado
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+REPLICA_MAX_RETRASO_SEGUNDOS = float(os.getenv("REPLICA_MAX_RETRASO_SEGUNDOS", "5"))
+REPLICA_VERIFICACION_SEGUNDOS = float(os.getenv("REPLICA_VERIFICACION_SEGUNDOS", "2"))
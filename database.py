@@ -1,23 +1,142 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, Session
-from config import DATABASE_URL
-
-# Crear motor de base de datos
-engine = create_engine(
+from config import (
+    DATABASE_REPLICA_URLS,
     DATABASE_URL,
-    echo=False,  # Cambiar a True para ver queries SQL
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True  # Verifica la conexión antes de usar
+    DB_PREPARE_THRESHOLD,
+    DB_PREPARED_MAX,
+    REPLICA_MAX_RETRASO_SEGUNDOS,
+    REPLICA_VERIFICACION_SEGUNDOS
+)
+from utils.replicas import ConjuntoReplicas
+
+REPLICA_TIMEOUT_CONEXION = 3  # Segundos para conectar a una réplica antes de darla por caída
+
+
+def _url_psycopg(valor: str):
+    # El driver es psycopg 3 (requirements.txt); "postgresql://" usaría psycopg2
+    url = make_url(valor)
+    if url.drivername in ("postgresql", "postgres"):
+        url = url.set(drivername="postgresql+psycopg")
+    return url
+
+
+def configurar_conexion(dbapi_connection, connection_record):
+    dbapi_connection.prepared_max = DB_PREPARED_MAX
+
+
+def _crear_motor(url, **connect_args):
+    motor = create_engine(
+        url,
+        echo=False,  # Cambiar a True para ver queries SQL
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,  # Verifica la conexión antes de usar
+        connect_args={
+            # Preparar en el servidor los SQL repetidos (ver utils/sentencias.py)
+            "prepare_threshold": int(DB_PREPARE_THRESHOLD) if DB_PREPARE_THRESHOLD else None,
+            **connect_args
+        }
+    )
+    event.listen(motor, "connect", configurar_conexion)
+    return motor
+
+
+# Crear motor de base de datos (primario) y los de las réplicas de lectura
+engine = _crear_motor(_url_psycopg(DATABASE_URL))
+replicas = ConjuntoReplicas(
+    [_crear_motor(_url_psycopg(u), connect_timeout=REPLICA_TIMEOUT_CONEXION) for u in DATABASE_REPLICA_URLS],
+    max_retraso=REPLICA_MAX_RETRASO_SEGUNDOS,
+    intervalo=REPLICA_VERIFICACION_SEGUNDOS,
+    primario=engine
 )
 
+
 # Crear SessionLocal
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+def get_db(request: Request):
     """Dependencia para obtener sesión de BD en cada request"""
+    # Sub-requests de /batch que comparten conexión reciben la sesión del lote
+    sesion_lote = request.scope.get("state", {}).get("sesion_lote")
+    if sesion_lote is not None:
+        yield sesion_lote
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def _conexion_lote(request: Request):
+    """Conexión de la sesión del lote de /batch (lee lo escrito en el mismo lote), o None"""
+    sesion_lote = request.scope.get("state", {}).get("sesion_lote")
+    return sesion_lote.connection() if sesion_lote is not None else None
+
+
+def _requiere_primario(request: Request) -> bool:
+    """
+    Lecturas que deben ver las escrituras previas: las que siguen a una
+    escritura dentro de un /batch y las que piden ``X-Consistencia: fuerte``
+    (p. ej. el cliente recién creó o modificó lo que va a leer).
+    """
+    if request.scope.get("state", {}).get("leer_primario"):
+        return True
+    return request.headers.get("x-consistencia", "").lower() == "fuerte"
+
+
+def _conectar_lectura(request: Request, usar_replica: bool):
+    """Conexión de una réplica disponible o, si no hay o falla al conectar, del primario"""
+    if usar_replica and not _requiere_primario(request):
+        replica = replicas.elegir()
+        if replica is not None:
+            try:
+                return replica.motor.connect()
+            except OperationalError as e:
+                replicas.marcar_caida(replica, e)
+    return engine.connect()
+
+
+def _lectura(request: Request, usar_replica: bool, **opciones):
+    conexion = _conexion_lote(request)
+    if conexion is not None:
+        yield conexion
+        return
+
+    with _conectar_lectura(request, usar_replica) as conexion:
+        yield conexion.execution_options(**opciones)
+
+
+def get_lectura(request: Request):
+    """
+    Dependencia para handlers de solo lectura: conexión Core (sin Session del
+    ORM) en una transacción READ ONLY, de una réplica si hay alguna disponible.
+    Es la de los GET con varias sentencias (incluido el ETag de utils/etag.py,
+    que comparte esta conexión).
+    """
+    # psycopg envía "BEGIN READ ONLY"; se restablece al devolverla al pool
+    yield from _lectura(request, True, postgresql_readonly=True)
+
+
+def get_consulta(request: Request):
+    """
+    Dependencia para handlers de solo lectura con una sola sentencia (y sin
+    ETag): conexión Core en autocommit, sin BEGIN ni COMMIT, de una réplica si
+    hay alguna disponible.
+    """
+    yield from _lectura(request, True, isolation_level="AUTOCOMMIT")
+
+
+def get_lectura_primario(request: Request):
+    """
+    Como ``get_lectura`` pero siempre en el primario: para lecturas que llenan
+    cachés invalidadas por NOTIFY del primario (una réplica atrasada dejaría
+    datos viejos en la caché) o que devuelven posiciones del primario (cursor
+    de /sync).
+    """
+    yield from _lectura(request, False, postgresql_readonly=True)
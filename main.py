@@ -1,13 +1,22 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from config import APP_NAME, APP_VERSION
-from routes import huespedes, hoteles, habitaciones, agencias, servicios, categorias, tipos_habitacion, reservas, registro_hospedaje
+from config import APP_NAME, APP_VERSION, COMPRESION_MINIMO_BYTES
+from utils.compresion import CompresionMiddleware
+from utils.negociacion import NegociacionMiddleware, RespuestaNegociada
+from utils.notificaciones import escucha
+from utils.pipeline import ViajesMiddleware
+from utils.particiones import crear_particiones_futuras
+from database import engine, replicas
+from routes import huespedes, hoteles, habitaciones, agencias, servicios, categorias, tipos_habitacion, reservas, registro_hospedaje, batch, eventos, sync
 
 # Crear aplicación
 app = FastAPI(
     title=APP_NAME,
     version=APP_VERSION,
-    description="API de Sistema de Reservas y Gestión Hotelera"
+    description="API de Sistema de Reservas y Gestión Hotelera",
+    default_response_class=RespuestaNegociada
 )
 
 # Configurar CORS para que Android pueda conectarse
@@ -19,6 +28,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# JSON por defecto; MessagePack o CBOR según el header Accept
+app.add_middleware(NegociacionMiddleware)
+
+# Compresión brotli/gzip para respuestas grandes
+app.add_middleware(CompresionMiddleware, minimo_bytes=COMPRESION_MINIMO_BYTES)
+
+# Header X-Round-Trips con los viajes a Postgres de cada request
+app.add_middleware(ViajesMiddleware)
+
 # Incluir routers
 app.include_router(huespedes.router)
 app.include_router(hoteles.router)
@@ -29,6 +47,37 @@ app.include_router(categorias.router)
 app.include_router(tipos_habitacion.router)
 app.include_router(reservas.router)
 app.include_router(registro_hospedaje.router)
+app.include_router(batch.router)
+app.include_router(eventos.router)
+app.include_router(sync.router)
+
+
+@app.on_event("startup")
+def iniciar_escucha_notificaciones():
+    """Escuchar NOTIFY de Postgres (invalidación de cachés entre workers)"""
+    escucha.iniciar()
+
+@app.on_event("startup")
+def iniciar_verificacion_replicas():
+    """Verificar periódicamente las réplicas de lectura (si hay DATABASE_REPLICA_URLS)"""
+    replicas.iniciar()
+
+@app.on_event("startup")
+def preparar_particiones():
+    """Asegurar las particiones mensuales de los próximos meses"""
+    try:
+        with engine.begin() as conexion:
+            crear_particiones_futuras(conexion)
+    except Exception:
+        logging.getLogger(__name__).warning("No se pudieron crear las particiones futuras", exc_info=True)
+
+@app.on_event("shutdown")
+def detener_escucha_notificaciones():
+    escucha.detener()
+
+@app.on_event("shutdown")
+def detener_verificacion_replicas():
+    replicas.detener()
 
 
 @app.get("/")
@@ -1,17 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_consulta
+from schemas.ids_schema import BuscarIdsRequest, BuscarIdsResponse
+from utils.campos import respuesta_parcial
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
 from schemas.agencia_schema import (
     AgenciaCreate,
     AgenciaUpdate,
     AgenciaResponse,
     AgenciaListResponse
 )
+from utils.sentencias import ActualizacionParcial, registrar
 
 router = APIRouter(prefix="/agencias", tags=["agencias"])
 
+ELIMINAR_AGENCIA = registrar("agencia.eliminar", "DELETE FROM AGENCIA_VIAJES WHERE id_agencia = :id_agencia")
+ACTUALIZAR_AGENCIA = ActualizacionParcial("AGENCIA_VIAJES", "id_agencia", ["nombre"], "fila.id_agencia, fila.nombre")
+
 @router.post("/", response_model=AgenciaResponse, status_code=status.HTTP_201_CREATED)
 def crear_agencia(agencia: AgenciaCreate, db: Session = Depends(get_db)):
     """Crear una nueva agencia de viajes"""
@@ -19,12 +27,11 @@ def crear_agencia(agencia: AgenciaCreate, db: Session = Depends(get_db)):
         query = """
         INSERT INTO AGENCIA_VIAJES (nombre)
         VALUES (:nombre)
-        RETURNING id_agencia
+        RETURNING id_agencia, nombre
         """
-        result = db.execute(text(query), {"nombre": agencia.nombre})
-        id_agencia = result.scalar()
+        row = db.execute(text(query), {"nombre": agencia.nombre}).fetchone()
         db.commit()
-        return obtener_agencia_por_id(id_agencia, db)
+        return {"id_agencia": row[0], "nombre": row[1]}
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -33,20 +40,46 @@ def crear_agencia(agencia: AgenciaCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/", response_model=List[AgenciaListResponse])
-def listar_agencias(db: Session = Depends(get_db)):
+def listar_agencias(ids: Optional[str] = None, db: Connection = Depends(get_consulta)):
     """Listar todas las agencias de viajes"""
     try:
+        if ids:
+            lista = parsear_ids(ids)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_agencias_por_ids(lista, db)))
+        
         query = "SELECT id_agencia, nombre FROM AGENCIA_VIAJES ORDER BY nombre"
         result = db.execute(text(query)).fetchall()
         return [{"id_agencia": row[0], "nombre": row[1]} for row in result]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar agencias: {str(e)}"
         )
 
+def _obtener_agencias_por_ids(ids: List[int], db: Connection) -> dict:
+    """Obtener varias agencias en una sola consulta"""
+    query = "SELECT id_agencia, nombre FROM AGENCIA_VIAJES WHERE id_agencia = ANY(:ids)"
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    return {row[0]: {"id_agencia": row[0], "nombre": row[1]} for row in result}
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_agencias_por_ids(solicitud: BuscarIdsRequest, db: Connection = Depends(get_consulta)):
+    """Obtener varias agencias por lista de IDs (conserva el orden e informa los no encontrados)"""
+    try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_agencias_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar agencias: {str(e)}"
+        )
+
 @router.get("/{id_agencia}", response_model=AgenciaResponse)
-def obtener_agencia_por_id(id_agencia: int, db: Session = Depends(get_db)):
+def obtener_agencia_por_id(id_agencia: int, db: Connection = Depends(get_consulta)):
     """Obtener una agencia por ID"""
     try:
         query = "SELECT id_agencia, nombre FROM AGENCIA_VIAJES WHERE id_agencia = :id_agencia"
@@ -69,19 +102,15 @@ def obtener_agencia_por_id(id_agencia: int, db: Session = Depends(get_db)):
 def actualizar_agencia(id_agencia: int, agencia: AgenciaUpdate, db: Session = Depends(get_db)):
     """Actualizar una agencia"""
     try:
-        query = "SELECT id_agencia FROM AGENCIA_VIAJES WHERE id_agencia = :id_agencia"
-        if not db.execute(text(query), {"id_agencia": id_agencia}).fetchone():
+        valores = {"nombre": agencia.nombre} if agencia.nombre else {}
+        row = db.execute(ACTUALIZAR_AGENCIA.sentencia(valores), {**valores, "id_agencia": id_agencia}).fetchone()
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Agencia no encontrada"
             )
-        
-        if agencia.nombre:
-            query_update = "UPDATE AGENCIA_VIAJES SET nombre = :nombre WHERE id_agencia = :id_agencia"
-            db.execute(text(query_update), {"nombre": agencia.nombre, "id_agencia": id_agencia})
-            db.commit()
-        
-        return obtener_agencia_por_id(id_agencia, db)
+        db.commit()
+        return {"id_agencia": row[0], "nombre": row[1]}
     except HTTPException:
         raise
     except Exception as e:
@@ -95,8 +124,7 @@ def actualizar_agencia(id_agencia: int, agencia: AgenciaUpdate, db: Session = De
 def eliminar_agencia(id_agencia: int, db: Session = Depends(get_db)):
     """Eliminar una agencia"""
     try:
-        query = "DELETE FROM AGENCIA_VIAJES WHERE id_agencia = :id_agencia"
-        result = db.execute(text(query), {"id_agencia": id_agencia})
+        result = db.execute(ELIMINAR_AGENCIA, {"id_agencia": id_agencia})
         db.commit()
         if result.rowcount == 0:
             raise HTTPException(
@@ -0,0 +1,151 @@
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from database import engine
+from schemas.batch_schema import BatchRequest, BatchResponse, OperacionBatch
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+METODOS_LECTURA = {"GET", "HEAD"}
+MAX_CONCURRENCIA = 8  # Sub-requests simultáneas (cada una toma una conexión del pool)
+
+
+async def _despachar(
+    request: Request, operacion: OperacionBatch, sesion: Session = None, leer_primario: bool = False
+) -> dict:
+    """
+    Ejecutar una sub-request dentro del proceso a través de la app y sus routers
+    (con ``leer_primario`` sus lecturas no van a las réplicas)
+    """
+    partes = urlsplit(operacion.ruta)
+    if partes.path.rstrip("/") == router.prefix:
+        return {"estado": 400, "cuerpo": {"detail": "No se permite anidar /batch"}}
+
+    cuerpo = b"" if operacion.cuerpo is None else json.dumps(operacion.cuerpo).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": operacion.metodo.upper(),
+        "scheme": request.url.scheme,
+        "path": partes.path,
+        "raw_path": partes.path.encode("utf-8"),
+        "query_string": partes.query.encode("utf-8"),
+        "root_path": "",
+        "headers": [
+            (b"accept", b"application/json"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(cuerpo)).encode("latin-1")),
+        ],
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+        "state": {"sesion_lote": sesion} if sesion is not None else {"leer_primario": leer_primario},
+    }
+
+    enviado = False
+    estado = 500
+    trozos = []
+
+    async def receive():
+        nonlocal enviado
+        if enviado:
+            return {"type": "http.disconnect"}
+        enviado = True
+        return {"type": "http.request", "body": cuerpo, "more_body": False}
+
+    async def send(message):
+        nonlocal estado
+        if message["type"] == "http.response.start":
+            estado = message["status"]
+        elif message["type"] == "http.response.body":
+            trozos.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception as e:
+        return {"estado": 500, "cuerpo": {"detail": f"Error en sub-request: {str(e)}"}}
+
+    contenido = b"".join(trozos)
+    try:
+        return {"estado": estado, "cuerpo": json.loads(contenido) if contenido else None}
+    except ValueError:
+        return {"estado": estado, "cuerpo": contenido.decode("utf-8", errors="replace")}
+
+
+async def _ejecutar_concurrente(request: Request, operaciones) -> list:
+    """
+    Lecturas consecutivas en paralelo; las escrituras se ejecutan en orden y las
+    lecturas que siguen a una escritura se hacen en el primario
+    """
+    resultados = [None] * len(operaciones)
+    semaforo = asyncio.Semaphore(MAX_CONCURRENCIA)
+    hubo_escritura = False
+
+    async def ejecutar(indice, operacion, leer_primario):
+        async with semaforo:
+            resultados[indice] = await _despachar(request, operacion, leer_primario=leer_primario)
+
+    lecturas = []
+    for indice, operacion in enumerate(operaciones):
+        if operacion.metodo.upper() in METODOS_LECTURA:
+            lecturas.append(ejecutar(indice, operacion, hubo_escritura))
+            continue
+        await asyncio.gather(*lecturas)
+        lecturas = []
+        await ejecutar(indice, operacion, hubo_escritura)
+        hubo_escritura = True
+    await asyncio.gather(*lecturas)
+    return resultados
+
+
+async def _ejecutar_en_conexion(request: Request, batch: BatchRequest) -> dict:
+    """Ejecutar todas las operaciones en orden sobre una sola conexión (y transacción opcional)"""
+    conexion = await run_in_threadpool(engine.connect)
+    transaccion = await run_in_threadpool(conexion.begin) if batch.transaccion else None
+    # Con transacción, los commit/rollback de cada handler pasan a ser SAVEPOINTs
+    sesion = Session(
+        bind=conexion,
+        autoflush=False,
+        join_transaction_mode="create_savepoint" if transaccion else "conservative_savepoint"
+    )
+    resultados = []
+    try:
+        for operacion in batch.operaciones:
+            resultado = await _despachar(request, operacion, sesion)
+            resultados.append(resultado)
+            if transaccion and resultado["estado"] >= 400:
+                break
+            if resultado["estado"] >= 400:
+                # Las lecturas no hacen commit ni rollback: un error de SQL dejaría
+                # la transacción abortada para el resto. Lo confirmado no se pierde.
+                await run_in_threadpool(sesion.rollback)
+
+        if transaccion is None:
+            return {"resultados": resultados}
+
+        confirmada = len(resultados) == len(batch.operaciones) and resultados[-1]["estado"] < 400
+        if confirmada:
+            await run_in_threadpool(transaccion.commit)
+        else:
+            await run_in_threadpool(transaccion.rollback)
+            resultados += [
+                {"estado": 424, "cuerpo": {"detail": "No ejecutada: la transacción del lote fue revertida"}}
+                for _ in range(len(batch.operaciones) - len(resultados))
+            ]
+        return {"resultados": resultados, "transaccion_confirmada": confirmada}
+    finally:
+        await run_in_threadpool(sesion.close)
+        await run_in_threadpool(conexion.close)
+
+
+@router.post("/", response_model=BatchResponse)
+async def ejecutar_batch(batch: BatchRequest, request: Request):
+    """Ejecutar varias operaciones de la API en un solo round trip HTTP"""
+    if batch.transaccion or batch.compartir_conexion:
+        return await _ejecutar_en_conexion(request, batch)
+    return {"resultados": await _ejecutar_concurrente(request, batch.operaciones)}
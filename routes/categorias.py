@@ -1,17 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_consulta
+from schemas.ids_schema import BuscarIdsRequest, BuscarIdsResponse
+from utils.campos import respuesta_parcial
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
 from schemas.categoria_schema import (
     CategoriaCreate,
     CategoriaUpdate,
     CategoriaResponse,
     CategoriaListResponse
 )
+from utils.sentencias import ActualizacionParcial, registrar
 
 router = APIRouter(prefix="/categorias", tags=["categorias"])
 
+ELIMINAR_CATEGORIA = registrar("categoria.eliminar", "DELETE FROM CATEGORIA WHERE id_categoria = :id_categoria")
+ACTUALIZAR_CATEGORIA = ActualizacionParcial(
+    "CATEGORIA", "id_categoria", ["nombre_categoria"],
+    "fila.id_categoria, fila.nombre_categoria, fila.fecha_cambio",
+    adicional="fecha_cambio = NOW()"
+)
+
 @router.post("/", response_model=CategoriaResponse, status_code=status.HTTP_201_CREATED)
 def crear_categoria(categoria: CategoriaCreate, db: Session = Depends(get_db)):
     """Crear una nueva categoría de hotel"""
@@ -19,12 +31,11 @@ def crear_categoria(categoria: CategoriaCreate, db: Session = Depends(get_db)):
         query = """
         INSERT INTO CATEGORIA (nombre_categoria)
         VALUES (:nombre_categoria)
-        RETURNING id_categoria, fecha_cambio
+        RETURNING id_categoria, nombre_categoria, fecha_cambio
         """
-        result = db.execute(text(query), {"nombre_categoria": categoria.nombre_categoria})
-        row = result.fetchone()
+        row = db.execute(text(query), {"nombre_categoria": categoria.nombre_categoria}).fetchone()
         db.commit()
-        return {"id_categoria": row[0], "nombre_categoria": categoria.nombre_categoria, "fecha_cambio": row[1]}
+        return {"id_categoria": row[0], "nombre_categoria": row[1], "fecha_cambio": row[2]}
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -33,20 +44,46 @@ def crear_categoria(categoria: CategoriaCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/", response_model=List[CategoriaListResponse])
-def listar_categorias(db: Session = Depends(get_db)):
+def listar_categorias(ids: Optional[str] = None, db: Connection = Depends(get_consulta)):
     """Listar todas las categorías"""
     try:
+        if ids:
+            lista = parsear_ids(ids)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_categorias_por_ids(lista, db)))
+        
         query = "SELECT id_categoria, nombre_categoria, fecha_cambio FROM CATEGORIA ORDER BY nombre_categoria"
         result = db.execute(text(query)).fetchall()
         return [{"id_categoria": row[0], "nombre_categoria": row[1], "fecha_cambio": row[2]} for row in result]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar categorías: {str(e)}"
         )
 
+def _obtener_categorias_por_ids(ids: List[int], db: Connection) -> dict:
+    """Obtener varias categorías en una sola consulta"""
+    query = "SELECT id_categoria, nombre_categoria, fecha_cambio FROM CATEGORIA WHERE id_categoria = ANY(:ids)"
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    return {row[0]: {"id_categoria": row[0], "nombre_categoria": row[1], "fecha_cambio": row[2]} for row in result}
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_categorias_por_ids(solicitud: BuscarIdsRequest, db: Connection = Depends(get_consulta)):
+    """Obtener varias categorías por lista de IDs (conserva el orden e informa los no encontrados)"""
+    try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_categorias_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar categorías: {str(e)}"
+        )
+
 @router.get("/{id_categoria}", response_model=CategoriaResponse)
-def obtener_categoria_por_id(id_categoria: int, db: Session = Depends(get_db)):
+def obtener_categoria_por_id(id_categoria: int, db: Connection = Depends(get_consulta)):
     """Obtener una categoría por ID"""
     try:
         query = "SELECT id_categoria, nombre_categoria, fecha_cambio FROM CATEGORIA WHERE id_categoria = :id_categoria"
@@ -69,19 +106,15 @@ def obtener_categoria_por_id(id_categoria: int, db: Session = Depends(get_db)):
 def actualizar_categoria(id_categoria: int, categoria: CategoriaUpdate, db: Session = Depends(get_db)):
     """Actualizar una categoría"""
     try:
-        query = "SELECT id_categoria FROM CATEGORIA WHERE id_categoria = :id_categoria"
-        if not db.execute(text(query), {"id_categoria": id_categoria}).fetchone():
+        valores = {"nombre_categoria": categoria.nombre_categoria} if categoria.nombre_categoria else {}
+        row = db.execute(ACTUALIZAR_CATEGORIA.sentencia(valores), {**valores, "id_categoria": id_categoria}).fetchone()
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Categoría no encontrada"
             )
-        
-        if categoria.nombre_categoria:
-            query_update = "UPDATE CATEGORIA SET nombre_categoria = :nombre_categoria, fecha_cambio = NOW() WHERE id_categoria = :id_categoria"
-            db.execute(text(query_update), {"nombre_categoria": categoria.nombre_categoria, "id_categoria": id_categoria})
-            db.commit()
-        
-        return obtener_categoria_por_id(id_categoria, db)
+        db.commit()
+        return {"id_categoria": row[0], "nombre_categoria": row[1], "fecha_cambio": row[2]}
     except HTTPException:
         raise
     except Exception as e:
@@ -95,8 +128,7 @@ def actualizar_categoria(id_categoria: int, categoria: CategoriaUpdate, db: Sess
 def eliminar_categoria(id_categoria: int, db: Session = Depends(get_db)):
     """Eliminar una categoría"""
     try:
-        query = "DELETE FROM CATEGORIA WHERE id_categoria = :id_categoria"
-        result = db.execute(text(query), {"id_categoria": id_categoria})
+        result = db.execute(ELIMINAR_CATEGORIA, {"id_categoria": id_categoria})
         db.commit()
         if result.rowcount == 0:
             raise HTTPException(
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from config import EVENTOS_LATIDO_SEGUNDOS
+from database import SessionLocal
+from utils.campos import parsear_lista
+from utils.eventos import MAX_EVENTOS_REANUDACION, TIPOS_EVENTO, difusor, eventos_desde, parsear_cursor
+
+router = APIRouter(prefix="/eventos", tags=["eventos"])
+
+LATIDO = object()  # Marca para enviar un latido cuando no hay eventos
+REINTENTO_MS = 3000  # Espera sugerida al cliente SSE antes de reconectar
+
+
+def _reanudar(cursor, id_hotel, tipos):
+    # Sesión propia y breve: el stream no debe retener una conexión del pool
+    db = SessionLocal()
+    try:
+        return eventos_desde(db, cursor, id_hotel, tipos)
+    finally:
+        db.close()
+
+
+async def _flujo_eventos(id_hotel, tipos, cursor):
+    """Eventos pendientes desde ``cursor`` y luego los eventos en vivo del worker"""
+    # Suscribir antes de leer lo pendiente para no perder eventos entre ambos pasos
+    suscripcion = difusor.suscribir(id_hotel, tipos)
+    try:
+        enviados = set()
+        if cursor is not None:
+            eventos, perdidos = await run_in_threadpool(_reanudar, cursor, id_hotel, tipos)
+            if perdidos:
+                yield {"tipo": "reiniciar", "datos": {"motivo": "Eventos purgados; recargar el estado"}}
+            for evento in eventos:
+                yield evento
+                enviados.add(evento["id"])
+            if len(eventos) == MAX_EVENTOS_REANUDACION:
+                # Quedan más pendientes: el cliente reconecta con el último ID recibido
+                return
+
+        while True:
+            try:
+                evento = await asyncio.wait_for(suscripcion.cola.get(), EVENTOS_LATIDO_SEGUNDOS)
+            except asyncio.TimeoutError:
+                yield LATIDO
+                continue
+            if evento is None:
+                return
+            # Confirmados mientras se leía lo pendiente: ya se enviaron
+            if evento["id"] in enviados:
+                continue
+            yield evento
+    finally:
+        difusor.cancelar(suscripcion)
+
+
+def _parametros(tipos: Optional[str], ultimo_id: Optional[str]):
+    lista_tipos = parsear_lista(tipos, TIPOS_EVENTO, "tipos")
+    if ultimo_id in (None, ""):
+        return lista_tipos, None
+    try:
+        return lista_tipos, parsear_cursor(ultimo_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El último ID de evento no es válido"
+        )
+
+
+@router.get("/")
+async def suscribir_eventos(
+    request: Request,
+    id_hotel: Optional[int] = None,
+    tipos: Optional[str] = None,
+    ultimo_id: Optional[str] = None
+):
+    """
+    Server-Sent Events con cambios de habitaciones, check-in/checkout y estados de reservas.
+    
+    Filtrable por hotel y tipo; reanuda desde el header Last-Event-ID (o ?ultimo_id=).
+    """
+    lista_tipos, ultimo = _parametros(tipos, request.headers.get("last-event-id") or ultimo_id)
+
+    async def generar():
+        yield f"retry: {REINTENTO_MS}\n\n"
+        async for evento in _flujo_eventos(id_hotel, lista_tipos, ultimo):
+            if evento is LATIDO:
+                yield ": latido\n\n"
+                continue
+            datos = json.dumps(evento, default=str)
+            identificador = f"id: {evento['cursor']}\n" if "cursor" in evento else ""
+            yield f"{identificador}event: {evento['tipo']}\ndata: {datos}\n\n"
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def suscribir_eventos_ws(
+    websocket: WebSocket,
+    id_hotel: Optional[int] = None,
+    tipos: Optional[str] = None,
+    ultimo_id: Optional[str] = None
+):
+    """Los mismos eventos que GET /eventos por WebSocket (un mensaje JSON por evento)"""
+    try:
+        lista_tipos, ultimo = _parametros(tipos, ultimo_id)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+
+    await websocket.accept()
+
+    async def enviar():
+        async for evento in _flujo_eventos(id_hotel, lista_tipos, ultimo):
+            await websocket.send_text(json.dumps({"tipo": "latido"} if evento is LATIDO else evento, default=str))
+
+    async def esperar_cierre():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # Lo primero que termine (fin del flujo o cierre del cliente) cancela lo otro
+    tareas = [asyncio.create_task(enviar()), asyncio.create_task(esperar_cierre())]
+    try:
+        hechas, _ = await asyncio.wait(tareas, return_when=asyncio.FIRST_COMPLETED)
+        if tareas[0] in hechas:
+            await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
@@ -1,17 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_consulta, get_lectura
+from schemas.ids_schema import BuscarIdsRequest, BuscarIdsResponse
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
+from utils.campos import cargar_por_ids, parsear_lista, respuesta_parcial
+from utils.etag import etag_tablas
 from schemas.habitacion_schema import (
     HabitacionCreate, 
     HabitacionUpdate, 
     HabitacionResponse,
-    HabitacionListResponse
+    HabitacionListResponse,
+    HabitacionLoteCreate,
+    HabitacionLoteResponse
 )
+from utils.sentencias import ActualizacionParcial, registrar
 
 router = APIRouter(prefix="/habitaciones", tags=["habitaciones"])
 
+ELIMINAR_HABITACION = registrar("habitacion.eliminar", "DELETE FROM HABITACION WHERE id_habitacion = :id_habitacion")
+ACTUALIZAR_HABITACION = ActualizacionParcial(
+    "HABITACION", "id_habitacion", ["numero_habitacion", "ocupado"],
+    "fila.id_habitacion, fila.numero_habitacion, fila.id_hotel, fila.id_tipo, fila.ocupado"
+)
+
+# Columnas disponibles en ?fields= para el listado
+COLUMNAS_LISTADO = {
+    "id_habitacion": "h.id_habitacion",
+    "numero_habitacion": "h.numero_habitacion",
+    "nombre_hotel": "ho.nombre",
+    "tipo_habitacion": "th.descripcion",
+    "ocupado": "h.ocupado",
+    "id_hotel": "h.id_hotel",
+    "id_tipo": "h.id_tipo",
+}
+EXPANSIONES_LISTADO = {"hotel": "id_hotel", "tipo": "id_tipo"}
+
+MAX_HABITACIONES_LOTE = 5000
+
+def _habitacion_respuesta(row) -> dict:
+    return {
+        "id_habitacion": row[0],
+        "numero_habitacion": row[1],
+        "id_hotel": row[2],
+        "id_tipo": row[3],
+        "ocupado": row[4]
+    }
+
 @router.post("/", response_model=HabitacionResponse, status_code=status.HTTP_201_CREATED)
 def crear_habitacion(habitacion: HabitacionCreate, db: Session = Depends(get_db)):
     """Crear una nueva habitación"""
@@ -19,18 +56,17 @@ def crear_habitacion(habitacion: HabitacionCreate, db: Session = Depends(get_db)
         query = """
         INSERT INTO HABITACION (numero_habitacion, id_hotel, id_tipo, ocupado)
         VALUES (:numero_habitacion, :id_hotel, :id_tipo, :ocupado)
-        RETURNING id_habitacion
+        RETURNING id_habitacion, numero_habitacion, id_hotel, id_tipo, ocupado
         """
-        result = db.execute(text(query), {
+        row = db.execute(text(query), {
             "numero_habitacion": habitacion.numero_habitacion,
             "id_hotel": habitacion.id_hotel,
             "id_tipo": habitacion.id_tipo,
             "ocupado": habitacion.ocupado
-        })
-        id_habitacion = result.scalar()
+        }).fetchone()
         db.commit()
         
-        return obtener_habitacion_por_id(id_habitacion, db)
+        return _habitacion_respuesta(row)
     
     except Exception as e:
         db.rollback()
@@ -39,10 +75,109 @@ def crear_habitacion(habitacion: HabitacionCreate, db: Session = Depends(get_db)
             detail=f"Error al crear habitación: {str(e)}"
         )
 
-@router.get("/", response_model=List[HabitacionListResponse])
-def listar_habitaciones(db: Session = Depends(get_db)):
-    """Listar todas las habitaciones"""
+@router.post("/lote", response_model=HabitacionLoteResponse, status_code=status.HTTP_201_CREATED)
+def crear_habitaciones_lote(lote: HabitacionLoteCreate, db: Session = Depends(get_db)):
+    """
+    Crear las habitaciones de uno o varios rangos de pisos y números (piso * 100 + número).
+    
+    Se insertan con una sola sentencia en una transacción; los números que ya
+    existen en el hotel se informan como conflictos sin abortar el lote.
+    """
     try:
+        # Validar rangos y tamaño total antes de expandirlos
+        total = 0
+        for rango in lote.rangos:
+            if not (
+                rango.piso_desde <= rango.piso_hasta
+                and rango.habitacion_desde <= rango.habitacion_hasta
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Rango no válido: pisos y habitaciones desde <= hasta"
+                )
+            total += (
+                (rango.piso_hasta - rango.piso_desde + 1)
+                * (rango.habitacion_hasta - rango.habitacion_desde + 1)
+            )
+            if total > MAX_HABITACIONES_LOTE:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Máximo {MAX_HABITACIONES_LOTE} habitaciones por lote"
+                )
+        
+        habitaciones = {}
+        conflictos = []
+        for rango in lote.rangos:
+            for piso in range(rango.piso_desde, rango.piso_hasta + 1):
+                for numero in range(rango.habitacion_desde, rango.habitacion_hasta + 1):
+                    numero_habitacion = piso * 100 + numero
+                    if numero_habitacion in habitaciones:
+                        conflictos.append(numero_habitacion)
+                    else:
+                        habitaciones[numero_habitacion] = rango
+        
+        query = """
+        INSERT INTO HABITACION (numero_habitacion, id_hotel, id_tipo, ocupado)
+        SELECT numero_habitacion, :id_hotel, id_tipo, ocupado
+        FROM unnest(CAST(:numeros AS INTEGER[]), CAST(:tipos AS INTEGER[]), CAST(:ocupados AS BOOLEAN[]))
+            AS d(numero_habitacion, id_tipo, ocupado)
+        ON CONFLICT (id_hotel, numero_habitacion) DO NOTHING
+        RETURNING id_habitacion, numero_habitacion, id_hotel, id_tipo, ocupado
+        """
+        result = db.execute(text(query), {
+            "id_hotel": lote.id_hotel,
+            "numeros": list(habitaciones),
+            "tipos": [r.id_tipo for r in habitaciones.values()],
+            "ocupados": [r.ocupado for r in habitaciones.values()]
+        }).fetchall()
+        db.commit()
+        
+        creadas = sorted(
+            (
+                {
+                    "id_habitacion": row[0],
+                    "numero_habitacion": row[1],
+                    "id_hotel": row[2],
+                    "id_tipo": row[3],
+                    "ocupado": row[4]
+                }
+                for row in result
+            ),
+            key=lambda h: h["numero_habitacion"]
+        )
+        insertados = {h["numero_habitacion"] for h in creadas}
+        conflictos += [n for n in habitaciones if n not in insertados]
+        return {"id_hotel": lote.id_hotel, "creadas": creadas, "conflictos": sorted(conflictos)}
+    
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error al crear habitaciones: {str(e)}"
+        )
+
+@router.get("/", response_model=List[HabitacionListResponse], dependencies=[Depends(etag_tablas("HABITACION", "HOTEL", "TIPO_HABITACION"))])
+def listar_habitaciones(
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    ids: Optional[str] = None,
+    response: Response = None,
+    db: Connection = Depends(get_lectura)
+):
+    """Listar todas las habitaciones (?fields= para elegir columnas, ?expand=hotel,tipo)"""
+    try:
+        if ids:
+            lista = parsear_ids(ids)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_habitaciones_por_ids(lista, db)), response)
+        
+        campos = parsear_lista(fields, COLUMNAS_LISTADO, "fields")
+        expandir = parsear_lista(expand, EXPANSIONES_LISTADO, "expand")
+        if campos or expandir:
+            return respuesta_parcial(_listar_habitaciones_parcial(campos, expandir, db), response)
+        
         query = """
         SELECT h.id_habitacion, h.numero_habitacion, ho.nombre, th.descripcion, h.ocupado
         FROM HABITACION h
@@ -61,14 +196,87 @@ def listar_habitaciones(db: Session = Depends(get_db)):
             }
             for row in result
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar habitaciones: {str(e)}"
         )
 
-@router.get("/{id_habitacion}", response_model=HabitacionResponse)
-def obtener_habitacion_por_id(id_habitacion: int, db: Session = Depends(get_db)):
+def _listar_habitaciones_parcial(campos: List[str], expandir: List[str], db: Connection) -> List[dict]:
+    """Listado con solo las columnas pedidas; HOTEL y TIPO_HABITACION se unen solo si hacen falta"""
+    campos = campos or ["id_habitacion", "numero_habitacion", "nombre_hotel", "tipo_habitacion", "ocupado"]
+    columnas = campos + [EXPANSIONES_LISTADO[e] for e in expandir if EXPANSIONES_LISTADO[e] not in campos]
+    expresiones = [COLUMNAS_LISTADO[c] for c in columnas]
+    
+    query = f"SELECT {', '.join(expresiones)} FROM HABITACION h"
+    usa_hotel = any(e.startswith("ho.") for e in expresiones)
+    if usa_hotel:
+        query += " INNER JOIN HOTEL ho ON h.id_hotel = ho.id_hotel"
+    if any(e.startswith("th.") for e in expresiones):
+        query += " INNER JOIN TIPO_HABITACION th ON h.id_tipo = th.id_tipo"
+    # Sin el JOIN a HOTEL se ordena por id_hotel (mismo agrupamiento por hotel)
+    query += " ORDER BY ho.nombre, h.numero_habitacion" if usa_hotel else " ORDER BY h.id_hotel, h.numero_habitacion"
+    
+    filas = [dict(zip(columnas, row)) for row in db.execute(text(query)).fetchall()]
+    
+    # Relaciones: una consulta por relación para todas las filas
+    if "hotel" in expandir:
+        hoteles = cargar_por_ids(db, """
+            SELECT id_hotel, id_hotel, nombre, direccion, anio_inauguracion, id_categoria
+            FROM HOTEL WHERE id_hotel = ANY(:ids)
+        """, (f["id_hotel"] for f in filas))
+        for fila in filas:
+            fila["hotel"] = hoteles.get(fila["id_hotel"])
+    if "tipo" in expandir:
+        tipos = cargar_por_ids(db, """
+            SELECT id_tipo, id_tipo, descripcion, capacidad, valor
+            FROM TIPO_HABITACION WHERE id_tipo = ANY(:ids)
+        """, (f["id_tipo"] for f in filas))
+        for fila in filas:
+            fila["tipo"] = tipos.get(fila["id_tipo"])
+    
+    for fila in filas:
+        for columna in columnas[len(campos):]:
+            del fila[columna]
+    return filas
+
+def _obtener_habitaciones_por_ids(ids: List[int], db: Connection) -> dict:
+    """Obtener varias habitaciones en una sola consulta"""
+    query = """
+    SELECT id_habitacion, numero_habitacion, id_hotel, id_tipo, ocupado
+    FROM HABITACION
+    WHERE id_habitacion = ANY(:ids)
+    """
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    return {
+        row[0]: {
+            "id_habitacion": row[0],
+            "numero_habitacion": row[1],
+            "id_hotel": row[2],
+            "id_tipo": row[3],
+            "ocupado": row[4]
+        }
+        for row in result
+    }
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_habitaciones_por_ids(solicitud: BuscarIdsRequest, db: Connection = Depends(get_consulta)):
+    """Obtener varias habitaciones por lista de IDs (conserva el orden e informa los no encontrados)"""
+    try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_habitaciones_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar habitaciones: {str(e)}"
+        )
+
+@router.get("/{id_habitacion}", response_model=HabitacionResponse, dependencies=[Depends(etag_tablas("HABITACION"))])
+def obtener_habitacion_por_id(id_habitacion: int, db: Connection = Depends(get_lectura)):
     """Obtener una habitación por ID"""
     try:
         query = """
@@ -84,13 +292,7 @@ def obtener_habitacion_por_id(id_habitacion: int, db: Session = Depends(get_db))
                 detail="Habitación no encontrada"
             )
         
-        return {
-            "id_habitacion": habitacion[0],
-            "numero_habitacion": habitacion[1],
-            "id_hotel": habitacion[2],
-            "id_tipo": habitacion[3],
-            "ocupado": habitacion[4]
-        }
+        return _habitacion_respuesta(habitacion)
     except HTTPException:
         raise
     except Exception as e:
@@ -103,31 +305,21 @@ def obtener_habitacion_por_id(id_habitacion: int, db: Session = Depends(get_db))
 def actualizar_habitacion(id_habitacion: int, habitacion: HabitacionUpdate, db: Session = Depends(get_db)):
     """Actualizar una habitación"""
     try:
-        # Verificar que existe
-        query = "SELECT id_habitacion FROM HABITACION WHERE id_habitacion = :id_habitacion"
-        if not db.execute(text(query), {"id_habitacion": id_habitacion}).fetchone():
+        valores = {}
+        if habitacion.numero_habitacion:
+            valores["numero_habitacion"] = habitacion.numero_habitacion
+        if habitacion.ocupado is not None:
+            valores["ocupado"] = habitacion.ocupado
+        
+        row = db.execute(ACTUALIZAR_HABITACION.sentencia(valores), {**valores, "id_habitacion": id_habitacion}).fetchone()
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Habitación no encontrada"
             )
+        db.commit()
         
-        # Actualizar
-        campos = []
-        params = {"id_habitacion": id_habitacion}
-        
-        if habitacion.numero_habitacion:
-            campos.append("numero_habitacion = :numero_habitacion")
-            params["numero_habitacion"] = habitacion.numero_habitacion
-        if habitacion.ocupado is not None:
-            campos.append("ocupado = :ocupado")
-            params["ocupado"] = habitacion.ocupado
-        
-        if campos:
-            query_update = f"UPDATE HABITACION SET {', '.join(campos)} WHERE id_habitacion = :id_habitacion"
-            db.execute(text(query_update), params)
-            db.commit()
-        
-        return obtener_habitacion_por_id(id_habitacion, db)
+        return _habitacion_respuesta(row)
     
     except HTTPException:
         raise
@@ -142,8 +334,7 @@ def actualizar_habitacion(id_habitacion: int, habitacion: HabitacionUpdate, db:
 def eliminar_habitacion(id_habitacion: int, db: Session = Depends(get_db)):
     """Eliminar una habitación"""
     try:
-        query = "DELETE FROM HABITACION WHERE id_habitacion = :id_habitacion"
-        result = db.execute(text(query), {"id_habitacion": id_habitacion})
+        result = db.execute(ELIMINAR_HABITACION, {"id_habitacion": id_habitacion})
         db.commit()
         
         if result.rowcount == 0:
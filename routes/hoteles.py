@@ -1,48 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from datetime import date, timedelta
+from database import get_db, get_lectura, get_lectura_primario
+from schemas.ids_schema import BuscarIdsRequest, BuscarIdsResponse
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
+from utils.campos import cargar_por_ids, parsear_lista, respuesta_parcial
+from routes.reservas import QUERY_ULTIMO_ESTADO
+from utils.cache_tablero import cache_tablero
+from utils.calendario import cache_calendarios, celdas, empaquetar, filas_texto
+from utils.etag import etag_tablas
+from utils.pipeline import Ejecucion
 from schemas.hotel_schema import (
     HotelCreate, 
     HotelUpdate, 
     HotelResponse, 
-    HotelListResponse
+    HotelListResponse,
+    HotelResumenResponse,
+    TableroHotelResponse,
+    CalendarioHotelResponse
 )
+from utils.sentencias import ActualizacionParcial, registrar
 
 router = APIRouter(prefix="/hoteles", tags=["hoteles"])
 
+ELIMINAR_HOTEL = registrar("hotel.eliminar", "DELETE FROM HOTEL WHERE id_hotel = :id_hotel")
+ACTUALIZAR_HOTEL = ActualizacionParcial(
+    "HOTEL", "id_hotel", ["nombre", "direccion", "id_categoria"],
+    "fila.id_hotel, fila.nombre, fila.direccion, fila.anio_inauguracion, fila.id_categoria, "
+    "ARRAY(SELECT t.telefono FROM TELEFONOS_HOTEL t WHERE t.id_hotel = fila.id_hotel)"
+)
+
+# Columnas disponibles en ?fields= y relaciones en ?expand=
+COLUMNAS_HOTEL = ["id_hotel", "nombre", "direccion", "anio_inauguracion", "id_categoria"]
+EXPANSIONES_HOTEL = ["telefonos", "categoria"]
+
+# Límites de /resumen y /calendario, y tipo de la respuesta binaria del calendario
+MAX_LIMITE_RESUMEN = 500
+MAX_DIAS_CALENDARIO = 366
+MEDIA_CALENDARIO_BINARIO = "application/octet-stream"
+
+QUERY_TELEFONOS = "SELECT id_hotel, telefono FROM TELEFONOS_HOTEL WHERE id_hotel = ANY(:ids)"
+QUERY_CATEGORIAS = """
+SELECT id_categoria, id_categoria, nombre_categoria FROM CATEGORIA WHERE id_categoria = ANY(:ids)
+"""
+
+def _hoteles_parciales(filtro: str, params: dict, campos: List[str], expandir: List[str], db: Connection) -> List[dict]:
+    """Hoteles con solo las columnas pedidas y relaciones cargadas en una consulta cada una"""
+    campos = campos or COLUMNAS_HOTEL
+    columnas = list(dict.fromkeys(["id_hotel", "id_categoria"] + campos))
+    query = f"SELECT {', '.join(columnas)} FROM HOTEL {filtro}"
+    hoteles = [dict(zip(columnas, row)) for row in db.execute(text(query), params).fetchall()]
+    
+    if "telefonos" in expandir:
+        telefonos = cargar_por_ids(db, QUERY_TELEFONOS, (h["id_hotel"] for h in hoteles), agrupar=True)
+        for hotel in hoteles:
+            hotel["telefonos"] = [t["telefono"] for t in telefonos.get(hotel["id_hotel"], [])]
+    if "categoria" in expandir:
+        categorias = cargar_por_ids(db, QUERY_CATEGORIAS, (h["id_categoria"] for h in hoteles))
+        for hotel in hoteles:
+            hotel["categoria"] = categorias.get(hotel["id_categoria"])
+    
+    for hotel in hoteles:
+        for columna in ("id_hotel", "id_categoria"):
+            if columna not in campos:
+                del hotel[columna]
+    return hoteles
+
+def _hotel_respuesta(row) -> dict:
+    return {
+        "id_hotel": row[0],
+        "nombre": row[1],
+        "direccion": row[2],
+        "anio_inauguracion": row[3],
+        "id_categoria": row[4],
+        "telefonos": list(row[5])
+    }
+
 @router.post("/", response_model=HotelResponse, status_code=status.HTTP_201_CREATED)
 def crear_hotel(hotel: HotelCreate, db: Session = Depends(get_db)):
     """Crear un nuevo hotel"""
     try:
-        # Insertar hotel
+        # Insertar hotel y teléfonos y devolver ambos en una sola sentencia
         query = """
-        INSERT INTO HOTEL (nombre, direccion, anio_inauguracion, id_categoria)
-        VALUES (:nombre, :direccion, :anio_inauguracion, :id_categoria)
-        RETURNING id_hotel
-        """
-        result = db.execute(text(query), {
-            "nombre": hotel.nombre,
-            "direccion": hotel.direccion,
-            "anio_inauguracion": hotel.anio_inauguracion,
-            "id_categoria": hotel.id_categoria
-        })
-        id_hotel = result.scalar()
-        
-        # Insertar teléfonos
-        for telefono in hotel.telefonos:
-            query_tel = """
+        WITH nuevo AS (
+            INSERT INTO HOTEL (nombre, direccion, anio_inauguracion, id_categoria)
+            VALUES (:nombre, :direccion, :anio_inauguracion, :id_categoria)
+            RETURNING id_hotel, nombre, direccion, anio_inauguracion, id_categoria
+        ), telefonos AS (
             INSERT INTO TELEFONOS_HOTEL (id_hotel, telefono)
-            VALUES (:id_hotel, :telefono)
-            """
-            db.execute(text(query_tel), {
-                "id_hotel": id_hotel,
-                "telefono": telefono
+            SELECT nuevo.id_hotel, tel.telefono
+            FROM nuevo, unnest(CAST(:telefonos AS TEXT[])) AS tel(telefono)
+            RETURNING telefono
+        )
+        SELECT nuevo.*, ARRAY(SELECT telefono FROM telefonos) FROM nuevo
+        """
+        with Ejecucion(db) as ejecucion:
+            creado = ejecucion.ejecutar(text(query), {
+                "nombre": hotel.nombre,
+                "direccion": hotel.direccion,
+                "anio_inauguracion": hotel.anio_inauguracion,
+                "id_categoria": hotel.id_categoria,
+                "telefonos": hotel.telefonos
             })
         
         db.commit()
-        return obtener_hotel_por_id(id_hotel, db)
+        return _hotel_respuesta(creado.fila())
     
     except Exception as e:
         db.rollback()
@@ -51,10 +116,25 @@ def crear_hotel(hotel: HotelCreate, db: Session = Depends(get_db)):
             detail=f"Error al crear hotel: {str(e)}"
         )
 
-@router.get("/", response_model=List[HotelListResponse])
-def listar_hoteles(db: Session = Depends(get_db)):
-    """Listar todos los hoteles"""
+@router.get("/", response_model=List[HotelListResponse], dependencies=[Depends(etag_tablas("HOTEL", "TELEFONOS_HOTEL", "CATEGORIA"))])
+def listar_hoteles(
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    ids: Optional[str] = None,
+    response: Response = None,
+    db: Connection = Depends(get_lectura)
+):
+    """Listar todos los hoteles (?fields= para elegir columnas, ?expand=telefonos,categoria)"""
     try:
+        if ids:
+            lista = parsear_ids(ids)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_hoteles_por_ids(lista, db)), response)
+        
+        campos = parsear_lista(fields, COLUMNAS_HOTEL, "fields")
+        expandir = parsear_lista(expand, EXPANSIONES_HOTEL, "expand")
+        if campos or expandir:
+            return respuesta_parcial(_hoteles_parciales("ORDER BY nombre", {}, campos, expandir, db), response)
+        
         query = """
         SELECT id_hotel, nombre, direccion, anio_inauguracion
         FROM HOTEL
@@ -70,16 +150,169 @@ def listar_hoteles(db: Session = Depends(get_db)):
             }
             for row in result
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar hoteles: {str(e)}"
         )
 
-@router.get("/{id_hotel}", response_model=HotelResponse)
-def obtener_hotel_por_id(id_hotel: int, db: Session = Depends(get_db)):
-    """Obtener un hotel por ID"""
+@router.get(
+    "/resumen",
+    response_model=List[HotelResumenResponse],
+    dependencies=[Depends(etag_tablas("HOTEL", "TELEFONOS_HOTEL", "CATEGORIA", "HABITACION", "TIPO_HABITACION"))]
+)
+def listar_resumen_hoteles(
+    id_categoria: Optional[int] = None,
+    ids: Optional[str] = None,
+    limite: int = 100,
+    desplazamiento: int = 0,
+    db: Connection = Depends(get_lectura)
+):
+    """
+    Hoteles con teléfonos, categoría y conteo de habitaciones (totales, ocupadas y por tipo).
+    
+    Se calcula en una sola consulta agrupada para la página pedida.
+    """
+    try:
+        if not 1 <= limite <= MAX_LIMITE_RESUMEN or desplazamiento < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El límite debe estar entre 1 y {MAX_LIMITE_RESUMEN} y el desplazamiento no puede ser negativo"
+            )
+        
+        filtros = []
+        params = {"limite": limite, "desplazamiento": desplazamiento}
+        if id_categoria is not None:
+            filtros.append("id_categoria = :id_categoria")
+            params["id_categoria"] = id_categoria
+        if ids:
+            filtros.append("id_hotel = ANY(:ids)")
+            params["ids"] = parsear_ids(ids)
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        
+        query = f"""
+        WITH pagina AS (
+            SELECT id_hotel, nombre, direccion, anio_inauguracion, id_categoria
+            FROM HOTEL
+            {where}
+            ORDER BY nombre, id_hotel
+            LIMIT :limite OFFSET :desplazamiento
+        ), telefonos AS (
+            SELECT id_hotel, array_agg(telefono ORDER BY telefono) AS telefonos
+            FROM TELEFONOS_HOTEL
+            WHERE id_hotel IN (SELECT id_hotel FROM pagina)
+            GROUP BY id_hotel
+        ), por_tipo AS (
+            SELECT ha.id_hotel, ha.id_tipo, th.descripcion,
+                   COUNT(*) AS total, COUNT(*) FILTER (WHERE ha.ocupado) AS ocupadas
+            FROM HABITACION ha
+            INNER JOIN TIPO_HABITACION th ON ha.id_tipo = th.id_tipo
+            WHERE ha.id_hotel IN (SELECT id_hotel FROM pagina)
+            GROUP BY ha.id_hotel, ha.id_tipo, th.descripcion
+        ), habitaciones AS (
+            SELECT id_hotel, SUM(total)::INTEGER AS total, SUM(ocupadas)::INTEGER AS ocupadas,
+                   json_agg(json_build_object(
+                       'id_tipo', id_tipo, 'descripcion', descripcion,
+                       'total', total, 'ocupadas', ocupadas
+                   ) ORDER BY id_tipo) AS por_tipo
+            FROM por_tipo
+            GROUP BY id_hotel
+        )
+        SELECT p.id_hotel, p.nombre, p.direccion, p.anio_inauguracion, p.id_categoria,
+               c.nombre_categoria, COALESCE(t.telefonos, '{{}}'),
+               COALESCE(h.total, 0), COALESCE(h.ocupadas, 0), COALESCE(h.por_tipo, '[]')
+        FROM pagina p
+        LEFT JOIN CATEGORIA c ON p.id_categoria = c.id_categoria
+        LEFT JOIN telefonos t ON p.id_hotel = t.id_hotel
+        LEFT JOIN habitaciones h ON p.id_hotel = h.id_hotel
+        ORDER BY p.nombre, p.id_hotel
+        """
+        result = db.execute(text(query), params).fetchall()
+        return [
+            {
+                "id_hotel": row[0],
+                "nombre": row[1],
+                "direccion": row[2],
+                "anio_inauguracion": row[3],
+                "id_categoria": row[4],
+                "nombre_categoria": row[5],
+                "telefonos": row[6],
+                "habitaciones_total": row[7],
+                "habitaciones_ocupadas": row[8],
+                "habitaciones_por_tipo": row[9]
+            }
+            for row in result
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener resumen de hoteles: {str(e)}"
+        )
+
+def _obtener_hoteles_por_ids(ids: List[int], db: Connection) -> dict:
+    """Obtener varios hoteles con sus teléfonos en dos consultas"""
+    query = """
+    SELECT id_hotel, nombre, direccion, anio_inauguracion, id_categoria
+    FROM HOTEL
+    WHERE id_hotel = ANY(:ids)
+    """
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    hoteles = {
+        row[0]: {
+            "id_hotel": row[0],
+            "nombre": row[1],
+            "direccion": row[2],
+            "anio_inauguracion": row[3],
+            "id_categoria": row[4],
+            "telefonos": []
+        }
+        for row in result
+    }
+    
+    telefonos = db.execute(text(QUERY_TELEFONOS), {"ids": list(hoteles)}).fetchall()
+    for tel in telefonos:
+        hoteles[tel[0]]["telefonos"].append(tel[1])
+    return hoteles
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_hoteles_por_ids(solicitud: BuscarIdsRequest, db: Connection = Depends(get_lectura)):
+    """Obtener varios hoteles por lista de IDs (conserva el orden e informa los no encontrados)"""
     try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_hoteles_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar hoteles: {str(e)}"
+        )
+
+@router.get("/{id_hotel}", response_model=HotelResponse, dependencies=[Depends(etag_tablas("HOTEL", "TELEFONOS_HOTEL", "CATEGORIA"))])
+def obtener_hotel_por_id(
+    id_hotel: int,
+    db: Connection = Depends(get_lectura),
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    response: Response = None
+):
+    """Obtener un hotel por ID (con ?fields= los teléfonos solo se cargan con ?expand=telefonos)"""
+    try:
+        campos = parsear_lista(fields, COLUMNAS_HOTEL, "fields")
+        expandir = parsear_lista(expand, EXPANSIONES_HOTEL, "expand")
+        if campos or expandir:
+            hoteles = _hoteles_parciales("WHERE id_hotel = :id_hotel", {"id_hotel": id_hotel}, campos, expandir, db)
+            if not hoteles:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Hotel no encontrado"
+                )
+            return respuesta_parcial(hoteles[0], response)
+        
         query = """
         SELECT id_hotel, nombre, direccion, anio_inauguracion, id_categoria
         FROM HOTEL
@@ -114,38 +347,176 @@ def obtener_hotel_por_id(id_hotel: int, db: Session = Depends(get_db)):
             detail=f"Error al obtener hotel: {str(e)}"
         )
 
-@router.put("/{id_hotel}", response_model=HotelResponse)
-def actualizar_hotel(id_hotel: int, hotel: HotelUpdate, db: Session = Depends(get_db)):
-    """Actualizar un hotel"""
+@router.get("/{id_hotel}/tablero", response_model=TableroHotelResponse)
+def obtener_tablero_hotel(id_hotel: int, db: Connection = Depends(get_lectura_primario)):
+    """
+    Contadores del tablero de recepción: ocupación, hospedajes activos, menores,
+    mascotas, reservas que inician o terminan hoy, llegadas y salidas del día.
+    
+    Una sola consulta con varios agregados, reutilizada unos segundos por hotel.
+    Las estancias (activas o con checkout desde hoy) no podan particiones de
+    REGISTRO_HOSPEDAJE, que van por mes de check-in: se leen todas.
+    """
     try:
-        # Verificar que existe
-        query = "SELECT id_hotel FROM HOTEL WHERE id_hotel = :id_hotel"
-        if not db.execute(text(query), {"id_hotel": id_hotel}).fetchone():
+        hoy = date.today()
+        tablero = cache_tablero.obtener(id_hotel)
+        if tablero is not None and tablero["fecha"] == hoy:
+            return tablero
+        
+        query = f"""
+        WITH habitaciones AS (
+            SELECT id_habitacion, ocupado FROM HABITACION WHERE id_hotel = :id_hotel
+        ), estancias AS (
+            SELECT rh.fecha_hora_checkin, rh.fecha_checkout, rh.mascota, h.tipo_id
+            FROM REGISTRO_HOSPEDAJE rh
+            INNER JOIN habitaciones ha ON rh.id_habitacion = ha.id_habitacion
+            LEFT JOIN HUESPED h ON rh.id_huesped = h.numero_id
+            WHERE rh.fecha_checkout IS NULL OR rh.fecha_checkout >= :hoy
+        ), reservas AS (
+            SELECT r.id_reserva, r.fecha_inicio, r.fecha_fin, ult.estado
+            FROM RESERVA r
+            LEFT JOIN LATERAL ({QUERY_ULTIMO_ESTADO}) ult ON TRUE
+            WHERE (r.fecha_inicio = :hoy OR r.fecha_fin = :hoy)
+            AND EXISTS (
+                SELECT 1 FROM HABITACION_RESERVA hr
+                INNER JOIN habitaciones ha ON hr.id_habitacion = ha.id_habitacion
+                WHERE hr.id_reserva = r.id_reserva
+            )
+        )
+        SELECT
+            EXISTS (SELECT 1 FROM HOTEL WHERE id_hotel = :id_hotel),
+            (SELECT COUNT(*) FROM habitaciones),
+            (SELECT COUNT(*) FILTER (WHERE ocupado) FROM habitaciones),
+            e.activos, e.menores, e.mascotas, e.llegadas, e.salidas,
+            (SELECT COUNT(*) FILTER (WHERE fecha_inicio = :hoy) FROM reservas
+             WHERE estado IS DISTINCT FROM 'Cancelada'),
+            (SELECT COUNT(*) FILTER (WHERE fecha_fin = :hoy) FROM reservas
+             WHERE estado IS DISTINCT FROM 'Cancelada')
+        FROM (
+            SELECT
+                COUNT(*) FILTER (WHERE fecha_checkout IS NULL) AS activos,
+                COUNT(*) FILTER (WHERE fecha_checkout IS NULL AND tipo_id = 'Tarjeta de Identidad') AS menores,
+                COUNT(*) FILTER (WHERE fecha_checkout IS NULL AND mascota) AS mascotas,
+                COUNT(*) FILTER (WHERE fecha_hora_checkin >= :hoy) AS llegadas,
+                COUNT(*) FILTER (WHERE fecha_checkout = :hoy) AS salidas
+            FROM estancias
+        ) e
+        """
+        row = db.execute(text(query), {"id_hotel": id_hotel, "hoy": hoy}).fetchone()
+        if not row[0]:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Hotel no encontrado"
             )
         
-        # Actualizar
-        campos = []
-        params = {"id_hotel": id_hotel}
+        tablero = {
+            "id_hotel": id_hotel,
+            "fecha": hoy,
+            "habitaciones_total": row[1],
+            "habitaciones_ocupadas": row[2],
+            "hospedajes_activos": row[3],
+            "menores_hospedados": row[4],
+            "mascotas_hospedadas": row[5],
+            "llegadas_hoy": row[6],
+            "salidas_hoy": row[7],
+            "reservas_inician_hoy": row[8],
+            "reservas_terminan_hoy": row[9]
+        }
+        cache_tablero.guardar(id_hotel, tablero)
+        return tablero
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener tablero: {str(e)}"
+        )
+
+@router.get("/{id_hotel}/calendario", response_model=CalendarioHotelResponse)
+def obtener_calendario_hotel(
+    id_hotel: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    formato: str = "json",
+    db: Connection = Depends(get_lectura_primario)
+):
+    """
+    Ocupación habitación × día entre ``desde`` y ``hasta`` (inclusive; por
+    defecto los próximos 30 días), con ``formato=json`` o ``formato=binario``
+    (matrices empaquetadas en bits, ver utils.calendario.empaquetar).
+    """
+    try:
+        desde = desde or date.today()
+        hasta = hasta or desde + timedelta(days=29)
+        if hasta < desde or (hasta - desde).days >= MAX_DIAS_CALENDARIO:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El rango debe tener entre 1 y {MAX_DIAS_CALENDARIO} días"
+            )
+        if formato not in ("json", "binario"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="formato debe ser 'json' o 'binario'"
+            )
+        
+        calendario = cache_calendarios.obtener(db, id_hotel, desde, hasta)
+        if calendario is None:
+            query = "SELECT id_hotel FROM HOTEL WHERE id_hotel = :id_hotel"
+            if not db.execute(text(query), {"id_hotel": id_hotel}).fetchone():
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Hotel no encontrado"
+                )
+            if formato == "binario":
+                return Response(content=b"", media_type=MEDIA_CALENDARIO_BINARIO)
+            return {"id_hotel": id_hotel, "desde": desde, "hasta": hasta, "habitaciones": []}
+        
+        reservada, hospedada = calendario.recorte(desde, hasta)
+        if formato == "binario":
+            return Response(
+                content=empaquetar(calendario, desde, reservada, hospedada),
+                media_type=MEDIA_CALENDARIO_BINARIO
+            )
         
+        filas = filas_texto(celdas(reservada, hospedada))
+        return {
+            "id_hotel": id_hotel,
+            "desde": desde,
+            "hasta": hasta,
+            "habitaciones": [
+                {"id_habitacion": int(i), "numero_habitacion": int(n), "dias": d}
+                for i, n, d in zip(calendario.ids, calendario.numeros, filas)
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener calendario: {str(e)}"
+        )
+
+@router.put("/{id_hotel}", response_model=HotelResponse)
+def actualizar_hotel(id_hotel: int, hotel: HotelUpdate, db: Session = Depends(get_db)):
+    """Actualizar un hotel"""
+    try:
+        valores = {}
         if hotel.nombre:
-            campos.append("nombre = :nombre")
-            params["nombre"] = hotel.nombre
+            valores["nombre"] = hotel.nombre
         if hotel.direccion:
-            campos.append("direccion = :direccion")
-            params["direccion"] = hotel.direccion
+            valores["direccion"] = hotel.direccion
         if hotel.id_categoria:
-            campos.append("id_categoria = :id_categoria")
-            params["id_categoria"] = hotel.id_categoria
-        
-        if campos:
-            query_update = f"UPDATE HOTEL SET {', '.join(campos)} WHERE id_hotel = :id_hotel"
-            db.execute(text(query_update), params)
-            db.commit()
+            valores["id_categoria"] = hotel.id_categoria
         
-        return obtener_hotel_por_id(id_hotel, db)
+        # Actualizar y devolver la fila con sus teléfonos (sin campos solo se lee)
+        row = db.execute(ACTUALIZAR_HOTEL.sentencia(valores), {**valores, "id_hotel": id_hotel}).fetchone()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hotel no encontrado"
+            )
+        db.commit()
+        return _hotel_respuesta(row)
     
     except HTTPException:
         raise
@@ -160,8 +531,7 @@ def actualizar_hotel(id_hotel: int, hotel: HotelUpdate, db: Session = Depends(ge
 def eliminar_hotel(id_hotel: int, db: Session = Depends(get_db)):
     """Eliminar un hotel"""
     try:
-        query = "DELETE FROM HOTEL WHERE id_hotel = :id_hotel"
-        result = db.execute(text(query), {"id_hotel": id_hotel})
+        result = db.execute(ELIMINAR_HOTEL, {"id_hotel": id_hotel})
         db.commit()
         
         if result.rowcount == 0:
@@ -1,48 +1,165 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_consulta, get_lectura
+from schemas.ids_schema import BuscarIdsTextoRequest, BuscarIdsResponse
+from utils.cache_huespedes import cache_huespedes, expresion_invalidacion, invalidar_huesped, invalidar_local
+from utils.campos import respuesta_parcial
+from utils.carga_masiva import TAMANO_LOTE_COPY, copiar_filas, leer_registros
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
+from utils.etag import etag_tablas
+from utils.pipeline import Ejecucion
 from schemas.huesped_schema import (
     HuespedCreate, 
     HuespedUpdate, 
     HuespedResponse, 
-    HuespedListResponse
+    HuespedListResponse,
+    HuespedBusquedaResponse
 )
+from utils.sentencias import ActualizacionParcial, registrar
 
 router = APIRouter(prefix="/huespedes", tags=["huespedes"])
 
+ELIMINAR_HUESPED = registrar("huesped.eliminar", "DELETE FROM HUESPED WHERE numero_id = :numero_id")
+ACTUALIZAR_HUESPED = ActualizacionParcial(
+    "HUESPED", "numero_id", ["nombre", "direccion"],
+    "fila.numero_id, fila.tipo_id, fila.nombre, fila.direccion, "
+    "ARRAY(SELECT t.telefono FROM TELEFONOS_HUESPED t WHERE t.numero_id = fila.numero_id)",
+    publicar=expresion_invalidacion("fila.numero_id")
+)
+
+MAX_ERRORES_REPORTADOS = 1000
+MAX_RESULTADOS_BUSQUEDA = 50
+COLUMNAS_CARGA = ("linea", "numero_id", "tipo_id", "nombre", "direccion", "telefonos")
+
+def crear_tabla_carga_huespedes(db: Session):
+    """Tabla temporal donde se copian los huéspedes de una carga masiva"""
+    query = """
+    CREATE TEMP TABLE huespedes_carga (
+        linea INTEGER,
+        numero_id TEXT,
+        tipo_id TEXT,
+        nombre TEXT,
+        direccion TEXT,
+        telefonos TEXT[]
+    ) ON COMMIT DROP
+    """
+    db.execute(text(query))
+
+def fila_carga_huesped(numero: int, registro: dict):
+    """Validar un registro como HuespedCreate y convertirlo en fila para COPY (telefonos "a|b" en CSV)"""
+    if isinstance(registro.get("telefonos"), str):
+        registro["telefonos"] = [t.strip() for t in registro["telefonos"].split("|") if t.strip()]
+    elif registro.get("telefonos") is None:
+        registro["telefonos"] = []
+    huesped = HuespedCreate(**registro)
+    return (numero, huesped.numero_id, huesped.tipo_id, huesped.nombre, huesped.direccion,
+            sorted(set(huesped.telefonos)))
+
+def fusionar_huespedes(db: Session) -> dict:
+    """
+    Fusionar huespedes_carga con HUESPED en una sola sentencia: INSERT ... ON CONFLICT
+    para los huéspedes nuevos o modificados y reemplazo de sus teléfonos.
+    Si un numero_id se repite en el archivo gana la última línea.
+    """
+    db.execute(text("ANALYZE huespedes_carga"))
+    query = """
+    WITH carga AS (
+        SELECT DISTINCT ON (numero_id) numero_id, tipo_id, nombre, direccion, telefonos
+        FROM huespedes_carga
+        ORDER BY numero_id, linea DESC
+    ), actual AS (
+        SELECT h.numero_id, h.tipo_id, h.nombre, h.direccion,
+               COALESCE(
+                   -- Mismo orden que sorted() en fila_carga_huesped (por código, no por la collation)
+                   (SELECT array_agg(t.telefono::TEXT ORDER BY t.telefono::TEXT COLLATE "C")
+                    FROM TELEFONOS_HUESPED t WHERE t.numero_id = h.numero_id),
+                   '{}'
+               ) AS telefonos
+        FROM HUESPED h
+        INNER JOIN carga c ON h.numero_id = c.numero_id
+    ), cambios AS (
+        SELECT c.*, a.numero_id IS NULL AS nuevo
+        FROM carga c
+        LEFT JOIN actual a ON c.numero_id = a.numero_id
+        WHERE a.numero_id IS NULL
+        OR (c.tipo_id, c.nombre, c.direccion) IS DISTINCT FROM (a.tipo_id, a.nombre, a.direccion)
+        OR c.telefonos IS DISTINCT FROM a.telefonos
+    ), fusionados AS (
+        INSERT INTO HUESPED (numero_id, tipo_id, nombre, direccion)
+        SELECT numero_id, tipo_id, nombre, direccion FROM cambios
+        ON CONFLICT (numero_id) DO UPDATE
+        SET tipo_id = EXCLUDED.tipo_id, nombre = EXCLUDED.nombre, direccion = EXCLUDED.direccion
+    ), telefonos_borrados AS (
+        DELETE FROM TELEFONOS_HUESPED t
+        USING cambios c
+        WHERE t.numero_id = c.numero_id AND NOT (t.telefono = ANY(c.telefonos))
+    ), telefonos_nuevos AS (
+        INSERT INTO TELEFONOS_HUESPED (numero_id, telefono)
+        SELECT c.numero_id, tel.telefono
+        FROM cambios c
+        CROSS JOIN LATERAL unnest(c.telefonos) AS tel(telefono)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM TELEFONOS_HUESPED t
+            WHERE t.numero_id = c.numero_id AND t.telefono = tel.telefono
+        )
+    )
+    SELECT (SELECT COUNT(*) FROM carga),
+           COUNT(*) FILTER (WHERE nuevo),
+           COUNT(*) FILTER (WHERE NOT nuevo)
+    FROM cambios
+    """
+    total, insertados, actualizados = db.execute(text(query)).fetchone()
+    if actualizados:
+        invalidar_huesped(db)
+    return {
+        "insertados": insertados,
+        "actualizados": actualizados,
+        "sin_cambios": total - insertados - actualizados
+    }
+
+def _huesped_respuesta(row) -> dict:
+    return {
+        "numero_id": row[0],
+        "tipo_id": row[1],
+        "nombre": row[2],
+        "direccion": row[3],
+        "telefonos": list(row[4])
+    }
+
 @router.post("/", response_model=HuespedResponse, status_code=status.HTTP_201_CREATED)
 def crear_huesped(huesped: HuespedCreate, db: Session = Depends(get_db)):
     """Crear un nuevo huésped"""
     try:
-        # Insertar huésped
+        # Insertar huésped y teléfonos y devolver ambos en una sola sentencia
         query = """
-        INSERT INTO HUESPED (numero_id, tipo_id, nombre, direccion)
-        VALUES (:numero_id, :tipo_id, :nombre, :direccion)
-        """
-        db.execute(text(query), {
-            "numero_id": huesped.numero_id,
-            "tipo_id": huesped.tipo_id,
-            "nombre": huesped.nombre,
-            "direccion": huesped.direccion
-        })
-        
-        # Insertar teléfonos
-        for telefono in huesped.telefonos:
-            query_tel = """
+        WITH nuevo AS (
+            INSERT INTO HUESPED (numero_id, tipo_id, nombre, direccion)
+            VALUES (:numero_id, :tipo_id, :nombre, :direccion)
+            RETURNING numero_id, tipo_id, nombre, direccion
+        ), telefonos AS (
             INSERT INTO TELEFONOS_HUESPED (numero_id, telefono)
-            VALUES (:numero_id, :telefono)
-            """
-            db.execute(text(query_tel), {
+            SELECT nuevo.numero_id, tel.telefono
+            FROM nuevo, unnest(CAST(:telefonos AS TEXT[])) AS tel(telefono)
+            RETURNING telefono
+        )
+        SELECT nuevo.*, ARRAY(SELECT telefono FROM telefonos) FROM nuevo
+        """
+        with Ejecucion(db) as ejecucion:
+            creado = ejecucion.ejecutar(text(query), {
                 "numero_id": huesped.numero_id,
-                "telefono": telefono
+                "tipo_id": huesped.tipo_id,
+                "nombre": huesped.nombre,
+                "direccion": huesped.direccion,
+                "telefonos": huesped.telefonos
             })
         
         db.commit()
-        
-        # Obtener el huésped creado
-        return obtener_huesped_por_id(huesped.numero_id, db)
+        return _huesped_respuesta(creado.fila())
     
     except Exception as e:
         db.rollback()
@@ -51,21 +168,191 @@ def crear_huesped(huesped: HuespedCreate, db: Session = Depends(get_db)):
             detail=f"Error al crear huésped: {str(e)}"
         )
 
-@router.get("/", response_model=List[HuespedListResponse])
-def listar_huespedes(db: Session = Depends(get_db)):
+@router.post("/carga-masiva", response_model=dict)
+async def cargar_huespedes(request: Request, db: Session = Depends(get_db)):
+    """
+    Crear o actualizar huéspedes en masa desde CSV (telefonos separados por "|") o NDJSON.
+    
+    El archivo se lee en streaming y se copia con COPY a una tabla temporal;
+    la fusión con HUESPED y TELEFONOS_HUESPED es una sola sentencia.
+    """
+    try:
+        await run_in_threadpool(crear_tabla_carga_huespedes, db)
+        errores = []
+        total_errores = 0
+        lote = []
+        lineas = 0
+        async for numero, registro, error in leer_registros(request):
+            lineas += 1
+            if registro is not None:
+                try:
+                    lote.append(fila_carga_huesped(numero, registro))
+                except ValidationError as e:
+                    error = "; ".join(err["msg"] for err in e.errors())
+            if error:
+                total_errores += 1
+                if len(errores) < MAX_ERRORES_REPORTADOS:
+                    errores.append({"linea": numero, "motivo": error})
+            if len(lote) >= TAMANO_LOTE_COPY:
+                await run_in_threadpool(copiar_filas, db, "huespedes_carga", COLUMNAS_CARGA, lote)
+                lote = []
+        if lote:
+            await run_in_threadpool(copiar_filas, db, "huespedes_carga", COLUMNAS_CARGA, lote)
+        
+        resumen = await run_in_threadpool(fusionar_huespedes, db)
+        await run_in_threadpool(db.commit)
+        return {"lineas": lineas, **resumen, "total_errores": total_errores, "errores": errores}
+    
+    except HTTPException:
+        await run_in_threadpool(db.rollback)
+        raise
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error en la carga masiva de huéspedes: {str(e)}"
+        )
+
+@router.get("/", response_model=List[HuespedListResponse], dependencies=[Depends(etag_tablas("HUESPED", "TELEFONOS_HUESPED"))])
+def listar_huespedes(ids: Optional[str] = None, response: Response = None, db: Connection = Depends(get_lectura)):
     """Listar todos los huéspedes"""
     try:
+        if ids:
+            lista = parsear_ids(ids, tipo=str)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_huespedes_por_ids(lista, db)), response)
+        
         query = "SELECT numero_id, nombre, tipo_id FROM HUESPED"
         result = db.execute(text(query)).fetchall()
         return [{"numero_id": row[0], "nombre": row[1], "tipo_id": row[2]} for row in result]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar huéspedes: {str(e)}"
         )
 
-@router.get("/{numero_id}", response_model=HuespedResponse)
-def obtener_huesped_por_id(numero_id: str, db: Session = Depends(get_db)):
+def _obtener_huespedes_por_ids(ids: List[str], db: Connection) -> dict:
+    """Obtener varios huéspedes con sus teléfonos en dos consultas"""
+    query = """
+    SELECT numero_id, tipo_id, nombre, direccion
+    FROM HUESPED
+    WHERE numero_id = ANY(:ids)
+    """
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    huespedes = {
+        row[0]: {
+            "numero_id": row[0],
+            "tipo_id": row[1],
+            "nombre": row[2],
+            "direccion": row[3],
+            "telefonos": []
+        }
+        for row in result
+    }
+    
+    query_tel = "SELECT numero_id, telefono FROM TELEFONOS_HUESPED WHERE numero_id = ANY(:ids)"
+    telefonos = db.execute(text(query_tel), {"ids": list(huespedes)}).fetchall()
+    for tel in telefonos:
+        huespedes[tel[0]]["telefonos"].append(tel[1])
+    return huespedes
+
+def _patron_prefijo(valor: str) -> str:
+    """Patrón LIKE de prefijo escapando los comodines del texto buscado"""
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+@router.get("/buscar", response_model=List[HuespedBusquedaResponse])
+def buscar_huespedes(q: str, limite: int = 10, db: Connection = Depends(get_consulta)):
+    """
+    Buscar huéspedes por nombre (prefijo o aproximado), documento (exacto o prefijo)
+    o teléfono, ordenados por relevancia.
+    
+    Cada rama usa su índice (ver sql/002_busqueda_huespedes.sql) y solo se
+    agrupan los candidatos, sin recorrer HUESPED completa.
+    """
+    try:
+        q = q.strip()
+        if not q:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El parámetro 'q' no puede estar vacío"
+            )
+        if not 1 <= limite <= MAX_RESULTADOS_BUSQUEDA:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El límite debe estar entre 1 y {MAX_RESULTADOS_BUSQUEDA}"
+            )
+        
+        digitos = "".join(c for c in q if c.isdigit())
+        query = """
+        WITH candidatos AS (
+            SELECT numero_id, 4.0 AS puntaje FROM HUESPED WHERE numero_id = :q
+            UNION ALL
+            SELECT numero_id, 3.0 FROM HUESPED WHERE numero_id LIKE :prefijo
+            UNION ALL
+            SELECT numero_id, 2.0 + similarity(lower(nombre), :q_min)
+            FROM HUESPED WHERE lower(nombre) LIKE :prefijo_min
+            UNION ALL
+            SELECT numero_id, similarity(lower(nombre), :q_min)
+            FROM HUESPED WHERE lower(nombre) % :q_min
+            UNION ALL
+            SELECT numero_id, 2.5 FROM TELEFONOS_HUESPED
+            WHERE :digitos <> '' AND telefono::TEXT LIKE :prefijo_tel
+        ), mejores AS (
+            SELECT numero_id, MAX(puntaje) AS puntaje
+            FROM candidatos
+            GROUP BY numero_id
+            ORDER BY puntaje DESC
+            LIMIT :limite
+        )
+        SELECT h.numero_id, h.nombre, h.tipo_id, m.puntaje
+        FROM mejores m
+        INNER JOIN HUESPED h ON h.numero_id = m.numero_id
+        ORDER BY m.puntaje DESC, h.nombre
+        """
+        result = db.execute(text(query), {
+            "q": q,
+            "prefijo": _patron_prefijo(q),
+            "q_min": q.lower(),
+            "prefijo_min": _patron_prefijo(q.lower()),
+            "digitos": digitos,
+            "prefijo_tel": _patron_prefijo(digitos) if digitos else "",
+            "limite": limite
+        }).fetchall()
+        
+        return [
+            {"numero_id": row[0], "nombre": row[1], "tipo_id": row[2], "puntaje": round(float(row[3]), 3)}
+            for row in result
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar huéspedes: {str(e)}"
+        )
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_huespedes_por_ids(solicitud: BuscarIdsTextoRequest, db: Connection = Depends(get_lectura)):
+    """Obtener varios huéspedes por lista de IDs (conserva el orden e informa los no encontrados)"""
+    try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_huespedes_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar huéspedes: {str(e)}"
+        )
+
+@router.get("/cache/metricas", response_model=dict)
+def obtener_metricas_cache_huespedes():
+    """Métricas de la caché de identidad de huéspedes de este worker"""
+    return cache_huespedes.metricas()
+
+@router.get("/{numero_id}", response_model=HuespedResponse, dependencies=[Depends(etag_tablas("HUESPED", "TELEFONOS_HUESPED"))])
+def obtener_huesped_por_id(numero_id: str, db: Connection = Depends(get_lectura)):
     """Obtener un huésped por su número de identificación"""
     try:
         # Obtener datos del huésped
@@ -106,31 +393,23 @@ def obtener_huesped_por_id(numero_id: str, db: Session = Depends(get_db)):
 def actualizar_huesped(numero_id: str, huesped: HuespedUpdate, db: Session = Depends(get_db)):
     """Actualizar un huésped"""
     try:
-        # Verificar que existe
-        query = "SELECT numero_id FROM HUESPED WHERE numero_id = :numero_id"
-        if not db.execute(text(query), {"numero_id": numero_id}).fetchone():
+        valores = {}
+        if huesped.nombre:
+            valores["nombre"] = huesped.nombre
+        if huesped.direccion:
+            valores["direccion"] = huesped.direccion
+        
+        # Actualizar (publicando la invalidación de la caché) y devolver la fila con sus teléfonos
+        row = db.execute(ACTUALIZAR_HUESPED.sentencia(valores), {**valores, "numero_id": numero_id}).fetchone()
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Huésped no encontrado"
             )
-        
-        # Actualizar
-        campos = []
-        params = {"numero_id": numero_id}
-        
-        if huesped.nombre:
-            campos.append("nombre = :nombre")
-            params["nombre"] = huesped.nombre
-        if huesped.direccion:
-            campos.append("direccion = :direccion")
-            params["direccion"] = huesped.direccion
-        
-        if campos:
-            query_update = f"UPDATE HUESPED SET {', '.join(campos)} WHERE numero_id = :numero_id"
-            db.execute(text(query_update), params)
-            db.commit()
-        
-        return obtener_huesped_por_id(numero_id, db)
+        if valores:
+            invalidar_local(numero_id)
+        db.commit()
+        return _huesped_respuesta(row)
     
     except HTTPException:
         raise
@@ -145,8 +424,8 @@ def actualizar_huesped(numero_id: str, huesped: HuespedUpdate, db: Session = Dep
 def eliminar_huesped(numero_id: str, db: Session = Depends(get_db)):
     """Eliminar un huésped"""
     try:
-        query = "DELETE FROM HUESPED WHERE numero_id = :numero_id"
-        result = db.execute(text(query), {"numero_id": numero_id})
+        result = db.execute(ELIMINAR_HUESPED, {"numero_id": numero_id})
+        invalidar_huesped(db, numero_id)
         db.commit()
         
         if result.rowcount == 0:
@@ -1,9 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
-from database import get_db
+from database import get_db, get_consulta, get_lectura_primario
+from schemas.ids_schema import BuscarIdsRequest, BuscarIdsResponse
+from utils.cache_huespedes import obtener_identidad_huesped
+from utils.cache_tablero import invalidar_locales, sql_invalidacion
+from utils.campos import respuesta_parcial
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
 from schemas.registro_hospedaje_schema import (
     RegistroHospedajeCreate,
     RegistroHospedajeCheckOut,
@@ -13,38 +19,58 @@ from schemas.registro_hospedaje_schema import (
 
 router = APIRouter(prefix="/registro-hospedaje", tags=["registro_hospedaje"])
 
+# Hotel del registro escrito por la sentencia (CTE "registro"), para invalidar su tablero
+QUERY_HOTEL_REGISTRO = """
+SELECT ha.id_hotel FROM HABITACION ha INNER JOIN registro ON ha.id_habitacion = registro.id_habitacion
+"""
+
 @router.post("/", response_model=RegistroHospedajeResponse, status_code=status.HTTP_201_CREATED)
 def crear_registro_hospedaje(registro: RegistroHospedajeCreate, db: Session = Depends(get_db)):
     """Registrar check-in de un huésped"""
     try:
-        # Verificar que el huésped existe
-        query = "SELECT numero_id, tipo_id FROM HUESPED WHERE numero_id = :numero_id"
-        huesped = db.execute(text(query), {"numero_id": registro.id_huesped}).fetchone()
+        # Verificar que el huésped existe (normalmente desde la caché, sin consulta)
+        huesped = obtener_identidad_huesped(db, registro.id_huesped)
         if not huesped:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Huésped no encontrado"
             )
         
-        # Crear registro
-        query = """
-        INSERT INTO REGISTRO_HOSPEDAJE (id_reserva, id_huesped, id_habitacion,
-                                        fecha_hora_checkin, responsable, mascota)
-        VALUES (:id_reserva, :id_huesped, :id_habitacion, NOW(),
-                :responsable, :mascota)
-        RETURNING id_registro
+        # Crear registro e invalidar el tablero de su hotel en una sola sentencia
+        query = f"""
+        WITH registro AS (
+            INSERT INTO REGISTRO_HOSPEDAJE (id_reserva, id_huesped, id_habitacion,
+                                            fecha_hora_checkin, responsable, mascota)
+            VALUES (:id_reserva, :id_huesped, :id_habitacion, NOW(),
+                    :responsable, :mascota)
+            RETURNING id_registro, id_reserva, id_huesped, id_habitacion,
+                      fecha_hora_checkin, fecha_checkout, responsable, mascota
+        ), hoteles AS (
+            {sql_invalidacion(QUERY_HOTEL_REGISTRO)}
+        )
+        SELECT registro.*, ARRAY(SELECT id_hotel FROM hoteles) FROM registro
         """
-        result = db.execute(text(query), {
+        row = db.execute(text(query), {
             "id_reserva": registro.id_reserva,
             "id_huesped": registro.id_huesped,
             "id_habitacion": registro.id_habitacion,
             "responsable": registro.responsable,
             "mascota": registro.mascota
-        })
-        id_registro = result.scalar()
+        }).fetchone()
+        invalidar_locales(row[8])
         db.commit()
         
-        return obtener_registro_por_id(id_registro, db)
+        return {
+            "id_registro": row[0],
+            "id_reserva": row[1],
+            "id_huesped": row[2],
+            "id_habitacion": row[3],
+            "fecha_hora_checkin": row[4],
+            "fecha_checkout": row[5],
+            "responsable": row[6],
+            "mascota": row[7],
+            "es_menor_edad": huesped["tipo_id"] == "Tarjeta de Identidad"
+        }
     
     except HTTPException:
         db.rollback()
@@ -59,10 +85,20 @@ def crear_registro_hospedaje(registro: RegistroHospedajeCreate, db: Session = De
 @router.get("/", response_model=List[RegistroHospedajeListResponse])
 def listar_registros_hospedaje(
     solo_activos: bool = True,
-    db: Session = Depends(get_db)
+    ids: Optional[str] = None,
+    db: Connection = Depends(get_consulta)
 ):
-    """Listar registros de hospedaje"""
+    """
+    Listar registros de hospedaje.
+    
+    Con ``solo_activos`` el filtro fecha_checkout IS NULL no poda particiones
+    (van por mes de check-in): recorre idx_registro_hospedaje_activos en cada una.
+    """
     try:
+        if ids:
+            lista = parsear_ids(ids)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_registros_por_ids(lista, db)))
+        
         query = """
         SELECT rh.id_registro, rh.id_reserva, h.nombre, ha.numero_habitacion,
                rh.fecha_hora_checkin, rh.fecha_checkout, rh.responsable, rh.mascota
@@ -90,14 +126,55 @@ def listar_registros_hospedaje(
             }
             for row in result
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar registros: {str(e)}"
         )
 
+def _obtener_registros_por_ids(ids: List[int], db: Connection) -> dict:
+    """Obtener varios registros de hospedaje en una sola consulta (incluye es_menor_edad)"""
+    query = """
+    SELECT rh.id_registro, rh.id_reserva, rh.id_huesped, rh.id_habitacion,
+           rh.fecha_hora_checkin, rh.fecha_checkout, rh.responsable, rh.mascota, h.tipo_id
+    FROM REGISTRO_HOSPEDAJE rh
+    LEFT JOIN HUESPED h ON rh.id_huesped = h.numero_id
+    WHERE rh.id_registro = ANY(:ids)
+    """
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    return {
+        row[0]: {
+            "id_registro": row[0],
+            "id_reserva": row[1],
+            "id_huesped": row[2],
+            "id_habitacion": row[3],
+            "fecha_hora_checkin": row[4],
+            "fecha_checkout": row[5],
+            "responsable": row[6],
+            "mascota": row[7],
+            "es_menor_edad": row[8] == "Tarjeta de Identidad"
+        }
+        for row in result
+    }
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_registros_por_ids(solicitud: BuscarIdsRequest, db: Connection = Depends(get_consulta)):
+    """Obtener varios registros de hospedaje por lista de IDs (conserva el orden e informa los no encontrados)"""
+    try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_registros_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar registros: {str(e)}"
+        )
+
 @router.get("/{id_registro}", response_model=RegistroHospedajeResponse)
-def obtener_registro_por_id(id_registro: int, db: Session = Depends(get_db)):
+def obtener_registro_por_id(id_registro: int, db: Connection = Depends(get_lectura_primario)):
     """Obtener un registro de hospedaje por ID"""
     try:
         query = """
@@ -114,9 +191,8 @@ def obtener_registro_por_id(id_registro: int, db: Session = Depends(get_db)):
             )
         
         # Verificar si es menor de edad
-        query_tipo = "SELECT tipo_id FROM HUESPED WHERE numero_id = :numero_id"
-        tipo_id = db.execute(text(query_tipo), {"numero_id": registro[2]}).scalar()
-        es_menor = tipo_id == "Tarjeta de Identidad"
+        huesped = obtener_identidad_huesped(db, registro[2])
+        es_menor = huesped is not None and huesped["tipo_id"] == "Tarjeta de Identidad"
         
         return {
             "id_registro": registro[0],
@@ -141,22 +217,29 @@ def obtener_registro_por_id(id_registro: int, db: Session = Depends(get_db)):
 def registrar_checkout(id_registro: int, checkout_data: RegistroHospedajeCheckOut, db: Session = Depends(get_db)):
     """Registrar check-out de un huésped"""
     try:
-        query = """
-        UPDATE REGISTRO_HOSPEDAJE
-        SET fecha_checkout = :fecha_checkout
-        WHERE id_registro = :id_registro
+        # Registrar la salida e invalidar el tablero del hotel en una sola sentencia
+        query = f"""
+        WITH registro AS (
+            UPDATE REGISTRO_HOSPEDAJE
+            SET fecha_checkout = :fecha_checkout
+            WHERE id_registro = :id_registro
+            RETURNING id_habitacion
+        ), hoteles AS (
+            {sql_invalidacion(QUERY_HOTEL_REGISTRO)}
+        )
+        SELECT ARRAY(SELECT id_hotel FROM hoteles) FROM registro
         """
-        result = db.execute(text(query), {
+        row = db.execute(text(query), {
             "fecha_checkout": checkout_data.fecha_checkout,
             "id_registro": id_registro
-        })
-        db.commit()
-        
-        if result.rowcount == 0:
+        }).fetchone()
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Registro no encontrado"
             )
+        invalidar_locales(row[0])
+        db.commit()
         
         return {"id_registro": id_registro, "checkout_registrado": True}
     
@@ -170,8 +253,12 @@ def registrar_checkout(id_registro: int, checkout_data: RegistroHospedajeCheckOu
         )
 
 @router.get("/huespedes/menores-edad/", response_model=List[dict])
-def listar_huespedes_menores_hospedados(db: Session = Depends(get_db)):
-    """Listar huéspedes menores de edad actualmente hospedados"""
+def listar_huespedes_menores_hospedados(db: Connection = Depends(get_consulta)):
+    """
+    Listar huéspedes menores de edad actualmente hospedados.
+    
+    Sin poda de particiones: los activos se leen de idx_registro_hospedaje_activos en cada una.
+    """
     try:
         query = """
         SELECT DISTINCT h.numero_id, h.nombre, rh.numero_habitacion
@@ -194,8 +281,12 @@ def listar_huespedes_menores_hospedados(db: Session = Depends(get_db)):
         )
 
 @router.get("/mascotas/hospedajes-activos/", response_model=List[dict])
-def listar_hospedajes_con_mascotas(db: Session = Depends(get_db)):
-    """Listar huéspedes con mascotas actualmente hospedados"""
+def listar_hospedajes_con_mascotas(db: Connection = Depends(get_consulta)):
+    """
+    Listar huéspedes con mascotas actualmente hospedados.
+    
+    Sin poda de particiones: los activos se leen de idx_registro_hospedaje_activos en cada una.
+    """
     try:
         query = """
         SELECT rh.id_registro, h.nombre, ha.numero_habitacion, rh.fecha_hora_checkin
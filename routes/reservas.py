@@ -1,112 +1,459 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import json
 from datetime import date, datetime
-from database import get_db
+from decimal import Decimal
+from database import get_db, get_lectura
+from schemas.ids_schema import BuscarIdsRequest, BuscarIdsResponse
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
+from utils.carga_masiva import (
+    TAMANO_LOTE_COPY,
+    RespuestaStreamingEntrada,
+    copiar_filas,
+    formato_archivo,
+    leer_registros
+)
+from utils.campos import cargar_por_ids, parsear_lista, respuesta_parcial
+from utils.etag import etag_tablas
+from utils.cache_tablero import invalidar_locales, invalidar_tableros, sql_invalidacion
+from utils.pipeline import Ejecucion
+from utils.asignacion import RECARGO_NO_PREFERIDO, asignar_habitaciones, penalizacion_fragmentacion
 from schemas.reserva_schema import (
     ReservaCreate,
     ReservaUpdate,
     ReservaResponse,
     ReservaListResponse,
-    EstadoReservaUpdate
+    EstadoReservaUpdate,
+    EstadoReservaLoteUpdate,
+    PagarAnticipoRequest,
+    AsignacionHabitacionesRequest
 )
 
 router = APIRouter(prefix="/reservas", tags=["reservas"])
 
+# Columnas disponibles en ?fields= para el listado y relaciones en ?expand=
+COLUMNAS_LISTADO = {
+    "id_reserva": "r.id_reserva",
+    "fecha_reserva": "r.fecha_reserva",
+    "fecha_inicio": "r.fecha_inicio",
+    "fecha_fin": "r.fecha_fin",
+    "cantidad_personas": "r.cantidad_personas",
+    "anticipo_pagado": "r.anticipo_pagado",
+    "vencimiento_reserva": "r.vencimiento_reserva",
+    "id_agencia": "r.id_agencia",
+    "estado_actual": "er.estado",
+}
+EXPANSIONES_LISTADO = ["agencia", "habitaciones"]
+
+# Último estado de la reserva "r". El límite inferior fecha_reserva y el orden por
+# fecha_estado permiten descartar particiones de ESTADO_RESERVA (sql/006_particiones.sql).
+# Ambas fechas salen del reloj de la base de datos (CURRENT_DATE y NOW() en la
+# misma sesión), así el estado inicial nunca queda por debajo del límite.
+QUERY_ULTIMO_ESTADO = """
+SELECT er.estado FROM ESTADO_RESERVA er
+WHERE er.id_reserva = r.id_reserva AND er.fecha_estado >= r.fecha_reserva
+ORDER BY er.fecha_estado DESC, er.id_estado DESC LIMIT 1
+"""
+
+# Hoteles de un conjunto de reservas (para invalidar sus tableros de recepción)
+QUERY_HOTELES_RESERVAS = """
+SELECT ha.id_hotel FROM HABITACION_RESERVA hr
+INNER JOIN HABITACION ha ON hr.id_habitacion = ha.id_habitacion
+WHERE hr.id_reserva = ANY(:ids)
+"""
+
+# Hoteles de la reserva creada por la sentencia (CTE "nueva"), para invalidar sus tableros
+QUERY_HOTELES_NUEVA = """
+SELECT id_hotel FROM HABITACION
+WHERE id_habitacion = ANY(CAST(:id_habitaciones AS INTEGER[])) AND EXISTS (SELECT 1 FROM nueva)
+"""
+
+# Estados que liberan las habitaciones (cambio de estado individual y por lote)
+ESTADOS_QUE_LIBERAN = ("Cancelada", "No Presentada", "Completada")
+
+PORCENTAJE_ANTICIPO = Decimal("0.20")
+HORIZONTE_FRAGMENTACION_DIAS = 30  # Ocupaciones vecinas consideradas al medir huecos
+MAX_TAMANO_LOTE_IMPORTACION = 5000  # Reservas por transacción en importaciones
+
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 def crear_reserva(reserva: ReservaCreate, db: Session = Depends(get_db)):
     """Crear una nueva reserva"""
     try:
-        # Validar que las habitaciones estén disponibles
+        # Bloquear las habitaciones y leer su estado
+        query_validar = """
+        SELECT id_habitacion, ocupado FROM HABITACION
+        WHERE id_habitacion = ANY(:id_habitaciones)
+        FOR UPDATE
+        """
+        # Crear reserva, asociar habitaciones y servicios, ocupar habitaciones
+        # registrar el estado inicial e invalidar los tableros de sus hoteles en
+        # una sola sentencia. Solo inserta si todas las habitaciones existen y
+        # están libres, de modo que puede enviarse junto con la validación (modo pipeline)
+        query = f"""
+        WITH nueva AS (
+            INSERT INTO RESERVA (fecha_reserva, fecha_inicio, fecha_fin, cantidad_personas,
+                                anticipo_pagado, vencimiento_reserva, id_agencia)
+            SELECT CURRENT_DATE, :fecha_inicio, :fecha_fin, :cantidad_personas,
+                   FALSE, :vencimiento_reserva, :id_agencia
+            WHERE (
+                SELECT COUNT(*) FROM HABITACION
+                WHERE id_habitacion = ANY(CAST(:id_habitaciones AS INTEGER[])) AND NOT ocupado
+            ) = :habitaciones_distintas
+            RETURNING id_reserva
+        ), habitaciones AS (
+            INSERT INTO HABITACION_RESERVA (id_habitacion, id_reserva)
+            SELECT hab.id_habitacion, nueva.id_reserva
+            FROM nueva, unnest(CAST(:id_habitaciones AS INTEGER[])) AS hab(id_habitacion)
+        ), ocupadas AS (
+            UPDATE HABITACION SET ocupado = TRUE
+            WHERE id_habitacion = ANY(CAST(:id_habitaciones AS INTEGER[]))
+            AND EXISTS (SELECT 1 FROM nueva)
+        ), servicios AS (
+            INSERT INTO RESERVA_SERVICIO (id_reserva, id_servicio)
+            SELECT nueva.id_reserva, serv.id_servicio
+            FROM nueva, unnest(CAST(:servicios AS INTEGER[])) AS serv(id_servicio)
+        ), estado AS (
+            INSERT INTO ESTADO_RESERVA (id_reserva, estado)
+            SELECT id_reserva, 'Confirmada' FROM nueva
+        ), hoteles AS (
+            {sql_invalidacion(QUERY_HOTELES_NUEVA)}
+        )
+        SELECT id_reserva, ARRAY(SELECT id_hotel FROM hoteles) FROM nueva
+        """
+        with Ejecucion(db) as ejecucion:
+            validacion = ejecucion.ejecutar(text(query_validar), {"id_habitaciones": reserva.id_habitaciones})
+            creada = ejecucion.ejecutar(text(query), {
+                "fecha_inicio": reserva.fecha_inicio,
+                "fecha_fin": reserva.fecha_fin,
+                "cantidad_personas": reserva.cantidad_personas,
+                "vencimiento_reserva": reserva.vencimiento_reserva,
+                "id_agencia": reserva.id_agencia,
+                "id_habitaciones": reserva.id_habitaciones,
+                "habitaciones_distintas": len(set(reserva.id_habitaciones)),
+                "servicios": reserva.servicios or []
+            })
+        
+        ocupacion = dict(validacion.filas)
         for id_habitacion in reserva.id_habitaciones:
-            query = "SELECT ocupado FROM HABITACION WHERE id_habitacion = :id_habitacion"
-            resultado = db.execute(text(query), {"id_habitacion": id_habitacion}).fetchone()
-            if not resultado:
+            if id_habitacion not in ocupacion:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Habitación {id_habitacion} no encontrada"
                 )
-            if resultado[0]:
+            if ocupacion[id_habitacion]:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Habitación {id_habitacion} ya está ocupada"
                 )
         
-        # Crear reserva
+        id_reserva, hoteles = creada.fila()
+        invalidar_locales(hoteles)
+        db.commit()
+        return {"id_reserva": id_reserva, "mensaje": "Reserva creada exitosamente"}
+    
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error al crear reserva: {str(e)}"
+        )
+
+def _importar_lote(db: Session, lote: list) -> list:
+    """
+    Crear un lote de reservas en una transacción: una consulta valida todas las
+    habitaciones del lote y una sola sentencia inserta reservas, habitaciones,
+    servicios y estados.
+    """
+    resultados = []
+    try:
         query = """
-        INSERT INTO RESERVA (fecha_reserva, fecha_inicio, fecha_fin, cantidad_personas, 
-                            anticipo_pagado, vencimiento_reserva, id_agencia)
-        VALUES (:fecha_reserva, :fecha_inicio, :fecha_fin, :cantidad_personas,
-                FALSE, :vencimiento_reserva, :id_agencia)
-        RETURNING id_reserva
+        SELECT id_habitacion, ocupado FROM HABITACION
+        WHERE id_habitacion = ANY(:id_habitaciones)
+        FOR UPDATE
         """
-        result = db.execute(text(query), {
-            "fecha_reserva": date.today(),
-            "fecha_inicio": reserva.fecha_inicio,
-            "fecha_fin": reserva.fecha_fin,
-            "cantidad_personas": reserva.cantidad_personas,
-            "vencimiento_reserva": reserva.vencimiento_reserva,
-            "id_agencia": reserva.id_agencia
-        })
-        id_reserva = result.scalar()
+        todas = list({h for _, reserva in lote for h in reserva.id_habitaciones})
+        ocupacion = dict(db.execute(text(query), {"id_habitaciones": todas}).fetchall())
         
-        # Asociar habitaciones a la reserva
-        for id_habitacion in reserva.id_habitaciones:
-            query_hab = """
-            INSERT INTO HABITACION_RESERVA (id_habitacion, id_reserva)
-            VALUES (:id_habitacion, :id_reserva)
+        validos = []
+        for numero, reserva in lote:
+            error = None
+            if len(set(reserva.id_habitaciones)) != len(reserva.id_habitaciones):
+                error = "Habitaciones repetidas en la reserva"
+            for id_habitacion in reserva.id_habitaciones:
+                if error:
+                    break
+                if id_habitacion not in ocupacion:
+                    error = f"Habitación {id_habitacion} no encontrada"
+                elif ocupacion[id_habitacion]:
+                    error = f"Habitación {id_habitacion} ya está ocupada"
+            if error:
+                resultados.append({"linea": numero, "resultado": "error", "detalle": error})
+                continue
+            # Las habitaciones tomadas por esta reserva ya no están libres para el resto del lote
+            for id_habitacion in reserva.id_habitaciones:
+                ocupacion[id_habitacion] = True
+            validos.append((numero, reserva))
+        
+        if validos:
+            query_ids = """
+            SELECT nextval(pg_get_serial_sequence('reserva', 'id_reserva'))
+            FROM generate_series(1, :cantidad)
             """
-            db.execute(text(query_hab), {"id_habitacion": id_habitacion, "id_reserva": id_reserva})
+            ids = [row[0] for row in db.execute(text(query_ids), {"cantidad": len(validos)}).fetchall()]
             
-            # Marcar habitación como ocupada
-            query_update = "UPDATE HABITACION SET ocupado = TRUE WHERE id_habitacion = :id_habitacion"
-            db.execute(text(query_update), {"id_habitacion": id_habitacion})
-        
-        # Asociar servicios a la reserva
-        for id_servicio in reserva.servicios:
-            query_serv = """
-            INSERT INTO RESERVA_SERVICIO (id_reserva, id_servicio)
-            VALUES (:id_reserva, :id_servicio)
+            query = """
+            WITH datos AS (
+                SELECT * FROM unnest(
+                    CAST(:ids AS INTEGER[]), CAST(:fechas_inicio AS DATE[]), CAST(:fechas_fin AS DATE[]),
+                    CAST(:cantidades AS INTEGER[]), CAST(:vencimientos AS TIMESTAMP[]), CAST(:agencias AS INTEGER[])
+                ) AS d(id_reserva, fecha_inicio, fecha_fin, cantidad_personas, vencimiento_reserva, id_agencia)
+            ), reservas AS (
+                INSERT INTO RESERVA (id_reserva, fecha_reserva, fecha_inicio, fecha_fin, cantidad_personas,
+                                    anticipo_pagado, vencimiento_reserva, id_agencia)
+                SELECT id_reserva, CURRENT_DATE, fecha_inicio, fecha_fin, cantidad_personas,
+                       FALSE, vencimiento_reserva, id_agencia
+                FROM datos
+            ), habitaciones AS (
+                INSERT INTO HABITACION_RESERVA (id_habitacion, id_reserva)
+                SELECT * FROM unnest(CAST(:hab_habitaciones AS INTEGER[]), CAST(:hab_reservas AS INTEGER[]))
+            ), ocupadas AS (
+                UPDATE HABITACION SET ocupado = TRUE
+                WHERE id_habitacion = ANY(CAST(:hab_habitaciones AS INTEGER[]))
+            ), servicios AS (
+                INSERT INTO RESERVA_SERVICIO (id_reserva, id_servicio)
+                SELECT * FROM unnest(CAST(:serv_reservas AS INTEGER[]), CAST(:serv_servicios AS INTEGER[]))
+            )
+            INSERT INTO ESTADO_RESERVA (id_reserva, estado)
+            SELECT id_reserva, 'Confirmada' FROM datos
             """
-            db.execute(text(query_serv), {"id_reserva": id_reserva, "id_servicio": id_servicio})
-        
-        # Registrar estado inicial
-        query_estado = """
-        INSERT INTO ESTADO_RESERVA (id_reserva, estado)
-        VALUES (:id_reserva, 'Confirmada')
-        """
-        db.execute(text(query_estado), {"id_reserva": id_reserva})
+            params = {
+                "ids": ids,
+                "fechas_inicio": [r.fecha_inicio for _, r in validos],
+                "fechas_fin": [r.fecha_fin for _, r in validos],
+                "cantidades": [r.cantidad_personas for _, r in validos],
+                "vencimientos": [r.vencimiento_reserva for _, r in validos],
+                "agencias": [r.id_agencia for _, r in validos],
+                "hab_habitaciones": [h for _, r in validos for h in r.id_habitaciones],
+                "hab_reservas": [i for i, (_, r) in zip(ids, validos) for _ in r.id_habitaciones],
+                "serv_reservas": [i for i, (_, r) in zip(ids, validos) for _ in (r.servicios or [])],
+                "serv_servicios": [s for _, r in validos for s in (r.servicios or [])]
+            }
+            db.execute(text(query), params)
+            invalidar_tableros(db, QUERY_HOTELES_RESERVAS, {"ids": ids})
+            resultados += [
+                {"linea": numero, "resultado": "creada", "id_reserva": id_reserva}
+                for id_reserva, (numero, _) in zip(ids, validos)
+            ]
         
         db.commit()
-        return {"id_reserva": id_reserva, "mensaje": "Reserva creada exitosamente"}
+    except Exception as e:
+        db.rollback()
+        # Si falla la escritura se revierte el lote completo
+        resultados = [
+            {"linea": numero, "resultado": "error", "detalle": f"Lote revertido: {str(e)}"}
+            for numero, _ in lote
+        ]
+    return sorted(resultados, key=lambda r: r["linea"])
+
+@router.post("/asignar", response_model=dict)
+def asignar_habitaciones_reserva(solicitud: AsignacionHabitacionesRequest, db: Session = Depends(get_db)):
+    """
+    Proponer habitaciones libres de un hotel para un grupo: cubrir la cantidad de
+    personas con el menor costo y sin dejar huecos cortos en el calendario.
     
+    Solo propone; la reserva se crea después con POST /reservas/ y las habitaciones elegidas.
+    """
+    try:
+        noches = (solicitud.fecha_fin - solicitud.fecha_inicio).days
+        if noches <= 0 or solicitud.cantidad_personas <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Las fechas deben cubrir al menos una noche y la cantidad de personas ser positiva"
+            )
+        
+        query_habitaciones = """
+        SELECT ha.id_habitacion, ha.numero_habitacion, ha.id_tipo, th.descripcion,
+               th.capacidad, th.valor, ha.ocupado
+        FROM HABITACION ha
+        INNER JOIN TIPO_HABITACION th ON ha.id_tipo = th.id_tipo
+        WHERE ha.id_hotel = :id_hotel
+        """
+        habitaciones = db.execute(text(query_habitaciones), {"id_hotel": solicitud.id_hotel}).fetchall()
+        
+        # Ocupaciones vigentes alrededor del rango (las canceladas o no presentadas no cuentan)
+        query_ocupaciones = f"""
+        SELECT hr.id_habitacion, r.fecha_inicio, r.fecha_fin
+        FROM RESERVA r
+        INNER JOIN HABITACION_RESERVA hr ON r.id_reserva = hr.id_reserva
+        INNER JOIN HABITACION ha ON hr.id_habitacion = ha.id_habitacion
+        LEFT JOIN LATERAL ({QUERY_ULTIMO_ESTADO}) er ON TRUE
+        WHERE ha.id_hotel = :id_hotel
+        AND r.fecha_fin >= CAST(:desde AS DATE) - :horizonte
+        AND r.fecha_inicio <= CAST(:hasta AS DATE) + :horizonte
+        AND er.estado IS DISTINCT FROM 'Cancelada'
+        AND er.estado IS DISTINCT FROM 'No Presentada'
+        """
+        ocupaciones = {}
+        for row in db.execute(text(query_ocupaciones), {
+            "id_hotel": solicitud.id_hotel,
+            "desde": solicitud.fecha_inicio,
+            "hasta": solicitud.fecha_fin,
+            "horizonte": HORIZONTE_FRAGMENTACION_DIAS
+        }).fetchall():
+            ocupaciones.setdefault(row[0], []).append((row[1], row[2]))
+        
+        # "ocupado" refleja la ocupación actual: solo excluye si la estadía empieza hoy o antes
+        considerar_ocupado = solicitud.fecha_inicio <= date.today()
+        preferidos = set(solicitud.tipos_preferidos or [])
+        candidatas = []
+        for row in habitaciones:
+            propias = ocupaciones.get(row[0], [])
+            if considerar_ocupado and row[6]:
+                continue
+            if any(o_inicio < solicitud.fecha_fin and o_fin > solicitud.fecha_inicio for o_inicio, o_fin in propias):
+                continue
+            valor_noche = float(row[5])
+            penalizacion = penalizacion_fragmentacion(solicitud.fecha_inicio, solicitud.fecha_fin, propias, valor_noche)
+            costo = valor_noche * noches
+            if preferidos and row[2] not in preferidos:
+                costo *= 1 + RECARGO_NO_PREFERIDO
+            candidatas.append({
+                "id_habitacion": row[0],
+                "numero_habitacion": row[1],
+                "id_tipo": row[2],
+                "tipo": row[3],
+                "capacidad": row[4],
+                "valor": row[5],
+                "penalizacion": penalizacion,
+                "costo": costo + penalizacion
+            })
+        
+        elegidas = asignar_habitaciones(candidatas, solicitud.cantidad_personas)
+        if elegidas is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="No hay habitaciones libres suficientes para la cantidad de personas en esas fechas"
+            )
+        
+        elegidas.sort(key=lambda c: c["numero_habitacion"])
+        return {
+            "id_hotel": solicitud.id_hotel,
+            "fecha_inicio": solicitud.fecha_inicio,
+            "fecha_fin": solicitud.fecha_fin,
+            "cantidad_personas": solicitud.cantidad_personas,
+            "id_habitaciones": [c["id_habitacion"] for c in elegidas],
+            "habitaciones": [
+                {
+                    "id_habitacion": c["id_habitacion"],
+                    "numero_habitacion": c["numero_habitacion"],
+                    "id_tipo": c["id_tipo"],
+                    "tipo": c["tipo"],
+                    "capacidad": c["capacidad"],
+                    "costo": c["valor"] * noches
+                }
+                for c in elegidas
+            ],
+            "capacidad_total": sum(c["capacidad"] for c in elegidas),
+            "costo_total": sum(c["valor"] * noches for c in elegidas),
+            "penalizacion_fragmentacion": round(sum(c["penalizacion"] for c in elegidas), 2),
+            "habitaciones_libres": len(candidatas)
+        }
     except HTTPException:
-        db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al asignar habitaciones: {str(e)}"
+        )
+
+@router.post("/importar")
+async def importar_reservas(request: Request, tamano_lote: int = 500, db: Session = Depends(get_db)):
+    """
+    Importar reservas de agencias desde NDJSON (una ReservaCreate por línea).
+    
+    El archivo se procesa en streaming por lotes de ``tamano_lote`` reservas,
+    cada uno en su propia transacción, y la respuesta es NDJSON con el
+    resultado de cada línea a medida que se confirma cada lote.
+    """
+    if not 1 <= tamano_lote <= MAX_TAMANO_LOTE_IMPORTACION:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error al crear reserva: {str(e)}"
+            detail=f"tamano_lote debe estar entre 1 y {MAX_TAMANO_LOTE_IMPORTACION}"
+        )
+    if formato_archivo(request) != "ndjson":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="La importación de reservas solo acepta application/x-ndjson"
         )
+    
+    async def procesar():
+        lote = []
+        async for numero, registro, error in leer_registros(request):
+            if registro is not None:
+                try:
+                    lote.append((numero, ReservaCreate(**registro)))
+                except ValidationError as e:
+                    error = "; ".join(err["msg"] for err in e.errors())
+            if error:
+                yield json.dumps({"linea": numero, "resultado": "error", "detalle": error}, ensure_ascii=False) + "\n"
+            if len(lote) >= tamano_lote:
+                for resultado in await run_in_threadpool(_importar_lote, db, lote):
+                    yield json.dumps(resultado, ensure_ascii=False) + "\n"
+                lote = []
+        if lote:
+            for resultado in await run_in_threadpool(_importar_lote, db, lote):
+                yield json.dumps(resultado, ensure_ascii=False) + "\n"
+    
+    return RespuestaStreamingEntrada(procesar(), media_type="application/x-ndjson")
 
-@router.get("/", response_model=List[ReservaListResponse])
+@router.get(
+    "/",
+    response_model=List[ReservaListResponse],
+    dependencies=[Depends(etag_tablas(
+        "RESERVA", "ESTADO_RESERVA", "AGENCIA_VIAJES", "HABITACION_RESERVA", "HABITACION", "TIPO_HABITACION",
+        "RESERVA_SERVICIO", "SERVICIO_ADICIONAL"
+    ))]
+)
 def listar_reservas(
     filtro_estado: Optional[str] = None,
     filtro_fecha_inicio: Optional[date] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    ids: Optional[str] = None,
+    response: Response = None,
+    db: Connection = Depends(get_lectura)
 ):
-    """Listar reservas con filtros opcionales"""
+    """Listar reservas con filtros opcionales (?fields= y ?expand=agencia,habitaciones)"""
     try:
-        query = """
-        SELECT DISTINCT r.id_reserva, r.fecha_inicio, r.fecha_fin, r.cantidad_personas,
-               r.anticipo_pagado, er.estado
+        if ids:
+            lista = parsear_ids(ids)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_reservas_por_ids(lista, db)), response)
+        
+        campos = parsear_lista(fields, COLUMNAS_LISTADO, "fields")
+        expandir = parsear_lista(expand, EXPANSIONES_LISTADO, "expand")
+        parcial = bool(campos or expandir)
+        if parcial:
+            campos = campos or ["id_reserva", "fecha_inicio", "fecha_fin", "cantidad_personas",
+                                "anticipo_pagado", "estado_actual"]
+            columnas = list(dict.fromkeys(["id_reserva", "id_agencia"] + campos))
+            select = ", ".join(COLUMNAS_LISTADO[c] for c in columnas)
+        else:
+            select = """r.id_reserva, r.fecha_inicio, r.fecha_fin, r.cantidad_personas,
+               r.anticipo_pagado, er.estado"""
+        
+        query = f"""
+        SELECT {select}
         FROM RESERVA r
-        LEFT JOIN ESTADO_RESERVA er ON r.id_reserva = er.id_reserva
-        WHERE er.id_estado = (
-            SELECT MAX(id_estado) FROM ESTADO_RESERVA WHERE id_reserva = r.id_reserva
-        )
+        CROSS JOIN LATERAL ({QUERY_ULTIMO_ESTADO}) er
+        WHERE TRUE
         """
         
         params = {}
@@ -120,6 +467,11 @@ def listar_reservas(
         query += " ORDER BY r.fecha_inicio DESC"
         result = db.execute(text(query), params).fetchall()
         
+        if parcial:
+            return respuesta_parcial(_expandir_reservas(
+                [dict(zip(columnas, row)) for row in result], campos, expandir, db
+            ), response)
+        
         return [
             {
                 "id_reserva": row[0],
@@ -131,14 +483,117 @@ def listar_reservas(
             }
             for row in result
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar reservas: {str(e)}"
         )
 
-@router.get("/{id_reserva}", response_model=dict)
-def obtener_reserva_por_id(id_reserva: int, db: Session = Depends(get_db)):
+def _expandir_reservas(reservas: List[dict], campos: List[str], expandir: List[str], db: Connection) -> List[dict]:
+    """Agregar agencia y habitaciones a las reservas con una consulta por relación"""
+    if "agencia" in expandir:
+        agencias = cargar_por_ids(db, """
+            SELECT id_agencia, id_agencia, nombre FROM AGENCIA_VIAJES WHERE id_agencia = ANY(:ids)
+        """, (r["id_agencia"] for r in reservas))
+        for reserva in reservas:
+            reserva["agencia"] = agencias.get(reserva["id_agencia"])
+    if "habitaciones" in expandir:
+        habitaciones = cargar_por_ids(db, """
+            SELECT hr.id_reserva, h.id_habitacion AS id, h.numero_habitacion AS numero, th.descripcion AS tipo
+            FROM HABITACION_RESERVA hr
+            INNER JOIN HABITACION h ON hr.id_habitacion = h.id_habitacion
+            INNER JOIN TIPO_HABITACION th ON h.id_tipo = th.id_tipo
+            WHERE hr.id_reserva = ANY(:ids)
+        """, (r["id_reserva"] for r in reservas), agrupar=True)
+        for reserva in reservas:
+            reserva["habitaciones"] = habitaciones.get(reserva["id_reserva"], [])
+    
+    for reserva in reservas:
+        for columna in ("id_reserva", "id_agencia"):
+            if columna not in campos:
+                del reserva[columna]
+    return reservas
+
+def _obtener_reservas_por_ids(ids: List[int], db: Connection) -> dict:
+    """Obtener varias reservas completas en cuatro consultas (reserva, habitaciones, servicios, estado)"""
+    query = """
+    SELECT id_reserva, fecha_reserva, fecha_inicio, fecha_fin, cantidad_personas,
+           anticipo_pagado, vencimiento_reserva, id_agencia
+    FROM RESERVA WHERE id_reserva = ANY(:ids)
+    """
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    reservas = {
+        row[0]: {
+            "id_reserva": row[0],
+            "fecha_reserva": row[1],
+            "fecha_inicio": row[2],
+            "fecha_fin": row[3],
+            "cantidad_personas": row[4],
+            "anticipo_pagado": row[5],
+            "vencimiento_reserva": row[6],
+            "id_agencia": row[7],
+            "habitaciones": [],
+            "servicios": [],
+            "estado_actual": "Sin estado"
+        }
+        for row in result
+    }
+    params = {"ids": list(reservas)}
+    
+    query_hab = """
+    SELECT hr.id_reserva, h.id_habitacion, h.numero_habitacion, th.descripcion
+    FROM HABITACION h
+    INNER JOIN TIPO_HABITACION th ON h.id_tipo = th.id_tipo
+    INNER JOIN HABITACION_RESERVA hr ON h.id_habitacion = hr.id_habitacion
+    WHERE hr.id_reserva = ANY(:ids)
+    """
+    for h in db.execute(text(query_hab), params).fetchall():
+        reservas[h[0]]["habitaciones"].append({"id": h[1], "numero": h[2], "tipo": h[3]})
+    
+    query_serv = """
+    SELECT rs.id_reserva, s.id_servicio, s.nombre, s.costo
+    FROM SERVICIO_ADICIONAL s
+    INNER JOIN RESERVA_SERVICIO rs ON s.id_servicio = rs.id_servicio
+    WHERE rs.id_reserva = ANY(:ids)
+    """
+    for s in db.execute(text(query_serv), params).fetchall():
+        reservas[s[0]]["servicios"].append({"id": s[1], "nombre": s[2], "costo": s[3]})
+    
+    query_estado = f"""
+    SELECT r.id_reserva, er.estado
+    FROM RESERVA r
+    CROSS JOIN LATERAL ({QUERY_ULTIMO_ESTADO}) er
+    WHERE r.id_reserva = ANY(:ids)
+    """
+    for e in db.execute(text(query_estado), params).fetchall():
+        reservas[e[0]]["estado_actual"] = e[1]
+    return reservas
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_reservas_por_ids(solicitud: BuscarIdsRequest, db: Connection = Depends(get_lectura)):
+    """Obtener varias reservas por lista de IDs (conserva el orden e informa los no encontrados)"""
+    try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_reservas_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar reservas: {str(e)}"
+        )
+
+@router.get(
+    "/{id_reserva}",
+    response_model=dict,
+    dependencies=[Depends(etag_tablas(
+        "RESERVA", "HABITACION_RESERVA", "HABITACION", "TIPO_HABITACION",
+        "RESERVA_SERVICIO", "SERVICIO_ADICIONAL", "ESTADO_RESERVA"
+    ))]
+)
+def obtener_reserva_por_id(id_reserva: int, db: Connection = Depends(get_lectura)):
     """Obtener una reserva completa por ID"""
     try:
         # Obtener datos básicos
@@ -175,10 +630,10 @@ def obtener_reserva_por_id(id_reserva: int, db: Session = Depends(get_db)):
         servicios = db.execute(text(query_serv), {"id_reserva": id_reserva}).fetchall()
         
         # Obtener estado actual
-        query_estado = """
-        SELECT estado FROM ESTADO_RESERVA
-        WHERE id_reserva = :id_reserva
-        ORDER BY id_estado DESC LIMIT 1
+        query_estado = f"""
+        SELECT er.estado FROM RESERVA r
+        CROSS JOIN LATERAL ({QUERY_ULTIMO_ESTADO}) er
+        WHERE r.id_reserva = :id_reserva
         """
         estado = db.execute(text(query_estado), {"id_reserva": id_reserva}).fetchone()
         
@@ -207,31 +662,32 @@ def obtener_reserva_por_id(id_reserva: int, db: Session = Depends(get_db)):
 def cambiar_estado_reserva(id_reserva: int, cambio: EstadoReservaUpdate, db: Session = Depends(get_db)):
     """Cambiar el estado de una reserva (Confirmada, Cancelada, No Presentada, Completada)"""
     try:
-        # Verificar reserva existe
-        query = "SELECT id_reserva FROM RESERVA WHERE id_reserva = :id_reserva"
-        if not db.execute(text(query), {"id_reserva": id_reserva}).fetchone():
+        # Registrar nuevo estado y, si libera (ESTADOS_QUE_LIBERAN), liberar habitaciones en una sola sentencia
+        query = """
+        WITH nuevo_estado AS (
+            INSERT INTO ESTADO_RESERVA (id_reserva, estado)
+            SELECT id_reserva, :estado FROM RESERVA WHERE id_reserva = :id_reserva
+            RETURNING id_reserva
+        ), liberadas AS (
+            UPDATE HABITACION h SET ocupado = FALSE
+            FROM HABITACION_RESERVA hr, nuevo_estado ne
+            WHERE :libera
+            AND hr.id_reserva = ne.id_reserva
+            AND h.id_habitacion = hr.id_habitacion
+        )
+        SELECT COUNT(*) FROM nuevo_estado
+        """
+        with Ejecucion(db) as ejecucion:
+            cambiadas = ejecucion.ejecutar(text(query), {
+                "id_reserva": id_reserva, "estado": cambio.estado, "libera": cambio.estado in ESTADOS_QUE_LIBERAN
+            })
+            invalidar_tableros(db, QUERY_HOTELES_RESERVAS, {"ids": [id_reserva]}, ejecucion)
+        if not cambiadas.escalar():
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Reserva no encontrada"
             )
         
-        # Registrar nuevo estado
-        query_estado = """
-        INSERT INTO ESTADO_RESERVA (id_reserva, estado)
-        VALUES (:id_reserva, :estado)
-        """
-        db.execute(text(query_estado), {"id_reserva": id_reserva, "estado": cambio.estado})
-        
-        # Si es cancelada, liberar habitaciones
-        if cambio.estado == "Cancelada":
-            query_hab = """
-            SELECT id_habitacion FROM HABITACION_RESERVA WHERE id_reserva = :id_reserva
-            """
-            habitaciones = db.execute(text(query_hab), {"id_reserva": id_reserva}).fetchall()
-            for hab in habitaciones:
-                query_update = "UPDATE HABITACION SET ocupado = FALSE WHERE id_habitacion = :id_habitacion"
-                db.execute(text(query_update), {"id_habitacion": hab[0]})
-        
         db.commit()
         return {"id_reserva": id_reserva, "nuevo_estado": cambio.estado}
     
@@ -245,6 +701,109 @@ def cambiar_estado_reserva(id_reserva: int, cambio: EstadoReservaUpdate, db: Ses
             detail=f"Error al cambiar estado: {str(e)}"
         )
 
+@router.put("/estado/lote", response_model=dict)
+def cambiar_estado_reservas_lote(cambio: EstadoReservaLoteUpdate, db: Session = Depends(get_db)):
+    """Cambiar el estado de muchas reservas (por lista de IDs o por filtro) para la auditoría nocturna"""
+    try:
+        if (cambio.ids is None) == (cambio.filtro is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Debe indicar 'ids' o 'filtro' (solo uno)"
+            )
+        
+        params = {"estado": cambio.estado, "libera": cambio.estado in ESTADOS_QUE_LIBERAN}
+        if cambio.ids is not None:
+            ids = validar_ids(cambio.ids)
+            condiciones = ["r.id_reserva = ANY(:ids)"]
+            params["ids"] = ids
+        else:
+            filtro = cambio.filtro
+            condiciones = []
+            if filtro.estado_actual:
+                condiciones.append("ult.estado = :estado_actual")
+                params["estado_actual"] = filtro.estado_actual
+            if filtro.fecha_inicio:
+                condiciones.append("r.fecha_inicio = :fecha_inicio")
+                params["fecha_inicio"] = filtro.fecha_inicio
+            if filtro.fecha_fin:
+                condiciones.append("r.fecha_fin = :fecha_fin")
+                params["fecha_fin"] = filtro.fecha_fin
+            if filtro.sin_checkin:
+                condiciones.append(
+                    "NOT EXISTS (SELECT 1 FROM REGISTRO_HOSPEDAJE rh WHERE rh.id_reserva = r.id_reserva)"
+                )
+            if not condiciones:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El filtro debe tener al menos una condición"
+                )
+        
+        # Seleccionar, registrar estados y liberar habitaciones en una sola sentencia
+        query = f"""
+        WITH objetivo AS (
+            SELECT r.id_reserva, ult.estado AS estado_anterior
+            FROM RESERVA r
+            LEFT JOIN LATERAL ({QUERY_ULTIMO_ESTADO}) ult ON TRUE
+            WHERE {' AND '.join(condiciones)}
+            FOR UPDATE OF r
+        ), nuevos AS (
+            INSERT INTO ESTADO_RESERVA (id_reserva, estado)
+            SELECT id_reserva, :estado FROM objetivo
+            WHERE estado_anterior IS DISTINCT FROM :estado
+            RETURNING id_reserva
+        ), liberadas AS (
+            UPDATE HABITACION h SET ocupado = FALSE
+            FROM HABITACION_RESERVA hr, nuevos n
+            WHERE :libera
+            AND hr.id_reserva = n.id_reserva
+            AND h.id_habitacion = hr.id_habitacion
+            RETURNING hr.id_reserva
+        )
+        SELECT o.id_reserva, o.estado_anterior, n.id_reserva IS NOT NULL,
+               (SELECT COUNT(*) FROM liberadas l WHERE l.id_reserva = o.id_reserva)
+        FROM objetivo o
+        LEFT JOIN nuevos n ON o.id_reserva = n.id_reserva
+        ORDER BY o.id_reserva
+        """
+        result = db.execute(text(query), params).fetchall()
+        actualizadas = [row[0] for row in result if row[2]]
+        if actualizadas:
+            invalidar_tableros(db, QUERY_HOTELES_RESERVAS, {"ids": actualizadas})
+        db.commit()
+        
+        resultados = {
+            row[0]: {
+                "id_reserva": row[0],
+                "resultado": "actualizada" if row[2] else "sin_cambio",
+                "estado_anterior": row[1],
+                "habitaciones_liberadas": row[3]
+            }
+            for row in result
+        }
+        if cambio.ids is not None:
+            orden = [
+                resultados.get(i, {"id_reserva": i, "resultado": "no_encontrada"})
+                for i in params["ids"]
+            ]
+        else:
+            orden = list(resultados.values())
+        
+        return {
+            "nuevo_estado": cambio.estado,
+            "actualizadas": sum(1 for r in orden if r["resultado"] == "actualizada"),
+            "resultados": orden
+        }
+    
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error al cambiar estados: {str(e)}"
+        )
+
 @router.put("/{id_reserva}/anticipo", response_model=dict)
 def registrar_pago_anticipo(id_reserva: int, db: Session = Depends(get_db)):
     """Registrar que se pagó el anticipo (20%)"""
@@ -270,30 +829,170 @@ def registrar_pago_anticipo(id_reserva: int, db: Session = Depends(get_db)):
             detail=f"Error al registrar pago: {str(e)}"
         )
 
+def _crear_tabla_pagos(db: Session):
+    query = """
+    CREATE TEMP TABLE pagos_archivo (
+        linea INTEGER,
+        id_reserva INTEGER,
+        monto NUMERIC(12, 2),
+        referencia TEXT
+    ) ON COMMIT DROP
+    """
+    db.execute(text(query))
+
+def _aplicar_pagos(db: Session) -> list:
+    """Marcar en una sola sentencia los anticipos que cubren el 20% y devolver los no conciliados"""
+    query = """
+    WITH reservas_archivo AS (
+        SELECT DISTINCT id_reserva FROM pagos_archivo
+    ), valor_habitaciones AS (
+        SELECT hr.id_reserva, SUM(th.valor) AS valor_noche
+        FROM HABITACION_RESERVA hr
+        INNER JOIN reservas_archivo ra ON hr.id_reserva = ra.id_reserva
+        INNER JOIN HABITACION h ON hr.id_habitacion = h.id_habitacion
+        INNER JOIN TIPO_HABITACION th ON h.id_tipo = th.id_tipo
+        GROUP BY hr.id_reserva
+    ), valor_servicios AS (
+        SELECT rs.id_reserva, SUM(s.costo) AS valor
+        FROM RESERVA_SERVICIO rs
+        INNER JOIN reservas_archivo ra ON rs.id_reserva = ra.id_reserva
+        INNER JOIN SERVICIO_ADICIONAL s ON rs.id_servicio = s.id_servicio
+        GROUP BY rs.id_reserva
+    ), calculo AS (
+        SELECT p.linea, p.id_reserva, p.monto, p.referencia,
+               r.id_reserva IS NOT NULL AS existe, r.anticipo_pagado,
+               ROUND((COALESCE(vh.valor_noche, 0) * GREATEST(r.fecha_fin - r.fecha_inicio, 1)
+                      + COALESCE(vs.valor, 0)) * :porcentaje, 2) AS anticipo_esperado
+        FROM pagos_archivo p
+        LEFT JOIN RESERVA r ON p.id_reserva = r.id_reserva
+        LEFT JOIN valor_habitaciones vh ON p.id_reserva = vh.id_reserva
+        LEFT JOIN valor_servicios vs ON p.id_reserva = vs.id_reserva
+    ), primer_pago AS (
+        -- Si una reserva aparece en varias líneas suficientes, la aplica la primera
+        SELECT DISTINCT ON (id_reserva) linea, id_reserva
+        FROM calculo
+        WHERE existe AND NOT anticipo_pagado AND monto >= anticipo_esperado
+        ORDER BY id_reserva, linea
+    ), aplicados AS (
+        UPDATE RESERVA r SET anticipo_pagado = TRUE
+        FROM primer_pago pp
+        WHERE pp.id_reserva = r.id_reserva
+        RETURNING pp.linea, r.id_reserva
+    )
+    SELECT c.linea, c.id_reserva, c.monto, c.referencia, c.existe,
+           c.anticipo_pagado OR (a.linea IS NULL AND EXISTS (
+               SELECT 1 FROM aplicados otra WHERE otra.id_reserva = c.id_reserva
+           )),
+           c.anticipo_esperado, a.linea IS NOT NULL
+    FROM calculo c
+    LEFT JOIN aplicados a ON c.linea = a.linea
+    ORDER BY c.linea
+    """
+    return db.execute(text(query), {"porcentaje": PORCENTAJE_ANTICIPO}).fetchall()
+
+@router.post("/anticipos/conciliar", response_model=dict)
+async def conciliar_anticipos(request: Request, db: Session = Depends(get_db)):
+    """
+    Conciliar un archivo bancario de anticipos (CSV o NDJSON con id_reserva, monto, referencia).
+    
+    El archivo se lee en streaming y se carga con COPY a una tabla temporal;
+    los pagos que cubren el 20% se aplican en una sola sentencia.
+    """
+    try:
+        await run_in_threadpool(_crear_tabla_pagos, db)
+        columnas = ("linea", "id_reserva", "monto", "referencia")
+        errores_formato = []
+        lote = []
+        lineas = 0
+        async for numero, registro, error in leer_registros(request):
+            lineas += 1
+            if registro is not None:
+                try:
+                    pago = PagarAnticipoRequest(**registro)
+                    lote.append((numero, pago.id_reserva, pago.monto, pago.referencia))
+                except ValidationError as e:
+                    error = "; ".join(err["msg"] for err in e.errors())
+            if error:
+                errores_formato.append({"linea": numero, "motivo": error})
+            if len(lote) >= TAMANO_LOTE_COPY:
+                await run_in_threadpool(copiar_filas, db, "pagos_archivo", columnas, lote)
+                lote = []
+        if lote:
+            await run_in_threadpool(copiar_filas, db, "pagos_archivo", columnas, lote)
+        
+        filas = await run_in_threadpool(_aplicar_pagos, db)
+        await run_in_threadpool(db.commit)
+        
+        no_conciliados = []
+        for row in filas:
+            if row[7]:
+                continue
+            if not row[4]:
+                motivo = "reserva_no_encontrada"
+            elif row[5]:
+                motivo = "anticipo_ya_pagado"
+            else:
+                motivo = "monto_insuficiente"
+            no_conciliados.append({
+                "linea": row[0],
+                "id_reserva": row[1],
+                "monto": row[2],
+                "referencia": row[3],
+                "anticipo_esperado": row[6],
+                "motivo": motivo
+            })
+        
+        return {
+            "lineas": lineas,
+            "aplicados": sum(1 for row in filas if row[7]),
+            "no_conciliados": no_conciliados,
+            "errores_formato": errores_formato
+        }
+    
+    except HTTPException:
+        await run_in_threadpool(db.rollback)
+        raise
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error al conciliar anticipos: {str(e)}"
+        )
+
 @router.delete("/{id_reserva}", status_code=status.HTTP_204_NO_CONTENT)
 def eliminar_reserva(id_reserva: int, db: Session = Depends(get_db)):
     """Eliminar una reserva (cancela y libera habitaciones)"""
     try:
-        # Liberar habitaciones
-        query_hab = """
-        SELECT id_habitacion FROM HABITACION_RESERVA WHERE id_reserva = :id_reserva
+        # Liberar habitaciones, borrar dependientes y la reserva e invalidar los
+        # tableros de sus hoteles en una sola sentencia
+        query = f"""
+        WITH hoteles AS (
+            {sql_invalidacion(QUERY_HOTELES_RESERVAS)}
+        ), liberadas AS (
+            UPDATE HABITACION h SET ocupado = FALSE
+            FROM HABITACION_RESERVA hr
+            WHERE hr.id_reserva = :id_reserva AND h.id_habitacion = hr.id_habitacion
+        ), habitaciones AS (
+            DELETE FROM HABITACION_RESERVA WHERE id_reserva = :id_reserva
+        ), servicios AS (
+            DELETE FROM RESERVA_SERVICIO WHERE id_reserva = :id_reserva
+        ), estados AS (
+            DELETE FROM ESTADO_RESERVA WHERE id_reserva = :id_reserva
+        ), eliminada AS (
+            DELETE FROM RESERVA WHERE id_reserva = :id_reserva RETURNING id_reserva
+        )
+        SELECT (SELECT COUNT(*) FROM eliminada), ARRAY(SELECT id_hotel FROM hoteles)
         """
-        habitaciones = db.execute(text(query_hab), {"id_reserva": id_reserva}).fetchall()
-        for hab in habitaciones:
-            query_update = "UPDATE HABITACION SET ocupado = FALSE WHERE id_habitacion = :id_habitacion"
-            db.execute(text(query_update), {"id_habitacion": hab[0]})
-        
-        # Eliminar reserva
-        query = "DELETE FROM RESERVA WHERE id_reserva = :id_reserva"
-        result = db.execute(text(query), {"id_reserva": id_reserva})
-        db.commit()
-        
-        if result.rowcount == 0:
+        eliminadas, hoteles = db.execute(text(query), {"id_reserva": id_reserva, "ids": [id_reserva]}).fetchone()
+        if not eliminadas:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Reserva no encontrada"
             )
+        invalidar_locales(hoteles)
+        db.commit()
     except HTTPException:
+        db.rollback()
         raise
     except Exception as e:
         db.rollback()
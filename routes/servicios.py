@@ -1,17 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_consulta
+from schemas.ids_schema import BuscarIdsRequest, BuscarIdsResponse
+from utils.campos import respuesta_parcial
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
 from schemas.servicio_schema import (
     ServicioCreate,
     ServicioUpdate,
     ServicioResponse,
     ServicioListResponse
 )
+from utils.sentencias import ActualizacionParcial, registrar
 
 router = APIRouter(prefix="/servicios", tags=["servicios"])
 
+ELIMINAR_SERVICIO = registrar("servicio.eliminar", "DELETE FROM SERVICIO_ADICIONAL WHERE id_servicio = :id_servicio")
+ACTUALIZAR_SERVICIO = ActualizacionParcial(
+    "SERVICIO_ADICIONAL", "id_servicio", ["nombre", "costo"], "fila.id_servicio, fila.nombre, fila.costo"
+)
+
 @router.post("/", response_model=ServicioResponse, status_code=status.HTTP_201_CREATED)
 def crear_servicio(servicio: ServicioCreate, db: Session = Depends(get_db)):
     """Crear un nuevo servicio adicional"""
@@ -19,12 +29,11 @@ def crear_servicio(servicio: ServicioCreate, db: Session = Depends(get_db)):
         query = """
         INSERT INTO SERVICIO_ADICIONAL (nombre, costo)
         VALUES (:nombre, :costo)
-        RETURNING id_servicio
+        RETURNING id_servicio, nombre, costo
         """
-        result = db.execute(text(query), {"nombre": servicio.nombre, "costo": float(servicio.costo)})
-        id_servicio = result.scalar()
+        row = db.execute(text(query), {"nombre": servicio.nombre, "costo": float(servicio.costo)}).fetchone()
         db.commit()
-        return obtener_servicio_por_id(id_servicio, db)
+        return {"id_servicio": row[0], "nombre": row[1], "costo": row[2]}
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -33,20 +42,46 @@ def crear_servicio(servicio: ServicioCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/", response_model=List[ServicioListResponse])
-def listar_servicios(db: Session = Depends(get_db)):
+def listar_servicios(ids: Optional[str] = None, db: Connection = Depends(get_consulta)):
     """Listar todos los servicios adicionales"""
     try:
+        if ids:
+            lista = parsear_ids(ids)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_servicios_por_ids(lista, db)))
+        
         query = "SELECT id_servicio, nombre, costo FROM SERVICIO_ADICIONAL ORDER BY nombre"
         result = db.execute(text(query)).fetchall()
         return [{"id_servicio": row[0], "nombre": row[1], "costo": row[2]} for row in result]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar servicios: {str(e)}"
         )
 
+def _obtener_servicios_por_ids(ids: List[int], db: Connection) -> dict:
+    """Obtener varios servicios en una sola consulta"""
+    query = "SELECT id_servicio, nombre, costo FROM SERVICIO_ADICIONAL WHERE id_servicio = ANY(:ids)"
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    return {row[0]: {"id_servicio": row[0], "nombre": row[1], "costo": row[2]} for row in result}
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_servicios_por_ids(solicitud: BuscarIdsRequest, db: Connection = Depends(get_consulta)):
+    """Obtener varios servicios por lista de IDs (conserva el orden e informa los no encontrados)"""
+    try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_servicios_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar servicios: {str(e)}"
+        )
+
 @router.get("/{id_servicio}", response_model=ServicioResponse)
-def obtener_servicio_por_id(id_servicio: int, db: Session = Depends(get_db)):
+def obtener_servicio_por_id(id_servicio: int, db: Connection = Depends(get_consulta)):
     """Obtener un servicio por ID"""
     try:
         query = "SELECT id_servicio, nombre, costo FROM SERVICIO_ADICIONAL WHERE id_servicio = :id_servicio"
@@ -69,28 +104,20 @@ def obtener_servicio_por_id(id_servicio: int, db: Session = Depends(get_db)):
 def actualizar_servicio(id_servicio: int, servicio: ServicioUpdate, db: Session = Depends(get_db)):
     """Actualizar un servicio"""
     try:
-        query = "SELECT id_servicio FROM SERVICIO_ADICIONAL WHERE id_servicio = :id_servicio"
-        if not db.execute(text(query), {"id_servicio": id_servicio}).fetchone():
+        valores = {}
+        if servicio.nombre:
+            valores["nombre"] = servicio.nombre
+        if servicio.costo:
+            valores["costo"] = float(servicio.costo)
+        
+        row = db.execute(ACTUALIZAR_SERVICIO.sentencia(valores), {**valores, "id_servicio": id_servicio}).fetchone()
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Servicio no encontrado"
             )
-        
-        campos = []
-        params = {"id_servicio": id_servicio}
-        if servicio.nombre:
-            campos.append("nombre = :nombre")
-            params["nombre"] = servicio.nombre
-        if servicio.costo:
-            campos.append("costo = :costo")
-            params["costo"] = float(servicio.costo)
-        
-        if campos:
-            query_update = f"UPDATE SERVICIO_ADICIONAL SET {', '.join(campos)} WHERE id_servicio = :id_servicio"
-            db.execute(text(query_update), params)
-            db.commit()
-        
-        return obtener_servicio_por_id(id_servicio, db)
+        db.commit()
+        return {"id_servicio": row[0], "nombre": row[1], "costo": row[2]}
     except HTTPException:
         raise
     except Exception as e:
@@ -104,8 +131,7 @@ def actualizar_servicio(id_servicio: int, servicio: ServicioUpdate, db: Session
 def eliminar_servicio(id_servicio: int, db: Session = Depends(get_db)):
     """Eliminar un servicio"""
     try:
-        query = "DELETE FROM SERVICIO_ADICIONAL WHERE id_servicio = :id_servicio"
-        result = db.execute(text(query), {"id_servicio": id_servicio})
+        result = db.execute(ELIMINAR_SERVICIO, {"id_servicio": id_servicio})
         db.commit()
         if result.rowcount == 0:
             raise HTTPException(
@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from typing import Optional
+from database import get_lectura_primario
+from utils.campos import respuesta_parcial
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+# Tablas sincronizables: clave primaria y su tipo (ver sql/005_registro_cambios.sql)
+TABLAS_SYNC = {
+    "hotel": ("id_hotel", "INTEGER"),
+    "habitacion": ("id_habitacion", "INTEGER"),
+    "huesped": ("numero_id", "TEXT"),
+    "reserva": ("id_reserva", "INTEGER"),
+    "estado_reserva": ("id_estado", "INTEGER"),
+    "registro_hospedaje": ("id_registro", "INTEGER"),
+}
+MAX_LIMITE_SYNC = 5000
+
+
+def _parsear_cursor(cursor: str):
+    """El cursor es "<xid>-<id_cambio>" del último cambio entregado"""
+    try:
+        xid, id_cambio = cursor.split("-")
+        return int(xid), int(id_cambio)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor no válido"
+        )
+
+
+@router.get("/", response_model=dict)
+def sincronizar(
+    desde: Optional[str] = None,
+    limite: int = 1000,
+    response: Response = None,
+    db: Connection = Depends(get_lectura_primario)
+):
+    """
+    Cambios desde un cursor en HOTEL, HABITACION, HUESPED, RESERVA, ESTADO_RESERVA y REGISTRO_HOSPEDAJE.
+    
+    Sin ``desde`` solo devuelve el cursor actual (pedirlo antes de la descarga completa).
+    Varios cambios de la misma fila en la página se compactan en el último; las filas
+    vigentes se devuelven completas y las borradas solo por su clave.
+    """
+    try:
+        if not 1 <= limite <= MAX_LIMITE_SYNC:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El límite debe estar entre 1 y {MAX_LIMITE_SYNC}"
+            )
+        
+        # Solo son seguras las transacciones anteriores a la más antigua en curso
+        xmin = int(db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::TEXT")).scalar())
+        if desde is None:
+            return {"cursor": f"{xmin}-0", "hay_mas": False, "cambios": {}}
+        xid, id_cambio = _parsear_cursor(desde)
+        
+        query = """
+        SELECT xid::TEXT, id_cambio, tabla, clave, operacion
+        FROM REGISTRO_CAMBIO
+        WHERE (xid, id_cambio) > (CAST(:xid AS XID8), :id_cambio)
+        AND xid < CAST(:xmin AS XID8)
+        ORDER BY xid, id_cambio
+        LIMIT :limite
+        """
+        filas = db.execute(text(query), {
+            "xid": str(xid), "id_cambio": id_cambio, "xmin": str(xmin), "limite": limite
+        }).fetchall()
+        
+        hay_mas = len(filas) == limite
+        cursor = f"{filas[-1][0]}-{filas[-1][1]}" if hay_mas else f"{max(xmin, xid)}-0"
+        
+        # Compactar: la última operación de cada fila
+        ultimas = {}
+        for fila in filas:
+            ultimas[(fila[2], fila[3])] = fila[4]
+        
+        cambios = {}
+        for tabla, (columna, tipo) in TABLAS_SYNC.items():
+            claves = [clave for (t, clave), op in ultimas.items() if t == tabla and op != "D"]
+            eliminados = [clave for (t, clave), op in ultimas.items() if t == tabla and op == "D"]
+            if not claves and not eliminados:
+                continue
+            
+            vigentes = {}
+            if claves:
+                query_filas = f"""
+                SELECT t.{columna}::TEXT, to_jsonb(t)
+                FROM {tabla} t
+                WHERE t.{columna} = ANY(CAST(:claves AS {tipo}[]))
+                """
+                vigentes = dict(db.execute(text(query_filas), {"claves": claves}).fetchall())
+            # Una fila insertada y borrada después ya no existe: se informa como eliminada
+            eliminados += [clave for clave in claves if clave not in vigentes]
+            cambios[tabla] = {"actualizados": list(vigentes.values()), "eliminados": eliminados}
+        
+        return respuesta_parcial({"cursor": cursor, "hay_mas": hay_mas, "cambios": cambios}, response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al sincronizar: {str(e)}"
+        )
@@ -1,17 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_consulta
+from schemas.ids_schema import BuscarIdsRequest, BuscarIdsResponse
+from utils.campos import respuesta_parcial
+from utils.ids import parsear_ids, resultado_por_ids, validar_ids
 from schemas.tipo_habitacion_schema import (
     TipoHabitacionCreate,
     TipoHabitacionUpdate,
     TipoHabitacionResponse,
     TipoHabitacionListResponse
 )
+from utils.sentencias import ActualizacionParcial, registrar
 
 router = APIRouter(prefix="/tipos-habitacion", tags=["tipos_habitacion"])
 
+ELIMINAR_TIPO_HABITACION = registrar("tipo_habitacion.eliminar", "DELETE FROM TIPO_HABITACION WHERE id_tipo = :id_tipo")
+ACTUALIZAR_TIPO_HABITACION = ActualizacionParcial(
+    "TIPO_HABITACION", "id_tipo", ["descripcion", "capacidad", "valor"],
+    "fila.id_tipo, fila.descripcion, fila.capacidad, fila.valor"
+)
+
 @router.post("/", response_model=TipoHabitacionResponse, status_code=status.HTTP_201_CREATED)
 def crear_tipo_habitacion(tipo: TipoHabitacionCreate, db: Session = Depends(get_db)):
     """Crear un nuevo tipo de habitación"""
@@ -19,16 +30,15 @@ def crear_tipo_habitacion(tipo: TipoHabitacionCreate, db: Session = Depends(get_
         query = """
         INSERT INTO TIPO_HABITACION (descripcion, capacidad, valor)
         VALUES (:descripcion, :capacidad, :valor)
-        RETURNING id_tipo
+        RETURNING id_tipo, descripcion, capacidad, valor
         """
-        result = db.execute(text(query), {
+        row = db.execute(text(query), {
             "descripcion": tipo.descripcion,
             "capacidad": tipo.capacidad,
             "valor": float(tipo.valor)
-        })
-        id_tipo = result.scalar()
+        }).fetchone()
         db.commit()
-        return obtener_tipo_por_id(id_tipo, db)
+        return {"id_tipo": row[0], "descripcion": row[1], "capacidad": row[2], "valor": row[3]}
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -37,23 +47,52 @@ def crear_tipo_habitacion(tipo: TipoHabitacionCreate, db: Session = Depends(get_
         )
 
 @router.get("/", response_model=List[TipoHabitacionListResponse])
-def listar_tipos_habitacion(db: Session = Depends(get_db)):
+def listar_tipos_habitacion(ids: Optional[str] = None, db: Connection = Depends(get_consulta)):
     """Listar todos los tipos de habitación"""
     try:
+        if ids:
+            lista = parsear_ids(ids)
+            return respuesta_parcial(resultado_por_ids(lista, _obtener_tipos_por_ids(lista, db)))
+        
         query = "SELECT id_tipo, descripcion, capacidad, valor FROM TIPO_HABITACION ORDER BY descripcion"
         result = db.execute(text(query)).fetchall()
         return [
             {"id_tipo": row[0], "descripcion": row[1], "capacidad": row[2], "valor": row[3]}
             for row in result
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al listar tipos: {str(e)}"
         )
 
+def _obtener_tipos_por_ids(ids: List[int], db: Connection) -> dict:
+    """Obtener varios tipos de habitación en una sola consulta"""
+    query = "SELECT id_tipo, descripcion, capacidad, valor FROM TIPO_HABITACION WHERE id_tipo = ANY(:ids)"
+    result = db.execute(text(query), {"ids": ids}).fetchall()
+    return {
+        row[0]: {"id_tipo": row[0], "descripcion": row[1], "capacidad": row[2], "valor": row[3]}
+        for row in result
+    }
+
+@router.post("/buscar-ids", response_model=BuscarIdsResponse)
+def buscar_tipos_por_ids(solicitud: BuscarIdsRequest, db: Connection = Depends(get_consulta)):
+    """Obtener varios tipos de habitación por lista de IDs (conserva el orden e informa los no encontrados)"""
+    try:
+        ids = validar_ids(solicitud.ids)
+        return resultado_por_ids(ids, _obtener_tipos_por_ids(ids, db))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar tipos: {str(e)}"
+        )
+
 @router.get("/{id_tipo}", response_model=TipoHabitacionResponse)
-def obtener_tipo_por_id(id_tipo: int, db: Session = Depends(get_db)):
+def obtener_tipo_por_id(id_tipo: int, db: Connection = Depends(get_consulta)):
     """Obtener un tipo de habitación por ID"""
     try:
         query = "SELECT id_tipo, descripcion, capacidad, valor FROM TIPO_HABITACION WHERE id_tipo = :id_tipo"
@@ -76,31 +115,22 @@ def obtener_tipo_por_id(id_tipo: int, db: Session = Depends(get_db)):
 def actualizar_tipo_habitacion(id_tipo: int, tipo: TipoHabitacionUpdate, db: Session = Depends(get_db)):
     """Actualizar un tipo de habitación"""
     try:
-        query = "SELECT id_tipo FROM TIPO_HABITACION WHERE id_tipo = :id_tipo"
-        if not db.execute(text(query), {"id_tipo": id_tipo}).fetchone():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Tipo de habitación no encontrado"
-            )
-        
-        campos = []
-        params = {"id_tipo": id_tipo}
+        valores = {}
         if tipo.descripcion:
-            campos.append("descripcion = :descripcion")
-            params["descripcion"] = tipo.descripcion
+            valores["descripcion"] = tipo.descripcion
         if tipo.capacidad:
-            campos.append("capacidad = :capacidad")
-            params["capacidad"] = tipo.capacidad
+            valores["capacidad"] = tipo.capacidad
         if tipo.valor:
-            campos.append("valor = :valor")
-            params["valor"] = float(tipo.valor)
+            valores["valor"] = float(tipo.valor)
         
-        if campos:
-            query_update = f"UPDATE TIPO_HABITACION SET {', '.join(campos)} WHERE id_tipo = :id_tipo"
-            db.execute(text(query_update), params)
-            db.commit()
-        
-        return obtener_tipo_por_id(id_tipo, db)
+        row = db.execute(ACTUALIZAR_TIPO_HABITACION.sentencia(valores), {**valores, "id_tipo": id_tipo}).fetchone()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tipo de habitación no encontrado"
+            )
+        db.commit()
+        return {"id_tipo": row[0], "descripcion": row[1], "capacidad": row[2], "valor": row[3]}
     except HTTPException:
         raise
     except Exception as e:
@@ -114,8 +144,7 @@ def actualizar_tipo_habitacion(id_tipo: int, tipo: TipoHabitacionUpdate, db: Ses
 def eliminar_tipo_habitacion(id_tipo: int, db: Session = Depends(get_db)):
     """Eliminar un tipo de habitación"""
     try:
-        query = "DELETE FROM TIPO_HABITACION WHERE id_tipo = :id_tipo"
-        result = db.execute(text(query), {"id_tipo": id_tipo})
+        result = db.execute(ELIMINAR_TIPO_HABITACION, {"id_tipo": id_tipo})
         db.commit()
         if result.rowcount == 0:
             raise HTTPException(
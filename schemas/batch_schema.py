@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+class OperacionBatch(BaseModel):
+    metodo: str = "GET"  # GET, POST, PUT, DELETE
+    ruta: str  # Ruta con query string, ej: "/reservas/10" o "/reservas/?filtro_estado=Confirmada"
+    cuerpo: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    operaciones: List[OperacionBatch] = Field(..., min_length=1, max_length=50)
+    compartir_conexion: bool = False  # Ejecutar todo en una sola conexión (en orden)
+    transaccion: bool = False  # Ejecutar todo en una sola transacción (implica compartir conexión)
+
+class ResultadoBatch(BaseModel):
+    estado: int
+    cuerpo: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    resultados: List[ResultadoBatch]
+    transaccion_confirmada: Optional[bool] = None
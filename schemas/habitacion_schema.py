@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class HabitacionBase(BaseModel):
     numero_habitacion: int
@@ -29,3 +29,20 @@ class HabitacionListResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class RangoHabitaciones(BaseModel):
+    piso_desde: int = Field(..., ge=0, le=999)
+    piso_hasta: int = Field(..., ge=0, le=999)
+    habitacion_desde: int = Field(..., ge=1, le=99)  # Número dentro del piso: piso 3, habitación 7 -> 307
+    habitacion_hasta: int = Field(..., ge=1, le=99)
+    id_tipo: int
+    ocupado: bool = False
+
+class HabitacionLoteCreate(BaseModel):
+    id_hotel: int
+    rangos: List[RangoHabitaciones]
+
+class HabitacionLoteResponse(BaseModel):
+    id_hotel: int
+    creadas: List[HabitacionResponse]
+    conflictos: List[int]  # Números que ya existían en el hotel o repetidos en los rangos
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 
 class TelefonoHotelBase(BaseModel):
     telefono: str
@@ -34,3 +34,43 @@ class HotelListResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class HabitacionesPorTipo(BaseModel):
+    id_tipo: int
+    descripcion: str
+    total: int
+    ocupadas: int
+
+class HotelResumenResponse(HotelListResponse):
+    id_categoria: int
+    nombre_categoria: Optional[str] = None
+    telefonos: List[str]
+    habitaciones_total: int
+    habitaciones_ocupadas: int
+    habitaciones_por_tipo: List[HabitacionesPorTipo]
+
+class TableroHotelResponse(BaseModel):
+    id_hotel: int
+    fecha: date
+    habitaciones_total: int
+    habitaciones_ocupadas: int
+    hospedajes_activos: int
+    menores_hospedados: int
+    mascotas_hospedadas: int
+    reservas_inician_hoy: int
+    reservas_terminan_hoy: int
+    llegadas_hoy: int
+    salidas_hoy: int
+
+
+class CalendarioHabitacion(BaseModel):
+    id_habitacion: int
+    numero_habitacion: int
+    dias: str  # Un dígito por día: 0 libre, 1 reservada, 2 hospedada
+
+
+class CalendarioHotelResponse(BaseModel):
+    id_hotel: int
+    desde: date
+    hasta: date
+    habitaciones: List[CalendarioHabitacion]
@@ -32,3 +32,9 @@ class HuespedListResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class HuespedBusquedaResponse(BaseModel):
+    numero_id: str
+    nombre: str
+    tipo_id: str
+    puntaje: float
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Any, List
+
+class BuscarIdsRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+class BuscarIdsTextoRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1)  # Para huéspedes (numero_id)
+
+class BuscarIdsResponse(BaseModel):
+    resultados: List[dict]
+    no_encontrados: List[Any]  # IDs pedidos que no existen, en el orden de la solicitud
@@ -44,6 +44,25 @@ class ReservaListResponse(BaseModel):
 class PagarAnticipoRequest(BaseModel):
     id_reserva: int
     monto: Decimal
+    referencia: Optional[str] = None  # Referencia bancaria del depósito
 
 class EstadoReservaUpdate(BaseModel):
     estado: str  # "Confirmada", "Cancelada", "No Presentada", "Completada"
+
+class FiltroReservasLote(BaseModel):
+    estado_actual: Optional[str] = None  # Ej: "Confirmada"
+    fecha_inicio: Optional[date] = None
+    fecha_fin: Optional[date] = None
+    sin_checkin: bool = False  # Solo reservas sin registro de hospedaje
+
+class EstadoReservaLoteUpdate(BaseModel):
+    estado: str  # Nuevo estado para todas las reservas seleccionadas
+    ids: Optional[List[int]] = None  # Lista explícita de reservas...
+    filtro: Optional[FiltroReservasLote] = None  # ...o un predicado (uno de los dos)
+
+class AsignacionHabitacionesRequest(BaseModel):
+    id_hotel: int
+    fecha_inicio: date
+    fecha_fin: date
+    cantidad_personas: int
+    tipos_preferidos: Optional[List[int]] = None  # Los demás tipos llevan un recargo
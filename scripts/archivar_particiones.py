@@ -0,0 +1,34 @@
+"""
+Mantenimiento de particiones: crea las de los próximos meses y separa las
+anteriores a la retención (opcionalmente las mueve a un esquema de archivo).
+
+Uso: python -m scripts.archivar_particiones --meses-retener 24 [--esquema archivo]
+"""
+import argparse
+
+from database import engine
+from utils.particiones import MESES_FUTUROS, archivar_particiones, crear_particiones_futuras
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crear particiones futuras y archivar las antiguas")
+    parser.add_argument("--meses-retener", type=int, default=24, help="Meses de historial que siguen en la API")
+    parser.add_argument("--meses-futuros", type=int, default=MESES_FUTUROS)
+    parser.add_argument("--esquema", help="Esquema al que mover las particiones separadas")
+    parser.add_argument("--simular", action="store_true", help="Mostrar lo que se haría sin aplicar cambios")
+    args = parser.parse_args()
+
+    with engine.connect() as conexion:
+        crear_particiones_futuras(conexion, args.meses_futuros)
+        archivadas = archivar_particiones(conexion, args.meses_retener, args.esquema)
+        if args.simular:
+            conexion.rollback()
+        else:
+            conexion.commit()
+
+    accion = "Se archivarían" if args.simular else "Archivadas"
+    print(f"{accion} {len(archivadas)} particiones: {', '.join(archivadas) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
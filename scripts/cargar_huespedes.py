@@ -0,0 +1,66 @@
+"""
+Carga masiva de huéspedes desde la línea de comandos.
+
+Usa el mismo flujo que POST /huespedes/carga-masiva: COPY a una tabla
+temporal y una sola sentencia de fusión (INSERT ... ON CONFLICT).
+
+Uso: python -m scripts.cargar_huespedes archivo.ndjson|archivo.csv
+"""
+import argparse
+import sys
+
+from pydantic import ValidationError
+
+from database import SessionLocal
+from routes.huespedes import (
+    COLUMNAS_CARGA,
+    crear_tabla_carga_huespedes,
+    fila_carga_huesped,
+    fusionar_huespedes
+)
+from utils.carga_masiva import TAMANO_LOTE_COPY, copiar_filas, leer_registros_archivo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga masiva de huéspedes (CSV o NDJSON)")
+    parser.add_argument("archivo")
+    parser.add_argument("--formato", choices=["csv", "ndjson"], help="Por defecto según la extensión")
+    args = parser.parse_args()
+    formato = args.formato or ("csv" if args.archivo.lower().endswith(".csv") else "ndjson")
+
+    db = SessionLocal()
+    try:
+        crear_tabla_carga_huespedes(db)
+        lote = []
+        errores = 0
+        with open(args.archivo, encoding="utf-8") as archivo:
+            for numero, registro, error in leer_registros_archivo(archivo, formato):
+                if registro is not None:
+                    try:
+                        lote.append(fila_carga_huesped(numero, registro))
+                    except ValidationError as e:
+                        error = "; ".join(err["msg"] for err in e.errors())
+                if error:
+                    errores += 1
+                    print(f"Línea {numero}: {error}", file=sys.stderr)
+                if len(lote) >= TAMANO_LOTE_COPY:
+                    copiar_filas(db, "huespedes_carga", COLUMNAS_CARGA, lote)
+                    lote = []
+        if lote:
+            copiar_filas(db, "huespedes_carga", COLUMNAS_CARGA, lote)
+
+        resumen = fusionar_huespedes(db)
+        db.commit()
+        print(
+            f"Insertados: {resumen['insertados']}  Actualizados: {resumen['actualizados']}  "
+            f"Sin cambios: {resumen['sin_cambios']}  Errores: {errores}"
+        )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
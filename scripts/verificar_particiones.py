@@ -0,0 +1,123 @@
+"""
+Verificación de sql/006_particiones.sql contra la base de datos real.
+
+Comprueba que REGISTRO_HOSPEDAJE está particionada por fecha_hora_checkin con
+clave primaria, que ambas tablas particionadas conservan los triggers de 001,
+004, 005 y 007, y que un check-in seguido de un checkout sigue generando los
+mismos eventos que ve GET /eventos (tipo y datos) y no cambia de partición.
+Las escrituras de prueba se hacen en una transacción que se revierte, así que
+no se envía ningún NOTIFY.
+
+Uso: DATABASE_URL=... python -m scripts.verificar_particiones
+"""
+import sys
+
+from sqlalchemy import text
+
+from database import engine
+
+TRIGGERS_ESPERADOS = {
+    "estado_reserva": [
+        "trg_version_estado_reserva",
+        "trg_evento_estado_reserva",
+        "trg_cambios_i_estado_reserva", "trg_cambios_u_estado_reserva", "trg_cambios_d_estado_reserva",
+        "trg_calendario_i_estado_reserva",
+    ],
+    "registro_hospedaje": [
+        "trg_version_registro_hospedaje",
+        "trg_evento_registro_hospedaje",
+        "trg_cambios_i_registro_hospedaje", "trg_cambios_u_registro_hospedaje", "trg_cambios_d_registro_hospedaje",
+        "trg_calendario_i_registro_hospedaje", "trg_calendario_u_registro_hospedaje",
+    ],
+}
+
+QUERY_CLAVE_PARTICION = """
+SELECT a.attname FROM pg_partitioned_table p
+INNER JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+WHERE p.partrelid = CAST(:tabla AS REGCLASS)
+"""
+
+QUERY_CLAVE_PRIMARIA = """
+SELECT array_agg(a.attname::TEXT ORDER BY a.attname)
+FROM pg_constraint c
+INNER JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey)
+WHERE c.conrelid = CAST(:tabla AS REGCLASS) AND c.contype = 'p'
+"""
+
+QUERY_TRIGGERS = """
+SELECT tgname FROM pg_trigger
+WHERE tgrelid = CAST(:tabla AS REGCLASS) AND NOT tgisinternal AND tgparentid = 0
+"""
+
+# Una reserva con habitación y un huésped cualquiera para el check-in de prueba
+QUERY_DATOS_PRUEBA = """
+SELECT hr.id_reserva, hr.id_habitacion, (SELECT numero_id FROM HUESPED LIMIT 1)
+FROM HABITACION_RESERVA hr LIMIT 1
+"""
+
+QUERY_EVENTOS_TRANSACCION = """
+SELECT tipo, datos FROM EVENTO WHERE xid = pg_current_xact_id() ORDER BY id_evento
+"""
+
+
+def main():
+    fallos = []
+
+    def comprobar(descripcion: str, ok: bool, detalle=""):
+        print(f"{'OK   ' if ok else 'FALLO'} {descripcion} {detalle}")
+        if not ok:
+            fallos.append(descripcion)
+
+    with engine.connect() as conexion:
+        clave = conexion.execute(text(QUERY_CLAVE_PARTICION), {"tabla": "registro_hospedaje"}).scalar()
+        comprobar("registro_hospedaje particionada por fecha_hora_checkin", clave == "fecha_hora_checkin", clave)
+        primaria = conexion.execute(text(QUERY_CLAVE_PRIMARIA), {"tabla": "registro_hospedaje"}).scalar()
+        comprobar(
+            "clave primaria (id_registro, fecha_hora_checkin)",
+            primaria == ["fecha_hora_checkin", "id_registro"], primaria
+        )
+
+        for tabla, esperados in TRIGGERS_ESPERADOS.items():
+            presentes = {row[0] for row in conexion.execute(text(QUERY_TRIGGERS), {"tabla": tabla}).fetchall()}
+            faltan = [t for t in esperados if t not in presentes]
+            comprobar(f"triggers de {tabla}", not faltan, f"faltan: {', '.join(faltan)}" if faltan else "")
+
+        datos = conexion.execute(text(QUERY_DATOS_PRUEBA)).fetchone()
+        if datos is None or datos[2] is None:
+            print("Sin reservas con habitación o sin huéspedes: se omite la prueba de eventos")
+        else:
+            id_reserva, id_habitacion, id_huesped = datos
+            query_checkin = """
+            INSERT INTO REGISTRO_HOSPEDAJE (id_reserva, id_huesped, id_habitacion, fecha_hora_checkin, responsable, mascota)
+            VALUES (:id_reserva, :id_huesped, :id_habitacion, NOW(), TRUE, FALSE)
+            RETURNING id_registro, tableoid::REGCLASS::TEXT
+            """
+            id_registro, particion = conexion.execute(text(query_checkin), {
+                "id_reserva": id_reserva, "id_huesped": id_huesped, "id_habitacion": id_habitacion
+            }).fetchone()
+            query_checkout = """
+            UPDATE REGISTRO_HOSPEDAJE SET fecha_checkout = CURRENT_DATE
+            WHERE id_registro = :id_registro
+            RETURNING tableoid::REGCLASS::TEXT, fecha_checkout::TEXT
+            """
+            particion_checkout, fecha_checkout = conexion.execute(
+                text(query_checkout), {"id_registro": id_registro}
+            ).fetchone()
+            comprobar("el checkout no cambia de partición", particion == particion_checkout,
+                      f"{particion} -> {particion_checkout}")
+
+            eventos = conexion.execute(text(QUERY_EVENTOS_TRANSACCION)).fetchall()
+            base = {"id_registro": id_registro, "id_reserva": id_reserva, "id_habitacion": id_habitacion}
+            esperados = [
+                ("checkin", {**base, "fecha_checkout": None}),
+                ("checkout", {**base, "fecha_checkout": fecha_checkout}),
+            ]
+            obtenidos = [(row[0], row[1]) for row in eventos if row[0] in ("checkin", "checkout")]
+            comprobar("eventos de check-in y checkout", obtenidos == esperados, obtenidos)
+        conexion.rollback()
+
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
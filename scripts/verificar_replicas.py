@@ -0,0 +1,113 @@
+"""
+Verificación del enrutamiento de lecturas a réplicas contra servidores reales.
+
+Necesita el primario en DATABASE_URL y al menos una réplica en
+DATABASE_REPLICA_URLS (p. ej. dos instancias locales de Postgres en puertos
+distintos; la "réplica" puede ser una instancia independiente, que se ve con
+retraso 0). Cada servidor se identifica por ``inet_server_port()``, así que
+deben escuchar en puertos distintos. Comprueba:
+
+- Las lecturas se reparten en round-robin entre las réplicas.
+- ``X-Consistencia: fuerte``, las escrituras y ``get_lectura_primario`` usan el primario.
+- ``get_lectura`` abre transacciones READ ONLY.
+- Con las réplicas atrasadas o una réplica caída, las lecturas vuelven al primario.
+
+Uso: DATABASE_URL=... DATABASE_REPLICA_URLS=... python -m scripts.verificar_replicas
+"""
+import sys
+from collections import Counter
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from database import engine, get_consulta, get_db, get_lectura, get_lectura_primario, replicas
+from utils.replicas import Replica
+
+QUERY_SERVIDOR = text("SELECT inet_server_port(), current_setting('transaction_read_only')")
+
+
+def crear_app() -> FastAPI:
+    app = FastAPI()
+
+    def servidor(db):
+        puerto, solo_lectura = db.execute(QUERY_SERVIDOR).fetchone()
+        return {"puerto": puerto, "solo_lectura": solo_lectura == "on"}
+
+    @app.get("/consulta")
+    def con_consulta(db=Depends(get_consulta)):
+        return servidor(db)
+
+    @app.get("/lectura")
+    def con_lectura(db=Depends(get_lectura)):
+        return servidor(db)
+
+    @app.get("/primario")
+    def con_primario(db=Depends(get_lectura_primario)):
+        return servidor(db)
+
+    @app.post("/escritura")
+    def con_session(db=Depends(get_db)):
+        return servidor(db)
+
+    return app
+
+
+def main():
+    if not replicas.replicas:
+        sys.exit("Definir DATABASE_REPLICA_URLS con al menos una réplica")
+
+    with engine.connect() as conexion:
+        puerto_primario = conexion.execute(text("SELECT inet_server_port()")).scalar()
+    replicas.verificar()
+    for estado in replicas.estado():
+        print(f"  {estado}")
+    puertos_replicas = Counter()
+    for replica in replicas.replicas:
+        with replica.motor.connect() as conexion:
+            puertos_replicas[conexion.execute(text("SELECT inet_server_port()")).scalar()] += 1
+
+    fallos = []
+
+    def comprobar(descripcion: str, ok: bool, detalle=""):
+        print(f"{'OK   ' if ok else 'FALLO'} {descripcion} {detalle}")
+        if not ok:
+            fallos.append(descripcion)
+
+    cliente = TestClient(crear_app())
+    n = 10 * len(replicas.replicas)
+    usados = Counter(cliente.get("/consulta").json()["puerto"] for _ in range(n))
+    comprobar("lecturas solo en réplicas", set(usados) <= set(puertos_replicas), dict(usados))
+    por_replica = [usados[p] / puertos_replicas[p] for p in puertos_replicas]
+    comprobar("reparto round-robin", max(por_replica) - min(por_replica) <= 1, dict(usados))
+
+    lectura = cliente.get("/lectura").json()
+    comprobar("get_lectura en réplica y READ ONLY", lectura["puerto"] in puertos_replicas and lectura["solo_lectura"], lectura)
+    fuerte = cliente.get("/consulta", headers={"X-Consistencia": "fuerte"}).json()
+    comprobar("X-Consistencia: fuerte en el primario", fuerte["puerto"] == puerto_primario, fuerte)
+    primario = cliente.get("/primario").json()
+    comprobar("get_lectura_primario en el primario", primario["puerto"] == puerto_primario and primario["solo_lectura"], primario)
+    escritura = cliente.post("/escritura").json()
+    comprobar("escritura en el primario", escritura["puerto"] == puerto_primario and not escritura["solo_lectura"], escritura)
+
+    max_retraso = replicas.max_retraso
+    replicas.max_retraso = -1
+    atrasadas = cliente.get("/consulta").json()
+    replicas.max_retraso = max_retraso
+    comprobar("réplicas atrasadas: primario", atrasadas["puerto"] == puerto_primario, atrasadas)
+
+    # Réplica que no acepta conexiones, marcada como sana hasta el primer intento
+    caida = Replica(create_engine("postgresql+psycopg://replica@127.0.0.1:1/caida", connect_args={"connect_timeout": 1}))
+    caida.sana, caida.retraso = True, 0.0
+    originales = replicas.replicas
+    replicas.replicas = [caida]
+    respuesta = cliente.get("/consulta").json()
+    comprobar("réplica caída: primario", respuesta["puerto"] == puerto_primario, respuesta)
+    comprobar("réplica caída fuera de la rotación", replicas.elegir() is None, caida.error or "")
+    replicas.replicas = originales
+
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
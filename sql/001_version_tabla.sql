@@ -0,0 +1,69 @@
+-- Marcadores de cambio por tabla para ETags (utils/etag.py)
+-- Un trigger por sentencia incrementa la versión de la tabla modificada.
+--
+-- El incremento es una fila nueva en VERSION_TABLA_CAMBIO (sin UPDATE de una
+-- fila compartida), así las escrituras concurrentes sobre una misma tabla, la
+-- importación masiva y el COPY incluidos, no se serializan en un bloqueo de fila.
+-- La versión vigente (vista VERSION_TABLA_VIGENTE) es la base de VERSION_TABLA
+-- más los incrementos sin compactar; solo cuenta transacciones confirmadas, de
+-- modo que no cambia antes de que los datos sean visibles (una secuencia sí lo
+-- haría y un lector podría cachear datos viejos bajo la versión nueva).
+
+CREATE TABLE IF NOT EXISTS VERSION_TABLA (
+    tabla   VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS VERSION_TABLA_CAMBIO (
+    tabla VARCHAR(63) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_version_tabla_cambio ON VERSION_TABLA_CAMBIO (tabla);
+
+CREATE OR REPLACE VIEW VERSION_TABLA_VIGENTE AS
+SELECT v.tabla, v.version + (SELECT count(*) FROM VERSION_TABLA_CAMBIO c WHERE c.tabla = v.tabla) AS version
+FROM VERSION_TABLA v;
+
+-- Pasa los incrementos de p_tabla a su base; la suma que ven los lectores no cambia
+CREATE OR REPLACE FUNCTION compactar_version_tabla(p_tabla TEXT) RETURNS VOID AS $$
+BEGIN
+    WITH borrados AS (DELETE FROM VERSION_TABLA_CAMBIO WHERE tabla = p_tabla RETURNING 1)
+    UPDATE VERSION_TABLA SET version = version + (SELECT count(*) FROM borrados)
+    WHERE tabla = p_tabla;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION incrementar_version_tabla() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO VERSION_TABLA_CAMBIO (tabla) VALUES (TG_TABLE_NAME);
+
+    -- De vez en cuando compactar, con un solo compactador por tabla: los demás
+    -- escritores no esperan el bloqueo de la fila base, siguen de largo.
+    IF random() < 0.01
+       AND current_setting('transaction_isolation') = 'read committed'
+       AND pg_try_advisory_xact_lock(hashtext('version_tabla'), hashtext(TG_TABLE_NAME)) THEN
+        PERFORM compactar_version_tabla(TG_TABLE_NAME);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'hotel', 'telefonos_hotel', 'categoria', 'habitacion', 'tipo_habitacion',
+        'huesped', 'telefonos_huesped', 'agencia_viajes', 'servicio_adicional',
+        'reserva', 'estado_reserva', 'habitacion_reserva', 'reserva_servicio',
+        'registro_hospedaje'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_version_%1$s ON %1$I', t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_version_%1$s AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %1$I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_tabla()', t
+        );
+        INSERT INTO VERSION_TABLA (tabla) VALUES (t) ON CONFLICT DO NOTHING;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,14 @@
+-- Índices para GET /huespedes/buscar (routes/huespedes.py)
+-- Trigramas para prefijo y coincidencia aproximada en nombre y teléfono;
+-- text_pattern_ops para prefijos de numero_id (la igualdad usa la PK).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_huesped_nombre_trgm
+    ON HUESPED USING GIN (lower(nombre) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_huesped_numero_id_prefijo
+    ON HUESPED (numero_id text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_telefonos_huesped_telefono_trgm
+    ON TELEFONOS_HUESPED USING GIN ((telefono::TEXT) gin_trgm_ops);
@@ -0,0 +1,32 @@
+-- Un número de habitación no se repite dentro de un hotel.
+-- POST /habitaciones/lote usa ON CONFLICT sobre este índice para informar
+-- los números existentes sin abortar el lote.
+--
+-- Falla si ya hay números repetidos en un hotel. Antes de crear el índice se
+-- informan esos números; hay que renumerar o eliminar los duplicados (revisando
+-- sus reservas y hospedajes) y volver a ejecutar el script. Para listarlos:
+-- SELECT id_hotel, numero_habitacion, array_agg(id_habitacion ORDER BY id_habitacion)
+-- FROM HABITACION GROUP BY id_hotel, numero_habitacion HAVING COUNT(*) > 1;
+
+DO $$
+DECLARE
+    v_duplicados TEXT;
+BEGIN
+    SELECT string_agg(format('hotel %s, número %s (habitaciones %s)', id_hotel, numero_habitacion, ids), '; ')
+    INTO v_duplicados
+    FROM (
+        SELECT id_hotel, numero_habitacion, array_agg(id_habitacion ORDER BY id_habitacion) AS ids
+        FROM HABITACION
+        GROUP BY id_hotel, numero_habitacion
+        HAVING COUNT(*) > 1
+    ) d;
+
+    IF v_duplicados IS NOT NULL THEN
+        RAISE EXCEPTION 'Números de habitación repetidos: %', v_duplicados
+            USING HINT = 'Renumerar o eliminar los duplicados y volver a ejecutar 003_habitacion_numero_unico.sql';
+    END IF;
+END;
+$$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_habitacion_hotel_numero
+    ON HABITACION (id_hotel, numero_habitacion);
@@ -0,0 +1,113 @@
+-- Eventos de ocupación para GET /eventos (routes/eventos.py)
+-- Los triggers registran cada cambio en EVENTO (para reanudar desde un
+-- Last-Event-ID) y lo publican con NOTIFY en el canal 'eventos'.
+--
+-- id_evento se asigna al insertar, no al confirmar: una transacción puede
+-- confirmar eventos con IDs menores que otros ya enviados. Por eso el ID que
+-- reciben los clientes es un cursor "marca-xid-id_evento" (utils/eventos.py):
+-- la marca es el xmin del snapshot del trigger (acotado por su propio xid),
+-- y toda transacción anterior a ella ya había terminado cuando el evento se
+-- confirmó, así que el cliente que lo recibió en vivo ya tiene sus eventos.
+
+CREATE TABLE IF NOT EXISTS EVENTO (
+    id_evento BIGSERIAL PRIMARY KEY,
+    id_hotel  INTEGER,
+    tipo      VARCHAR(30) NOT NULL,
+    datos     JSONB NOT NULL,
+    fecha     TIMESTAMP NOT NULL DEFAULT NOW(),
+    xid       XID8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+CREATE INDEX IF NOT EXISTS idx_evento_hotel ON EVENTO (id_hotel, id_evento);
+CREATE INDEX IF NOT EXISTS idx_evento_cursor ON EVENTO (xid, id_evento);
+
+CREATE OR REPLACE FUNCTION publicar_evento(p_id_hotel INTEGER, p_tipo TEXT, p_datos JSONB) RETURNS VOID AS $$
+DECLARE
+    v_id BIGINT;
+    v_fecha TIMESTAMP;
+    v_xid XID8;
+    v_marca XID8;
+BEGIN
+    INSERT INTO EVENTO (id_hotel, tipo, datos)
+    VALUES (p_id_hotel, p_tipo, p_datos)
+    RETURNING id_evento, fecha, xid INTO v_id, v_fecha, v_xid;
+
+    v_marca := LEAST(pg_snapshot_xmin(pg_current_snapshot()), v_xid);
+    PERFORM pg_notify('eventos', json_build_object(
+        'id', v_id, 'cursor', v_marca || '-' || v_xid || '-' || v_id,
+        'id_hotel', p_id_hotel, 'tipo', p_tipo, 'datos', p_datos, 'fecha', v_fecha
+    )::TEXT);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Cambios de ocupación de habitaciones
+CREATE OR REPLACE FUNCTION evento_habitacion() RETURNS trigger AS $$
+BEGIN
+    PERFORM publicar_evento(NEW.id_hotel, 'habitacion', jsonb_build_object(
+        'id_habitacion', NEW.id_habitacion,
+        'numero_habitacion', NEW.numero_habitacion,
+        'ocupado', NEW.ocupado
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_evento_habitacion ON HABITACION;
+CREATE TRIGGER trg_evento_habitacion
+    AFTER UPDATE OF ocupado ON HABITACION
+    FOR EACH ROW WHEN (OLD.ocupado IS DISTINCT FROM NEW.ocupado)
+    EXECUTE FUNCTION evento_habitacion();
+
+-- Check-in y checkout
+CREATE OR REPLACE FUNCTION evento_registro_hospedaje() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND (NEW.fecha_checkout IS NULL OR NEW.fecha_checkout IS NOT DISTINCT FROM OLD.fecha_checkout) THEN
+        RETURN NULL;
+    END IF;
+    PERFORM publicar_evento(
+        (SELECT id_hotel FROM HABITACION WHERE id_habitacion = NEW.id_habitacion),
+        CASE WHEN TG_OP = 'INSERT' THEN 'checkin' ELSE 'checkout' END,
+        jsonb_build_object(
+            'id_registro', NEW.id_registro,
+            'id_reserva', NEW.id_reserva,
+            'id_habitacion', NEW.id_habitacion,
+            'fecha_checkout', NEW.fecha_checkout
+        )
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_evento_registro_hospedaje ON REGISTRO_HOSPEDAJE;
+CREATE TRIGGER trg_evento_registro_hospedaje
+    AFTER INSERT OR UPDATE OF fecha_checkout ON REGISTRO_HOSPEDAJE
+    FOR EACH ROW EXECUTE FUNCTION evento_registro_hospedaje();
+
+-- Cambios de estado de reservas (un evento por hotel de la reserva)
+CREATE OR REPLACE FUNCTION evento_estado_reserva() RETURNS trigger AS $$
+DECLARE
+    v_hoteles INTEGER[];
+    v_hotel INTEGER;
+BEGIN
+    SELECT array_agg(DISTINCT ha.id_hotel) INTO v_hoteles
+    FROM HABITACION_RESERVA hr
+    INNER JOIN HABITACION ha ON hr.id_habitacion = ha.id_habitacion
+    WHERE hr.id_reserva = NEW.id_reserva;
+
+    FOREACH v_hotel IN ARRAY COALESCE(v_hoteles, ARRAY[NULL::INTEGER]) LOOP
+        PERFORM publicar_evento(v_hotel, 'estado_reserva', jsonb_build_object(
+            'id_reserva', NEW.id_reserva,
+            'estado', NEW.estado
+        ));
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_evento_estado_reserva ON ESTADO_RESERVA;
+CREATE TRIGGER trg_evento_estado_reserva
+    AFTER INSERT ON ESTADO_RESERVA
+    FOR EACH ROW EXECUTE FUNCTION evento_estado_reserva();
+
+-- Los clientes solo pueden reanudar dentro de la retención; purgar periódicamente, por ejemplo:
+-- DELETE FROM EVENTO WHERE fecha < NOW() - INTERVAL '1 day';
@@ -0,0 +1,76 @@
+-- Registro de cambios para GET /sync (routes/sync.py)
+-- Triggers por sentencia con tablas de transición: una sola inserción en
+-- REGISTRO_CAMBIO por sentencia, también para las escrituras masivas.
+-- xid identifica la transacción: /sync solo entrega cambios de transacciones
+-- anteriores a la más antigua en curso, así ningún cursor salta un cambio.
+
+CREATE TABLE IF NOT EXISTS REGISTRO_CAMBIO (
+    id_cambio BIGSERIAL PRIMARY KEY,
+    xid       XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    tabla     VARCHAR(63) NOT NULL,
+    clave     TEXT NOT NULL,
+    operacion CHAR(1) NOT NULL,  -- I, U o D
+    fecha     TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_registro_cambio_cursor ON REGISTRO_CAMBIO (xid, id_cambio);
+
+-- TG_ARGV[0]: columna clave de la tabla
+CREATE OR REPLACE FUNCTION registrar_cambios() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO REGISTRO_CAMBIO (tabla, clave, operacion)
+        SELECT TG_TABLE_NAME, to_jsonb(n) ->> TG_ARGV[0], 'I' FROM nuevas n;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO REGISTRO_CAMBIO (tabla, clave, operacion)
+        SELECT TG_TABLE_NAME, to_jsonb(n) ->> TG_ARGV[0], 'U' FROM nuevas n
+        UNION ALL
+        -- Si cambió la clave, la anterior deja de existir
+        SELECT TG_TABLE_NAME, to_jsonb(v) ->> TG_ARGV[0], 'D' FROM viejas v
+        WHERE NOT EXISTS (
+            SELECT 1 FROM nuevas n WHERE to_jsonb(n) ->> TG_ARGV[0] = to_jsonb(v) ->> TG_ARGV[0]
+        );
+    ELSE
+        INSERT INTO REGISTRO_CAMBIO (tabla, clave, operacion)
+        SELECT TG_TABLE_NAME, to_jsonb(v) ->> TG_ARGV[0], 'D' FROM viejas v;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT[];
+BEGIN
+    FOREACH t SLICE 1 IN ARRAY ARRAY[
+        ['hotel', 'id_hotel'],
+        ['habitacion', 'id_habitacion'],
+        ['huesped', 'numero_id'],
+        ['reserva', 'id_reserva'],
+        ['estado_reserva', 'id_estado'],
+        ['registro_hospedaje', 'id_registro']
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_cambios_i_%1$s ON %1$I', t[1]);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_cambios_u_%1$s ON %1$I', t[1]);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_cambios_d_%1$s ON %1$I', t[1]);
+        EXECUTE format(
+            'CREATE TRIGGER trg_cambios_i_%1$s AFTER INSERT ON %1$I '
+            'REFERENCING NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION registrar_cambios(%2$L)',
+            t[1], t[2]
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_cambios_u_%1$s AFTER UPDATE ON %1$I '
+            'REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION registrar_cambios(%2$L)',
+            t[1], t[2]
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_cambios_d_%1$s AFTER DELETE ON %1$I '
+            'REFERENCING OLD TABLE AS viejas FOR EACH STATEMENT EXECUTE FUNCTION registrar_cambios(%2$L)',
+            t[1], t[2]
+        );
+    END LOOP;
+END;
+$$;
+
+-- Los clientes con un cursor anterior a la retención deben descargar todo de nuevo, por ejemplo:
+-- DELETE FROM REGISTRO_CAMBIO WHERE fecha < NOW() - INTERVAL '30 days';
@@ -0,0 +1,153 @@
+-- Particionado mensual de ESTADO_RESERVA y REGISTRO_HOSPEDAJE
+--
+-- ESTADO_RESERVA se particiona por fecha_estado (columna nueva; a los estados
+-- existentes se les asigna la fecha_reserva de su reserva).
+-- REGISTRO_HOSPEDAJE se particiona por fecha_hora_checkin, que no cambia: el
+-- checkout es un UPDATE dentro de la misma partición (con una clave que se
+-- actualiza, Postgres movería la fila con DELETE + INSERT y los triggers AFTER
+-- UPDATE no se dispararían). Los hospedajes activos se leen con el índice
+-- parcial idx_registro_hospedaje_activos: el filtro "fecha_checkout IS NULL"
+-- no poda particiones, recorre ese índice en cada una.
+--
+-- Los triggers de la tabla original (001, 004, 005, 007) se copian a la
+-- particionada después de cargar los datos, así la carga no genera eventos.
+-- Particiones futuras: crear_particiones_futuras() (al iniciar la API y en
+-- scripts/archivar_particiones.py, que además separa las antiguas).
+
+-- Crea (si faltan) las particiones mensuales de p_tabla desde el mes de p_desde.
+-- Si hay partición DEFAULT, primero mueve a la nueva las filas de su rango.
+CREATE OR REPLACE FUNCTION crear_particiones_mes(p_tabla TEXT, p_desde DATE, p_meses INTEGER) RETURNS VOID AS $$
+DECLARE
+    v_columna TEXT;
+    v_default REGCLASS;
+    v_inicio DATE;
+    v_fin DATE;
+    v_nombre TEXT;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('crear_particiones_mes'));
+
+    SELECT a.attname, NULLIF(p.partdefid, 0)::REGCLASS INTO v_columna, v_default
+    FROM pg_partitioned_table p
+    INNER JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+    WHERE p.partrelid = p_tabla::REGCLASS;
+
+    FOR i IN 0 .. p_meses - 1 LOOP
+        v_inicio := date_trunc('month', p_desde) + make_interval(months => i);
+        v_fin := v_inicio + INTERVAL '1 month';
+        v_nombre := lower(p_tabla) || '_p' || to_char(v_inicio, 'YYYYMM');
+        CONTINUE WHEN to_regclass(v_nombre) IS NOT NULL;
+
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_nombre, p_tabla);
+        IF v_default IS NOT NULL THEN
+            EXECUTE format(
+                'WITH movidas AS (DELETE FROM %s WHERE %I >= %L AND %I < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM movidas',
+                v_default, v_columna, v_inicio, v_columna, v_fin, v_nombre
+            );
+        END IF;
+        EXECUTE format(
+            'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            p_tabla, v_nombre, v_inicio, v_fin
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recrea en p_destino los triggers de usuario de p_origen (antes de borrarla).
+-- En una tabla particionada solo se copian los del padre, no sus clones.
+CREATE OR REPLACE FUNCTION copiar_triggers(p_origen REGCLASS, p_destino REGCLASS) RETURNS VOID AS $$
+DECLARE
+    v_definicion TEXT;
+BEGIN
+    FOR v_definicion IN
+        SELECT pg_get_triggerdef(oid, true) FROM pg_trigger
+        WHERE tgrelid = p_origen AND NOT tgisinternal AND tgparentid = 0
+        ORDER BY tgname
+    LOOP
+        EXECUTE replace(v_definicion, ' ON ' || p_origen::TEXT || ' ', ' ON ' || p_destino::TEXT || ' ');
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mes actual y los p_meses siguientes de ambas tablas
+CREATE OR REPLACE FUNCTION crear_particiones_futuras(p_meses INTEGER DEFAULT 3) RETURNS VOID AS $$
+BEGIN
+    PERFORM crear_particiones_mes('estado_reserva', CURRENT_DATE, p_meses + 1);
+    PERFORM crear_particiones_mes('registro_hospedaje', CURRENT_DATE, p_meses + 1);
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    v_desde DATE;
+    v_meses INTEGER;
+BEGIN
+    -- ESTADO_RESERVA
+    IF NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'estado_reserva'::REGCLASS) THEN
+        ALTER TABLE ESTADO_RESERVA RENAME TO estado_reserva_sin_particion;
+        ALTER TABLE estado_reserva_sin_particion ADD COLUMN IF NOT EXISTS fecha_estado TIMESTAMP;
+        UPDATE estado_reserva_sin_particion e SET fecha_estado = r.fecha_reserva
+        FROM RESERVA r WHERE r.id_reserva = e.id_reserva AND e.fecha_estado IS NULL;
+        UPDATE estado_reserva_sin_particion SET fecha_estado = NOW() WHERE fecha_estado IS NULL;
+
+        CREATE TABLE ESTADO_RESERVA (LIKE estado_reserva_sin_particion INCLUDING DEFAULTS)
+            PARTITION BY RANGE (fecha_estado);
+        ALTER TABLE ESTADO_RESERVA ALTER COLUMN fecha_estado SET DEFAULT NOW();
+        ALTER TABLE ESTADO_RESERVA ALTER COLUMN fecha_estado SET NOT NULL;
+        ALTER TABLE ESTADO_RESERVA ADD PRIMARY KEY (id_estado, fecha_estado);
+        ALTER TABLE ESTADO_RESERVA ADD FOREIGN KEY (id_reserva) REFERENCES RESERVA (id_reserva);
+        -- Último estado de una reserva: recorrido ordenado desde la partición más reciente
+        CREATE INDEX idx_estado_reserva_ultimo ON ESTADO_RESERVA (id_reserva, fecha_estado DESC, id_estado DESC);
+        -- Respaldo por si faltara la partición de un mes; crear_particiones_mes mueve sus filas
+        CREATE TABLE estado_reserva_default PARTITION OF ESTADO_RESERVA DEFAULT;
+        EXECUTE format(
+            'ALTER SEQUENCE %s OWNED BY estado_reserva.id_estado',
+            pg_get_serial_sequence('estado_reserva_sin_particion', 'id_estado')
+        );
+
+        SELECT COALESCE(MIN(fecha_estado)::DATE, CURRENT_DATE) INTO v_desde FROM estado_reserva_sin_particion;
+        v_meses := (EXTRACT(YEAR FROM age(date_trunc('month', CURRENT_DATE), date_trunc('month', v_desde))) * 12
+                  + EXTRACT(MONTH FROM age(date_trunc('month', CURRENT_DATE), date_trunc('month', v_desde))))::INTEGER + 4;
+        PERFORM crear_particiones_mes('estado_reserva', v_desde, v_meses);
+
+        INSERT INTO ESTADO_RESERVA SELECT * FROM estado_reserva_sin_particion;
+        PERFORM copiar_triggers('estado_reserva_sin_particion', 'estado_reserva');
+        DROP TABLE estado_reserva_sin_particion;
+    END IF;
+
+    -- REGISTRO_HOSPEDAJE
+    IF NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'registro_hospedaje'::REGCLASS) THEN
+        ALTER TABLE REGISTRO_HOSPEDAJE RENAME TO registro_hospedaje_sin_particion;
+        UPDATE registro_hospedaje_sin_particion
+        SET fecha_hora_checkin = COALESCE(fecha_checkout::TIMESTAMP, NOW())
+        WHERE fecha_hora_checkin IS NULL;
+
+        CREATE TABLE REGISTRO_HOSPEDAJE (LIKE registro_hospedaje_sin_particion INCLUDING DEFAULTS)
+            PARTITION BY RANGE (fecha_hora_checkin);
+        ALTER TABLE REGISTRO_HOSPEDAJE ALTER COLUMN fecha_hora_checkin SET NOT NULL;
+        ALTER TABLE REGISTRO_HOSPEDAJE ADD PRIMARY KEY (id_registro, fecha_hora_checkin);
+        ALTER TABLE REGISTRO_HOSPEDAJE ADD FOREIGN KEY (id_reserva) REFERENCES RESERVA (id_reserva);
+        ALTER TABLE REGISTRO_HOSPEDAJE ADD FOREIGN KEY (id_huesped) REFERENCES HUESPED (numero_id);
+        ALTER TABLE REGISTRO_HOSPEDAJE ADD FOREIGN KEY (id_habitacion) REFERENCES HABITACION (id_habitacion);
+        CREATE INDEX idx_registro_hospedaje_reserva ON REGISTRO_HOSPEDAJE (id_reserva);
+        -- Hospedajes activos (fecha_checkout NULL): pocas filas por partición
+        CREATE INDEX idx_registro_hospedaje_activos ON REGISTRO_HOSPEDAJE (id_habitacion)
+            WHERE fecha_checkout IS NULL;
+        -- Respaldo por si faltara la partición de un mes; crear_particiones_mes mueve sus filas
+        CREATE TABLE registro_hospedaje_default PARTITION OF REGISTRO_HOSPEDAJE DEFAULT;
+        EXECUTE format(
+            'ALTER SEQUENCE %s OWNED BY registro_hospedaje.id_registro',
+            pg_get_serial_sequence('registro_hospedaje_sin_particion', 'id_registro')
+        );
+
+        SELECT COALESCE(MIN(fecha_hora_checkin)::DATE, CURRENT_DATE) INTO v_desde FROM registro_hospedaje_sin_particion;
+        v_meses := (EXTRACT(YEAR FROM age(date_trunc('month', CURRENT_DATE), date_trunc('month', v_desde))) * 12
+                  + EXTRACT(MONTH FROM age(date_trunc('month', CURRENT_DATE), date_trunc('month', v_desde))))::INTEGER + 4;
+        PERFORM crear_particiones_mes('registro_hospedaje', v_desde, v_meses);
+
+        INSERT INTO REGISTRO_HOSPEDAJE SELECT * FROM registro_hospedaje_sin_particion;
+        PERFORM copiar_triggers('registro_hospedaje_sin_particion', 'registro_hospedaje');
+        DROP TABLE registro_hospedaje_sin_particion;
+    END IF;
+END;
+$$;
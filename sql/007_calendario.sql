@@ -0,0 +1,62 @@
+-- Avisos para mantener los calendarios en memoria de GET /hoteles/{id}/calendario
+-- (utils/calendario.py). Un NOTIFY por sentencia en el canal 'calendario' con
+-- las habitaciones afectadas por hotel: {"<id_hotel>": [id_habitacion, ...]}.
+-- Si no cabe en el payload se envía {"<id_hotel>": null} (reconstruir el hotel).
+
+CREATE OR REPLACE FUNCTION notificar_calendario() RETURNS trigger AS $$
+DECLARE
+    v_habitaciones INTEGER[];
+    v_payload TEXT;
+BEGIN
+    IF TG_TABLE_NAME = 'estado_reserva' THEN
+        SELECT array_agg(DISTINCT hr.id_habitacion) INTO v_habitaciones
+        FROM nuevas n
+        INNER JOIN HABITACION_RESERVA hr ON hr.id_reserva = n.id_reserva;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT v.id_habitacion) INTO v_habitaciones FROM viejas v;
+    ELSE
+        SELECT array_agg(DISTINCT n.id_habitacion) INTO v_habitaciones FROM nuevas n;
+    END IF;
+
+    IF v_habitaciones IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT json_object_agg(id_hotel, habitaciones)::TEXT INTO v_payload
+    FROM (
+        SELECT id_hotel, json_agg(id_habitacion) AS habitaciones
+        FROM HABITACION WHERE id_habitacion = ANY(v_habitaciones)
+        GROUP BY id_hotel
+    ) x;
+
+    IF length(v_payload) > 7900 THEN
+        SELECT json_object_agg(id_hotel, NULL)::TEXT INTO v_payload
+        FROM (SELECT DISTINCT id_hotel FROM HABITACION WHERE id_habitacion = ANY(v_habitaciones)) x;
+    END IF;
+
+    IF v_payload IS NOT NULL THEN
+        PERFORM pg_notify('calendario', v_payload);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_calendario_i_habitacion_reserva ON HABITACION_RESERVA;
+CREATE TRIGGER trg_calendario_i_habitacion_reserva AFTER INSERT ON HABITACION_RESERVA
+    REFERENCING NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION notificar_calendario();
+
+DROP TRIGGER IF EXISTS trg_calendario_d_habitacion_reserva ON HABITACION_RESERVA;
+CREATE TRIGGER trg_calendario_d_habitacion_reserva AFTER DELETE ON HABITACION_RESERVA
+    REFERENCING OLD TABLE AS viejas FOR EACH STATEMENT EXECUTE FUNCTION notificar_calendario();
+
+DROP TRIGGER IF EXISTS trg_calendario_i_estado_reserva ON ESTADO_RESERVA;
+CREATE TRIGGER trg_calendario_i_estado_reserva AFTER INSERT ON ESTADO_RESERVA
+    REFERENCING NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION notificar_calendario();
+
+DROP TRIGGER IF EXISTS trg_calendario_i_registro_hospedaje ON REGISTRO_HOSPEDAJE;
+CREATE TRIGGER trg_calendario_i_registro_hospedaje AFTER INSERT ON REGISTRO_HOSPEDAJE
+    REFERENCING NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION notificar_calendario();
+
+DROP TRIGGER IF EXISTS trg_calendario_u_registro_hospedaje ON REGISTRO_HOSPEDAJE;
+CREATE TRIGGER trg_calendario_u_registro_hospedaje AFTER UPDATE ON REGISTRO_HOSPEDAJE
+    REFERENCING NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION notificar_calendario();
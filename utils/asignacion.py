@@ -0,0 +1,99 @@
+"""
+Asignación de habitaciones para reservas de grupo.
+
+Se elige el conjunto de habitaciones libres cuya capacidad cubre la cantidad
+de personas con el menor costo total: valor de las noches más una
+penalización por los huecos cortos que la estadía deja en el calendario de
+cada habitación (noches sueltas difíciles de vender).
+
+Las habitaciones de un mismo tipo solo difieren en su penalización, así que
+una solución óptima usa las k más baratas de cada tipo; basta considerar
+ceil(personas / capacidad) por tipo y resolver un knapsack 0/1 de cobertura
+por programación dinámica sobre las personas cubiertas. El resultado es
+exacto y el costo es O(candidatas_recortadas * personas).
+"""
+import math
+from itertools import combinations
+
+HUECO_MAXIMO_PENALIZADO = 2  # Noches: un hueco de 1 o 2 noches se considera difícil de vender
+FACTOR_HUECO = 0.5  # Fracción del valor de esas noches que se cuenta como costo
+RECARGO_NO_PREFERIDO = 0.25  # Recargo relativo sobre los tipos no preferidos
+
+
+def penalizacion_fragmentacion(inicio, fin, ocupaciones, valor_noche: float) -> float:
+    """
+    Costo de los huecos cortos que deja la estadía [inicio, fin) entre las
+    ocupaciones (inicio, fin) vecinas de la habitación.
+    """
+    antes = [o_fin for o_inicio, o_fin in ocupaciones if o_fin <= inicio]
+    despues = [o_inicio for o_inicio, o_fin in ocupaciones if o_inicio >= fin]
+    penalizacion = 0.0
+    for hueco in (
+        (inicio - max(antes)).days if antes else None,
+        (min(despues) - fin).days if despues else None,
+    ):
+        if hueco is not None and 0 < hueco <= HUECO_MAXIMO_PENALIZADO:
+            penalizacion += hueco * valor_noche * FACTOR_HUECO
+    return penalizacion
+
+
+def _recortar_por_tipo(candidatas: list, personas: int) -> list:
+    """Quedarse con las ceil(personas / capacidad) habitaciones más baratas de cada tipo"""
+    por_tipo = {}
+    for candidata in candidatas:
+        por_tipo.setdefault(candidata["id_tipo"], []).append(candidata)
+    recortadas = []
+    for grupo in por_tipo.values():
+        capacidad = grupo[0]["capacidad"]
+        if capacidad <= 0:
+            continue
+        grupo.sort(key=lambda c: (c["costo"], c["numero_habitacion"]))
+        recortadas += grupo[:math.ceil(personas / capacidad)]
+    return recortadas
+
+
+def asignar_habitaciones(candidatas: list, personas: int):
+    """
+    Elegir habitaciones que sumen al menos ``personas`` de capacidad con costo mínimo.
+
+    Cada candidata es un dict con id_tipo, capacidad, costo y numero_habitacion.
+    Devuelve la lista elegida o None si la capacidad disponible no alcanza.
+    """
+    items = _recortar_por_tipo(candidatas, personas)
+    if sum(c["capacidad"] for c in items) < personas:
+        return None
+
+    infinito = float("inf")
+    costo = [0.0] + [infinito] * personas  # costo[p]: mínimo para cubrir p personas (tope en personas)
+    origen = []
+    for item in items:
+        tomar = {}
+        for p in range(personas, -1, -1):
+            if costo[p] == infinito:
+                continue
+            q = min(personas, p + item["capacidad"])
+            if q != p and costo[p] + item["costo"] < costo[q]:
+                costo[q] = costo[p] + item["costo"]
+                tomar[q] = p
+        origen.append(tomar)
+
+    elegidas = []
+    q = personas
+    for indice in range(len(items) - 1, -1, -1):
+        if q in origen[indice]:
+            elegidas.append(items[indice])
+            q = origen[indice][q]
+    return elegidas
+
+
+def asignar_fuerza_bruta(candidatas: list, personas: int):
+    """Óptimo por enumeración de subconjuntos (solo para comparar en casos chicos)"""
+    mejor, mejor_costo = None, float("inf")
+    for tamano in range(1, len(candidatas) + 1):
+        for combinacion in combinations(candidatas, tamano):
+            if sum(c["capacidad"] for c in combinacion) < personas:
+                continue
+            total = sum(c["costo"] for c in combinacion)
+            if total < mejor_costo:
+                mejor, mejor_costo = list(combinacion), total
+    return mejor
@@ -0,0 +1,148 @@
+"""
+Caché LRU de identidad de huéspedes (numero_id → tipo_id, nombre).
+
+La usan las rutas de registro de hospedaje para verificar que el huésped
+existe y calcular ``es_menor_edad`` sin consultar HUESPED en cada check-in.
+Está acotada en bytes y se invalida desde las rutas que modifican huéspedes;
+la invalidación se publica con NOTIFY para que la apliquen todos los workers.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+from config import CACHE_HUESPEDES_MAX_BYTES
+from utils.notificaciones import escucha
+
+CANAL_INVALIDACION = "cache_huespedes"
+INVALIDAR_TODOS = "*"
+BYTES_BASE_ENTRADA = 200  # Estimación del costo fijo de cada entrada (nodo, tupla, dict)
+
+
+class CacheLRU:
+    """LRU segura entre hilos con límite de tamaño en bytes y métricas de aciertos"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entradas = OrderedDict()
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+        self.generacion = 0  # Aumenta con cada invalidación (haya o no entrada)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _tamano(clave, valor) -> int:
+        return BYTES_BASE_ENTRADA + sys.getsizeof(clave) + sum(sys.getsizeof(v) for v in valor.values())
+
+    def obtener(self, clave):
+        with self.lock:
+            entrada = self.entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self.entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave, valor, generacion: int = None):
+        """
+        Guardar ``valor``; con ``generacion`` (leída antes de consultar la base de
+        datos) no se guarda si hubo invalidaciones después: el valor puede ser viejo.
+        """
+        tamano = self._tamano(clave, valor)
+        if tamano > self.max_bytes:
+            return
+        with self.lock:
+            if generacion is not None and generacion != self.generacion:
+                return
+            anterior = self.entradas.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= anterior[1]
+            self.entradas[clave] = (valor, tamano)
+            self.bytes += tamano
+            while self.bytes > self.max_bytes:
+                _, (_, liberado) = self.entradas.popitem(last=False)
+                self.bytes -= liberado
+                self.desalojos += 1
+
+    def invalidar(self, clave):
+        with self.lock:
+            self.generacion += 1
+            entrada = self.entradas.pop(clave, None)
+            if entrada is not None:
+                self.bytes -= entrada[1]
+                self.invalidaciones += 1
+
+    def limpiar(self):
+        with self.lock:
+            self.generacion += 1
+            self.invalidaciones += len(self.entradas)
+            self.entradas.clear()
+            self.bytes = 0
+
+    def metricas(self) -> dict:
+        with self.lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self.entradas),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+                "desalojos": self.desalojos,
+                "invalidaciones": self.invalidaciones
+            }
+
+
+cache_huespedes = CacheLRU(CACHE_HUESPEDES_MAX_BYTES)
+
+
+def obtener_identidad_huesped(db, numero_id: str):
+    """Obtener {"tipo_id", "nombre"} del huésped desde la caché o HUESPED; None si no existe"""
+    identidad = cache_huespedes.obtener(numero_id)
+    if identidad is not None:
+        return identidad
+
+    # Si se invalida algo mientras se consulta, la fila leída puede ser anterior al cambio
+    generacion = cache_huespedes.generacion
+    query = "SELECT tipo_id, nombre FROM HUESPED WHERE numero_id = :numero_id"
+    row = db.execute(text(query), {"numero_id": numero_id}).fetchone()
+    if not row:
+        return None
+    identidad = {"tipo_id": row[0], "nombre": row[1]}
+    cache_huespedes.guardar(numero_id, identidad, generacion)
+    return identidad
+
+
+def invalidar_huesped(db, numero_id: str = INVALIDAR_TODOS):
+    """
+    Invalidar un huésped (o todos) en este worker y publicar la invalidación.
+
+    El NOTIFY va en la transacción de ``db``: los demás workers lo reciben al
+    hacer commit, y este vuelve a invalidar al recibir su propio mensaje para
+    descartar lecturas hechas antes del commit.
+    """
+    invalidar_local(numero_id)
+    db.execute(text("SELECT pg_notify(:canal, :numero_id)"), {"canal": CANAL_INVALIDACION, "numero_id": numero_id})
+
+
+def expresion_invalidacion(columna: str) -> str:
+    """Expresión SQL que publica la invalidación del huésped de ``columna`` dentro de la sentencia que escribe"""
+    return f"pg_notify('{CANAL_INVALIDACION}', {columna})"
+
+
+def invalidar_local(numero_id: str):
+    """Invalidar un huésped (o todos) solo en este worker"""
+    if numero_id == INVALIDAR_TODOS:
+        cache_huespedes.limpiar()
+    else:
+        cache_huespedes.invalidar(numero_id)
+
+
+# Sin conexión de escucha se pudieron perder invalidaciones: se vacía la caché
+escucha.suscribir(CANAL_INVALIDACION, invalidar_local, al_reconectar=cache_huespedes.limpiar)
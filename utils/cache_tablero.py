@@ -0,0 +1,94 @@
+"""
+Caché de corta duración del tablero de recepción por hotel.
+
+Cada tablero se reutiliza unos segundos (TABLERO_TTL_SEGUNDOS) y se invalida
+antes si hay check-in, checkout o reservas del hotel creadas, importadas,
+eliminadas o con cambio de estado;
+la invalidación se publica con NOTIFY para todos los workers.
+"""
+import threading
+import time
+
+from sqlalchemy import text
+
+from config import TABLERO_TTL_SEGUNDOS
+from utils.notificaciones import escucha
+
+CANAL_INVALIDACION = "cache_tablero"
+
+
+class CacheTTL:
+    """Diccionario seguro entre hilos cuyas entradas vencen tras ``ttl`` segundos"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.entradas = {}
+        self.lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self.lock:
+            entrada = self.entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada[1] <= time.monotonic():
+                del self.entradas[clave]
+                return None
+            return entrada[0]
+
+    def guardar(self, clave, valor):
+        with self.lock:
+            self.entradas[clave] = (valor, time.monotonic() + self.ttl)
+
+    def invalidar(self, clave):
+        with self.lock:
+            self.entradas.pop(clave, None)
+
+    def limpiar(self):
+        with self.lock:
+            self.entradas.clear()
+
+
+cache_tablero = CacheTTL(TABLERO_TTL_SEGUNDOS)
+
+
+def sql_invalidacion(query_hoteles: str) -> str:
+    """
+    SELECT que publica con NOTIFY la invalidación de los hoteles que devuelve
+    ``query_hoteles`` (columna id_hotel) y los devuelve; puede ir como CTE de
+    la sentencia que escribe.
+    """
+    return f"SELECT DISTINCT id_hotel, pg_notify('{CANAL_INVALIDACION}', id_hotel::TEXT) FROM ({query_hoteles}) h"
+
+
+def invalidar_tableros(db, query_hoteles: str, params: dict, ejecucion=None):
+    """
+    Invalidar los tableros de los hoteles que devuelve ``query_hoteles`` (columna id_hotel).
+
+    El NOTIFY se envía en la misma transacción que la escritura. Con
+    ``ejecucion`` (utils.pipeline.Ejecucion) la sentencia se encola en ese bloque.
+    """
+    query = sql_invalidacion(query_hoteles)
+    if ejecucion is not None:
+        ejecucion.ejecutar(text(query), params, al_recibir=_invalidar_filas)
+    else:
+        _invalidar_filas(db.execute(text(query), params).fetchall())
+
+
+def invalidar_locales(ids_hoteles) -> None:
+    """Invalidar en este worker los tableros ya publicados con sql_invalidacion"""
+    for id_hotel in ids_hoteles:
+        cache_tablero.invalidar(id_hotel)
+
+
+def _invalidar_filas(filas):
+    invalidar_locales(row[0] for row in filas)
+
+
+def _aplicar_invalidacion(payload: str):
+    try:
+        cache_tablero.invalidar(int(payload))
+    except ValueError:
+        cache_tablero.limpiar()
+
+
+escucha.suscribir(CANAL_INVALIDACION, _aplicar_invalidacion, al_reconectar=cache_tablero.limpiar)
@@ -0,0 +1,242 @@
+"""
+Calendario de ocupación por hotel (habitación × día) mantenido en memoria.
+
+Cada worker guarda por hotel dos matrices booleanas de NumPy (reservada y
+hospedada) que cubren una ventana fija alrededor de hoy. Las escrituras de
+reservas y hospedajes publican con NOTIFY las habitaciones afectadas (ver
+sql/007_calendario.sql) y en la siguiente consulta solo se recalculan esas
+filas. Si cambia el conjunto de habitaciones del hotel (VERSION_TABLA), cambia
+el día o se reconecta la escucha, el calendario se reconstruye completo.
+"""
+import json
+import struct
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import text
+
+from config import CALENDARIO_DIAS_ADELANTE, CALENDARIO_DIAS_ATRAS
+from routes.reservas import QUERY_ULTIMO_ESTADO
+from utils.notificaciones import escucha
+
+CANAL_CALENDARIO = "calendario"
+ESTADOS_SIN_OCUPACION = ["Cancelada", "No Presentada"]
+
+# Códigos de cada celda en la salida (la estancia prevalece sobre la reserva)
+LIBRE, RESERVADA, HOSPEDADA = 0, 1, 2
+
+QUERY_HABITACIONES = """
+SELECT id_habitacion, numero_habitacion FROM HABITACION
+WHERE id_hotel = :id_hotel ORDER BY numero_habitacion, id_habitacion
+"""
+
+QUERY_RESERVAS = f"""
+SELECT hr.id_habitacion, r.fecha_inicio, r.fecha_fin
+FROM HABITACION_RESERVA hr
+INNER JOIN RESERVA r ON hr.id_reserva = r.id_reserva
+WHERE hr.id_habitacion = ANY(:habitaciones)
+AND r.fecha_inicio < :hasta AND r.fecha_fin > :desde
+AND COALESCE(({QUERY_ULTIMO_ESTADO}), '') <> ALL(:sin_ocupacion)
+"""
+
+# Una estancia activa ocupa hasta el fin de su reserva (o al menos hoy)
+QUERY_ESTANCIAS = """
+SELECT rh.id_habitacion, rh.fecha_hora_checkin::DATE,
+       COALESCE(rh.fecha_checkout, GREATEST(r.fecha_fin, CURRENT_DATE + 1))
+FROM REGISTRO_HOSPEDAJE rh
+LEFT JOIN RESERVA r ON rh.id_reserva = r.id_reserva
+WHERE rh.id_habitacion = ANY(:habitaciones)
+AND rh.fecha_hora_checkin < :hasta
+AND (rh.fecha_checkout IS NULL OR rh.fecha_checkout > :desde)
+"""
+
+
+class CalendarioHotel:
+    """Matrices de ocupación de un hotel para los días [origen, origen + dias)"""
+
+    def __init__(self, id_hotel: int, origen: date, dias: int, habitaciones, version_habitaciones: int):
+        self.id_hotel = id_hotel
+        self.origen = origen
+        self.dias = dias
+        self.version_habitaciones = version_habitaciones
+        self.ids = np.array([h[0] for h in habitaciones], dtype=np.int64)
+        self.numeros = np.array([h[1] for h in habitaciones], dtype=np.int64)
+        self.indice = {int(id_habitacion): fila for fila, id_habitacion in enumerate(self.ids)}
+        self.reservada = np.zeros((len(self.ids), dias), dtype=bool)
+        self.hospedada = np.zeros((len(self.ids), dias), dtype=bool)
+        self.lock = threading.Lock()
+        self.listo = threading.Event()  # Carga inicial terminada (con o sin éxito)
+        self.completo = False
+
+    @property
+    def fin(self) -> date:
+        return self.origen + timedelta(days=self.dias)
+
+    def cubre(self, desde: date, hasta: date) -> bool:
+        return self.origen <= desde and hasta < self.fin
+
+    def cargar(self, db, ids_habitaciones) -> None:
+        """(Re)calcular las filas de las habitaciones indicadas desde la base de datos"""
+        filas = [self.indice[i] for i in ids_habitaciones if i in self.indice]
+        if not filas:
+            return
+        params = {
+            "habitaciones": [int(self.ids[f]) for f in filas],
+            "desde": self.origen,
+            "hasta": self.fin,
+        }
+        reservas = db.execute(
+            text(QUERY_RESERVAS), {**params, "sin_ocupacion": ESTADOS_SIN_OCUPACION}
+        ).fetchall()
+        estancias = db.execute(text(QUERY_ESTANCIAS), params).fetchall()
+        with self.lock:
+            self.reservada[filas] = False
+            self.hospedada[filas] = False
+            self._marcar(self.reservada, reservas)
+            self._marcar(self.hospedada, estancias)
+
+    def _marcar(self, matriz, intervalos) -> None:
+        for id_habitacion, inicio, fin in intervalos:
+            a = max((inicio - self.origen).days, 0)
+            b = min((fin - self.origen).days, self.dias)
+            if a < b:
+                matriz[self.indice[id_habitacion], a:b] = True
+
+    def recorte(self, desde: date, hasta: date):
+        """Copia de las matrices (reservada, hospedada) para los días [desde, hasta]"""
+        a = (desde - self.origen).days
+        b = (hasta - self.origen).days + 1
+        with self.lock:
+            return self.reservada[:, a:b].copy(), self.hospedada[:, a:b].copy()
+
+
+class CacheCalendarios:
+    """Calendarios por hotel de este worker y habitaciones pendientes de recalcular"""
+
+    def __init__(self):
+        self.calendarios = {}
+        self.pendientes = {}
+        self.lock = threading.Lock()
+
+    def marcar(self, id_hotel: int, habitaciones) -> None:
+        """Anotar habitaciones a recalcular (None: reconstruir el hotel completo)"""
+        with self.lock:
+            if id_hotel not in self.calendarios:
+                return
+            if habitaciones is None:
+                del self.calendarios[id_hotel]
+                self.pendientes.pop(id_hotel, None)
+            else:
+                self.pendientes.setdefault(id_hotel, set()).update(habitaciones)
+
+    def limpiar(self) -> None:
+        with self.lock:
+            self.calendarios.clear()
+            self.pendientes.clear()
+
+    def obtener(self, db, id_hotel: int, desde: date, hasta: date) -> CalendarioHotel:
+        """Calendario vigente del hotel que cubre [desde, hasta] (None si el hotel no tiene habitaciones)"""
+        query = "SELECT version FROM VERSION_TABLA_VIGENTE WHERE tabla = 'habitacion'"
+        version = db.execute(text(query)).scalar() or 0
+        hoy = date.today()
+        origen = hoy - timedelta(days=CALENDARIO_DIAS_ATRAS)
+        dias = CALENDARIO_DIAS_ATRAS + CALENDARIO_DIAS_ADELANTE + 1
+
+        with self.lock:
+            calendario = self.calendarios.get(id_hotel)
+            vigente = (
+                calendario is not None
+                and calendario.version_habitaciones == version
+                and calendario.origen == origen
+            )
+
+        if vigente and calendario.cubre(desde, hasta):
+            calendario.listo.wait()
+        if vigente and calendario.cubre(desde, hasta) and calendario.completo:
+            # Tomar los pendientes solo al usar el calendario guardado: con un rango
+            # fuera de la ventana se quedan para la próxima consulta que lo use
+            with self.lock:
+                pendientes = self.pendientes.pop(id_hotel, set())
+            if pendientes:
+                try:
+                    calendario.cargar(db, pendientes)
+                except Exception:
+                    self.marcar(id_hotel, pendientes)
+                    raise
+            return calendario
+
+        guardar = origen <= desde and hasta < origen + timedelta(days=dias)
+        if not guardar:
+            # Fuera de la ventana en memoria: calendario de un solo uso para el rango pedido
+            origen, dias = desde, (hasta - desde).days + 1
+
+        habitaciones = db.execute(text(QUERY_HABITACIONES), {"id_hotel": id_hotel}).fetchall()
+        if not habitaciones:
+            return None
+        calendario = CalendarioHotel(id_hotel, origen, dias, habitaciones, version)
+        if guardar:
+            # Registrar antes de cargar para no perder avisos que lleguen durante la carga
+            with self.lock:
+                self.calendarios[id_hotel] = calendario
+                self.pendientes.pop(id_hotel, None)
+        try:
+            calendario.cargar(db, [h[0] for h in habitaciones])
+            calendario.completo = True
+        finally:
+            calendario.listo.set()
+            if not calendario.completo:
+                with self.lock:
+                    if self.calendarios.get(id_hotel) is calendario:
+                        del self.calendarios[id_hotel]
+        return calendario
+
+
+cache_calendarios = CacheCalendarios()
+
+
+def celdas(reservada, hospedada) -> np.ndarray:
+    """Matriz de códigos LIBRE / RESERVADA / HOSPEDADA"""
+    return np.where(hospedada, HOSPEDADA, reservada.astype(np.uint8)).astype(np.uint8)
+
+
+def filas_texto(codigos: np.ndarray) -> list:
+    """Cada fila de códigos como cadena de dígitos ("0011220...")"""
+    if codigos.shape[1] == 0:
+        return [""] * codigos.shape[0]
+    texto = (codigos + ord("0")).astype(np.uint8).tobytes().decode("ascii")
+    ancho = codigos.shape[1]
+    return [texto[i:i + ancho] for i in range(0, len(texto), ancho)]
+
+
+def empaquetar(calendario: CalendarioHotel, desde: date, reservada, hospedada) -> bytes:
+    """
+    Formato binario compacto (little-endian):
+
+    - Encabezado: ``<IIi``: habitaciones, días y ``desde`` como días desde 1970-01-01.
+    - ``id_habitacion`` y ``numero_habitacion`` de cada fila como ``uint32``.
+    - Matriz "reservada" y luego "hospedada", cada fila con ``numpy.packbits``
+      (``ceil(días / 8)`` bytes por habitación, bit más significativo primero).
+    """
+    habitaciones, dias = reservada.shape
+    encabezado = struct.pack("<IIi", habitaciones, dias, (desde - date(1970, 1, 1)).days)
+    return b"".join([
+        encabezado,
+        calendario.ids.astype("<u4").tobytes(),
+        calendario.numeros.astype("<u4").tobytes(),
+        np.packbits(reservada, axis=1).tobytes(),
+        np.packbits(hospedada, axis=1).tobytes(),
+    ])
+
+
+def _aplicar_aviso(payload: str):
+    try:
+        avisos = json.loads(payload)
+    except ValueError:
+        cache_calendarios.limpiar()
+        return
+    for id_hotel, habitaciones in avisos.items():
+        cache_calendarios.marcar(int(id_hotel), habitaciones)
+
+
+escucha.suscribir(CANAL_CALENDARIO, _aplicar_aviso, al_reconectar=cache_calendarios.limpiar)
@@ -0,0 +1,62 @@
+"""
+Utilidades para respuestas parciales: ``?fields=`` (columnas a devolver) y
+``?expand=`` (relaciones a incluir cargadas en lote, una consulta por relación).
+"""
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+
+from utils.negociacion import RespuestaNegociada
+
+
+def parsear_lista(valor, permitidos, parametro: str) -> list:
+    """Separar un parámetro "a,b,c" validando contra los valores permitidos"""
+    if not valor:
+        return []
+    items = list(dict.fromkeys(v.strip() for v in valor.split(",") if v.strip()))
+    invalidos = [v for v in items if v not in permitidos]
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Valores no válidos en '{parametro}': {', '.join(invalidos)}. "
+                   f"Permitidos: {', '.join(permitidos)}"
+        )
+    return items
+
+
+def cargar_por_ids(db, query: str, ids, agrupar: bool = False) -> dict:
+    """
+    Cargar filas relacionadas para varios IDs en una sola consulta.
+
+    La consulta debe filtrar con ``= ANY(:ids)`` y devolver el ID de agrupación
+    como primera columna. Devuelve {id: fila} o {id: [filas]} si ``agrupar``.
+    """
+    ids = list(dict.fromkeys(i for i in ids if i is not None))
+    if not ids:
+        return {}
+    result = db.execute(text(query), {"ids": ids})
+    columnas = list(result.keys())[1:]
+    cargados = {}
+    for row in result.fetchall():
+        fila = dict(zip(columnas, row[1:]))
+        if agrupar:
+            cargados.setdefault(row[0], []).append(fila)
+        else:
+            cargados[row[0]] = fila
+    return cargados
+
+
+def respuesta_parcial(contenido, response: Response = None):
+    """
+    Responder sin validar contra el response_model (la forma depende de fields/expand).
+
+    FastAPI no agrega a una Response devuelta por el handler los headers que las
+    dependencias pusieron en la ``response`` inyectada (p. ej. el ETag de
+    utils/etag.py): pasarla para copiarlos.
+    """
+    respuesta = RespuestaNegociada(content=jsonable_encoder(contenido))
+    if response is not None:
+        for nombre, valor in response.headers.items():
+            if nombre not in ("content-length", "content-type"):
+                respuesta.headers[nombre] = valor
+    return respuesta
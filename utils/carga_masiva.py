@@ -0,0 +1,124 @@
+"""
+Utilidades para cargas masivas: lectura incremental del cuerpo de la request
+(CSV o NDJSON) y COPY de filas a Postgres.
+
+El archivo se envía como cuerpo de la request (``Content-Type: text/csv`` o
+``application/x-ndjson``) y se procesa línea a línea, sin cargarlo completo
+en memoria.
+"""
+import csv
+import json
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+TAMANO_LOTE_COPY = 5000  # Filas por cada COPY al leer archivos grandes
+
+FORMATOS_ARCHIVO = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def formato_archivo(request: Request) -> str:
+    """Determinar el formato (csv o ndjson) según el Content-Type"""
+    tipo = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if tipo not in FORMATOS_ARCHIVO:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content-Type debe ser text/csv o application/x-ndjson"
+        )
+    return FORMATOS_ARCHIVO[tipo]
+
+
+async def leer_lineas(request: Request):
+    """Leer el cuerpo de la request línea a línea a medida que llega"""
+    resto = b""
+    async for trozo in request.stream():
+        resto += trozo
+        *lineas, resto = resto.split(b"\n")
+        for linea in lineas:
+            yield linea.decode("utf-8-sig").rstrip("\r")
+    if resto:
+        yield resto.decode("utf-8-sig").rstrip("\r")
+
+
+class LectorRegistros:
+    """
+    Interpreta línea a línea un archivo CSV (con encabezado) o NDJSON.
+
+    ``leer`` devuelve (registro, error): ``registro`` es un dict o None si la
+    línea no se pudo interpretar, en cuyo caso ``error`` lo explica. Devuelve
+    None para las líneas que no son registros (vacías o el encabezado CSV).
+    """
+
+    def __init__(self, formato: str):
+        self.formato = formato
+        self.encabezado = None
+
+    def leer(self, linea: str):
+        if not linea.strip():
+            return None
+        if self.formato == "ndjson":
+            try:
+                registro = json.loads(linea)
+            except ValueError as e:
+                return None, f"JSON no válido: {str(e)}"
+            if not isinstance(registro, dict):
+                return None, "Se esperaba un objeto JSON"
+            return registro, None
+
+        valores = next(csv.reader([linea]))
+        if self.encabezado is None:
+            self.encabezado = [v.strip() for v in valores]
+            return None
+        if len(valores) != len(self.encabezado):
+            return None, f"Se esperaban {len(self.encabezado)} columnas"
+        return {c: (v if v != "" else None) for c, v in zip(self.encabezado, valores)}, None
+
+
+async def leer_registros(request: Request):
+    """Leer los registros del cuerpo de la request como tuplas (numero_linea, registro, error)"""
+    lector = LectorRegistros(formato_archivo(request))
+    numero = 0
+    async for linea in leer_lineas(request):
+        numero += 1
+        leido = lector.leer(linea)
+        if leido is not None:
+            yield (numero,) + leido
+
+
+def leer_registros_archivo(archivo, formato: str):
+    """Versión síncrona de leer_registros para un archivo abierto en modo texto (scripts)"""
+    lector = LectorRegistros(formato)
+    for numero, linea in enumerate(archivo, start=1):
+        leido = lector.leer(linea.rstrip("\r\n").lstrip("\ufeff"))
+        if leido is not None:
+            yield (numero,) + leido
+
+
+def copiar_filas(db, tabla: str, columnas, filas) -> None:
+    """Enviar filas a una tabla con COPY ... FROM STDIN en la transacción de la sesión"""
+    conexion = db.connection().connection.driver_connection
+    with conexion.cursor() as cursor:
+        with cursor.copy(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN") as copy:
+            for fila in filas:
+                copy.write_row(fila)
+
+
+class RespuestaStreamingEntrada(StreamingResponse):
+    """
+    StreamingResponse para endpoints que leen el cuerpo mientras responden.
+
+    La StreamingResponse normal escucha ``receive`` para detectar la
+    desconexión del cliente, lo que consumiría los trozos del cuerpo que
+    todavía no se han leído; esta versión solo envía.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,94 @@
+"""
+Compresión de respuestas (brotli o gzip) según el header Accept-Encoding.
+
+Solo se comprimen respuestas completas (un único mensaje de cuerpo) cuyo
+tamaño supere el mínimo configurado; las respuestas en streaming pasan sin
+cambios.
+"""
+import gzip
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+# Sufijos que se agregan al ETag para distinguir cada codificación
+SUFIJOS_ETAG = {"br": "-br", "gzip": "-gzip"}
+
+
+def elegir_codificacion(accept_encoding: str):
+    """Elegir brotli si el cliente lo acepta, si no gzip; None si no acepta ninguno"""
+    aceptadas = {}
+    for item in accept_encoding.lower().split(","):
+        partes = [p.strip() for p in item.split(";")]
+        q = 1.0
+        for param in partes[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        aceptadas[partes[0]] = q
+    for codificacion in ("br", "gzip"):
+        if aceptadas.get(codificacion, aceptadas.get("*", 0)) > 0:
+            return codificacion
+    return None
+
+
+def comprimir(cuerpo: bytes, codificacion: str, nivel_brotli: int = 4, nivel_gzip: int = 6) -> bytes:
+    if codificacion == "br":
+        return brotli.compress(cuerpo, quality=nivel_brotli)
+    return gzip.compress(cuerpo, compresslevel=nivel_gzip)
+
+
+class CompresionMiddleware:
+    """Middleware ASGI que comprime con brotli o gzip las respuestas grandes"""
+
+    def __init__(self, app, minimo_bytes: int = 1024):
+        self.app = app
+        self.minimo_bytes = minimo_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if not codificacion:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        directo = False
+
+        async def send_comprimido(message):
+            nonlocal inicio, directo
+            if message["type"] == "http.response.start":
+                inicio = message
+                return
+            if message["type"] != "http.response.body" or directo:
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=inicio)
+            cuerpo = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(cuerpo) < self.minimo_bytes
+            ):
+                # Streaming, ya codificada o demasiado pequeña: se envía tal cual
+                directo = True
+                await send(inicio)
+                await send(message)
+                return
+
+            cuerpo = comprimir(cuerpo, codificacion)
+            headers["Content-Encoding"] = codificacion
+            headers["Content-Length"] = str(len(cuerpo))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                headers["ETag"] = etag[:-1] + SUFIJOS_ETAG[codificacion] + '"'
+            await send(inicio)
+            await send({"type": "http.response.body", "body": cuerpo})
+
+        await self.app(scope, receive, send_comprimido)
@@ -0,0 +1,61 @@
+"""
+ETags fuertes a partir de marcadores de cambio por tabla.
+
+Cada tabla tiene un contador (vista VERSION_TABLA_VIGENTE) que incrementa un
+trigger por sentencia sin bloquear a otros escritores (ver
+sql/001_version_tabla.sql). El ETag de un endpoint se deriva
+de las versiones de las tablas que lee, la URL y el formato de respuesta, de
+modo que un ``If-None-Match`` vigente responde 304 sin ejecutar la consulta
+principal.
+"""
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from database import get_lectura
+from utils.compresion import SUFIJOS_ETAG
+from utils.negociacion import formato_actual
+
+
+def _sin_sufijo(etag: str) -> str:
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    for sufijo in SUFIJOS_ETAG.values():
+        if etag.endswith(sufijo + '"'):
+            return etag[: -len(sufijo) - 1] + '"'
+    return etag
+
+
+def calcular_etag(versiones, request: Request) -> str:
+    base = "|".join(f"{tabla}:{version}" for tabla, version in versiones)
+    base += f"|{request.url.path}?{request.url.query}|{formato_actual()}"
+    return '"' + hashlib.sha1(base.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def etag_tablas(*tablas: str):
+    """
+    Dependencia que emite ETag y responde 304 si el cliente ya tiene la versión
+    vigente. Usa la conexión de ``get_lectura``, la misma que el handler.
+    """
+    tablas = [t.lower() for t in tablas]
+
+    def verificar_etag(request: Request, response: Response, db: Connection = Depends(get_lectura)):
+        query = "SELECT tabla, version FROM VERSION_TABLA_VIGENTE WHERE tabla = ANY(:tablas)"
+        filas = dict(db.execute(text(query), {"tablas": tablas}).fetchall())
+        etag = calcular_etag([(t, filas.get(t, 0)) for t in tablas], request)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            for candidato in if_none_match.split(","):
+                if _sin_sufijo(candidato) in (etag, "*"):
+                    raise HTTPException(
+                        status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": candidato.strip()}
+                    )
+
+        response.headers["ETag"] = etag
+
+    return verificar_etag
@@ -0,0 +1,169 @@
+"""
+Difusión de eventos de ocupación (canal 'eventos', ver sql/004_eventos.sql).
+
+La escucha compartida del worker (utils/notificaciones.py) recibe cada NOTIFY
+una sola vez; el difusor lo decodifica y lo reparte en el event loop a las
+colas de los suscriptores cuyo filtro coincide. Un suscriptor que no consume
+y llena su cola se desconecta: el cliente reanuda con su último ID, un cursor
+por transacción (ver sql/004_eventos.sql y ``eventos_desde``).
+"""
+import asyncio
+import json
+import logging
+
+from sqlalchemy import text
+
+from config import EVENTOS_MAX_PENDIENTES
+from utils.notificaciones import escucha
+
+logger = logging.getLogger(__name__)
+
+CANAL_EVENTOS = "eventos"
+MAX_EVENTOS_REANUDACION = 1000
+TIPOS_EVENTO = ["habitacion", "checkin", "checkout", "estado_reserva"]
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente con su filtro por hotel y tipo"""
+
+    def __init__(self, id_hotel=None, tipos=None):
+        self.id_hotel = id_hotel
+        self.tipos = set(tipos) if tipos else None
+        self.cola = asyncio.Queue(maxsize=EVENTOS_MAX_PENDIENTES)
+        self.desbordada = False
+
+    def acepta(self, evento: dict) -> bool:
+        return (
+            (self.id_hotel is None or evento.get("id_hotel") == self.id_hotel)
+            and (self.tipos is None or evento.get("tipo") in self.tipos)
+        )
+
+
+class DifusorEventos:
+    """Reparte las notificaciones del canal 'eventos' entre miles de suscriptores"""
+
+    def __init__(self):
+        self.suscripciones = set()
+        self.loop = None
+
+    def suscribir(self, id_hotel=None, tipos=None) -> Suscripcion:
+        self.loop = asyncio.get_running_loop()
+        suscripcion = Suscripcion(id_hotel, tipos)
+        self.suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion):
+        self.suscripciones.discard(suscripcion)
+
+    def recibir(self, payload: str):
+        """Callback del hilo de escucha: se decodifica una vez y se reparte en el event loop"""
+        if self.loop is None or not self.suscripciones:
+            return
+        try:
+            evento = json.loads(payload)
+        except ValueError:
+            logger.warning("Evento no válido: %s", payload[:200])
+            return
+        self.loop.call_soon_threadsafe(self._repartir, evento)
+
+    def _repartir(self, evento: dict):
+        for suscripcion in list(self.suscripciones):
+            if suscripcion.desbordada or not suscripcion.acepta(evento):
+                continue
+            try:
+                suscripcion.cola.put_nowait(evento)
+            except asyncio.QueueFull:
+                self._cerrar(suscripcion)
+
+    def reiniciar(self):
+        """Tras reconectar la escucha se pudieron perder eventos: los clientes deben reanudar"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._desconectar_todos)
+
+    def _desconectar_todos(self):
+        for suscripcion in list(self.suscripciones):
+            self._cerrar(suscripcion)
+
+    @staticmethod
+    def _cerrar(suscripcion: Suscripcion):
+        """Descartar lo pendiente y dejar solo la marca de fin (None) en la cola"""
+        suscripcion.desbordada = True
+        while not suscripcion.cola.empty():
+            suscripcion.cola.get_nowait()
+        suscripcion.cola.put_nowait(None)
+
+
+difusor = DifusorEventos()
+escucha.suscribir(CANAL_EVENTOS, difusor.recibir, al_reconectar=difusor.reiniciar)
+
+
+def parsear_cursor(valor: str):
+    """
+    (marca, xid, id_evento) de un ID de evento "marca-xid-id_evento".
+
+    El cliente ya tiene todos los eventos de transacciones anteriores a
+    ``marca`` y los de la transacción ``xid`` hasta ``id_evento``. Lanza
+    ValueError si el valor no tiene ese formato.
+    """
+    partes = [int(p) for p in valor.split("-")]
+    if len(partes) != 3:
+        raise ValueError(valor)
+    return tuple(partes)
+
+
+def eventos_desde(db, cursor, id_hotel=None, tipos=None):
+    """
+    Eventos confirmados que faltan desde ``cursor`` (para reanudar con Last-Event-ID).
+
+    Se filtra por transacción, no por id_evento: un evento con ID menor que el
+    del cursor pudo confirmarse después. Puede repetir eventos que el cliente
+    ya recibió en vivo (comparar por "id"), nunca omitirlos.
+
+    Devuelve (eventos, perdidos): ``perdidos`` indica que parte de los eventos
+    posteriores al cursor ya se purgó y el cliente debe recargar su estado.
+    """
+    marca, xid, id_evento = cursor
+    filtros = [
+        "xid >= CAST(:marca AS XID8)",
+        "NOT (xid = CAST(:xid AS XID8) AND id_evento <= :id_evento)",
+    ]
+    params = {"marca": str(marca), "xid": str(xid), "id_evento": id_evento, "limite": MAX_EVENTOS_REANUDACION}
+    if id_hotel is not None:
+        filtros.append("id_hotel = :id_hotel")
+        params["id_hotel"] = id_hotel
+    if tipos:
+        filtros.append("tipo = ANY(:tipos)")
+        params["tipos"] = list(tipos)
+    query = f"""
+    SELECT id_evento, id_hotel, tipo, datos, fecha, xid::TEXT,
+           pg_snapshot_xmin(pg_current_snapshot())::TEXT
+    FROM EVENTO
+    WHERE {' AND '.join(filtros)}
+    ORDER BY xid, id_evento
+    LIMIT :limite
+    """
+    filas = db.execute(text(query), params).fetchall()
+
+    eventos = []
+    for i, row in enumerate(filas):
+        # Tras este evento el cliente tiene todo lo anterior al siguiente de la
+        # página (o, si la página no se llenó, todo lo anterior al xmin actual)
+        xmin = int(row[6])
+        if i + 1 < len(filas):
+            siguiente = min(xmin, int(filas[i + 1][5]))
+        elif len(filas) < MAX_EVENTOS_REANUDACION:
+            siguiente = xmin
+        else:
+            siguiente = min(xmin, int(row[5]))
+        eventos.append({
+            "id": row[0],
+            "cursor": f"{max(marca, siguiente)}-{row[5]}-{row[0]}",
+            "id_hotel": row[1],
+            "tipo": row[2],
+            "datos": row[3],
+            "fecha": row[4].isoformat()
+        })
+    # Se purga por antigüedad: si ya no queda la transacción del cursor, pudo
+    # purgarse también lo que el cliente no recibió
+    primera = db.execute(text("SELECT MIN(xid)::TEXT FROM EVENTO")).scalar()
+    return eventos, primera is not None and int(primera) > xid
@@ -0,0 +1,36 @@
+"""
+Utilidades para consultas de varios registros por lista de IDs (multi-get).
+"""
+from fastapi import HTTPException, status
+
+MAX_IDS = 1000
+
+
+def parsear_ids(valor: str, tipo=int) -> list:
+    """Separar "a,b,c" en una lista de IDs del tipo indicado (sin repetidos, en orden)"""
+    try:
+        ids = [tipo(v.strip()) for v in valor.split(",") if v.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Lista de IDs no válida"
+        )
+    return validar_ids(ids)
+
+
+def validar_ids(ids: list) -> list:
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {MAX_IDS} IDs por consulta"
+        )
+    return ids
+
+
+def resultado_por_ids(ids: list, encontrados: dict) -> dict:
+    """Ordenar los registros encontrados según los IDs pedidos e informar los faltantes"""
+    return {
+        "resultados": [encontrados[i] for i in ids if i in encontrados],
+        "no_encontrados": [i for i in ids if i not in encontrados]
+    }
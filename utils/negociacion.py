@@ -0,0 +1,172 @@
+"""
+Negociación de contenido por header Accept.
+
+JSON sigue siendo el formato por defecto. Si el cliente (app Android) envía
+``Accept: application/msgpack`` o ``Accept: application/cbor`` la respuesta se
+codifica en binario, con representaciones compactas para fechas y decimales:
+
+- MessagePack: fechas y fechas-hora como Timestamp (ext -1, UTC) y decimales
+  como ext 1 que contiene ``[mantisa, exponente]`` empaquetado en MessagePack.
+- CBOR: fechas-hora con tag 1 (epoch), fechas con tag 100 (días desde epoch,
+  RFC 8943) y decimales con tag 4 (fracción decimal).
+"""
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation
+
+import cbor2
+import msgpack
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+MEDIA_JSON = "application/json"
+MEDIA_MSGPACK = "application/msgpack"
+MEDIA_CBOR = "application/cbor"
+
+# Alias aceptados en el header Accept para cada formato
+FORMATOS = {
+    "application/json": MEDIA_JSON,
+    "application/msgpack": MEDIA_MSGPACK,
+    "application/x-msgpack": MEDIA_MSGPACK,
+    "application/vnd.msgpack": MEDIA_MSGPACK,
+    "application/cbor": MEDIA_CBOR,
+}
+
+# Campos que viajan como texto en JSON y se codifican de forma compacta en binario
+CAMPOS_FECHA_HORA = {"fecha_hora_checkin", "fecha_checkin", "vencimiento_reserva", "fecha_cambio"}
+CAMPOS_FECHA = {"fecha_reserva", "fecha_inicio", "fecha_fin", "fecha_checkout"}
+CAMPOS_DECIMAL = {"costo", "valor", "monto"}
+
+EXT_DECIMAL = 1
+EPOCH = date(1970, 1, 1)
+
+_formato_respuesta: ContextVar[str] = ContextVar("formato_respuesta", default=MEDIA_JSON)
+
+
+def formato_actual() -> str:
+    """Formato de respuesta negociado para la request en curso"""
+    return _formato_respuesta.get()
+
+
+def elegir_formato(accept: str) -> str:
+    """Elegir el formato soportado con mayor q del header Accept (JSON si no hay ninguno)"""
+    mejor, mejor_q = MEDIA_JSON, -1.0
+    for item in accept.split(","):
+        partes = [p.strip() for p in item.split(";")]
+        formato = FORMATOS.get(partes[0].lower())
+        if not formato:
+            continue
+        q = 1.0
+        for param in partes[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > mejor_q:
+            mejor, mejor_q = formato, q
+    return mejor if mejor_q > 0 else MEDIA_JSON
+
+
+def _a_utc(valor: datetime) -> datetime:
+    return valor.replace(tzinfo=timezone.utc) if valor.tzinfo is None else valor
+
+
+def _tipar(campo, valor):
+    """Convertir los valores de texto de los campos conocidos a su tipo nativo"""
+    if not isinstance(valor, str):
+        return valor
+    try:
+        if campo in CAMPOS_FECHA_HORA:
+            return _a_utc(datetime.fromisoformat(valor))
+        if campo in CAMPOS_FECHA:
+            return date.fromisoformat(valor)
+        if campo in CAMPOS_DECIMAL:
+            return Decimal(valor)
+    except (ValueError, InvalidOperation):
+        pass
+    return valor
+
+
+def _convertir(contenido, campo=None):
+    if isinstance(contenido, dict):
+        return {k: _convertir(v, k) for k, v in contenido.items()}
+    if isinstance(contenido, list):
+        return [_convertir(v, campo) for v in contenido]
+    return _tipar(campo, contenido)
+
+
+def _decimal_a_partes(valor: Decimal):
+    signo, digitos, exponente = valor.normalize().as_tuple()
+    mantisa = int("".join(map(str, digitos)) or "0")
+    return -mantisa if signo else mantisa, exponente
+
+
+def _default_msgpack(valor):
+    if isinstance(valor, datetime):
+        return msgpack.Timestamp.from_datetime(valor)
+    if isinstance(valor, date):
+        return msgpack.Timestamp((valor - EPOCH).days * 86400)
+    if isinstance(valor, Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, msgpack.packb(list(_decimal_a_partes(valor))))
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _preparar_cbor(valor):
+    # cbor2 codifica date como texto (tag 1004); se envuelven a mano para usar los tags compactos
+    if isinstance(valor, dict):
+        return {k: _preparar_cbor(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_preparar_cbor(v) for v in valor]
+    if isinstance(valor, date) and not isinstance(valor, datetime):
+        return cbor2.CBORTag(100, (valor - EPOCH).days)
+    if isinstance(valor, Decimal):
+        mantisa, exponente = _decimal_a_partes(valor)
+        return cbor2.CBORTag(4, [exponente, mantisa])
+    return valor
+
+
+def codificar(contenido, formato: str) -> bytes:
+    """Codificar contenido ya serializable a JSON en el formato binario pedido"""
+    tipado = _convertir(contenido)
+    if formato == MEDIA_MSGPACK:
+        return msgpack.packb(tipado, default=_default_msgpack, datetime=False)
+    return cbor2.dumps(_preparar_cbor(tipado), datetime_as_timestamp=True, timezone=timezone.utc)
+
+
+class RespuestaNegociada(JSONResponse):
+    """Respuesta por defecto de la API: JSON, o MessagePack/CBOR si el cliente lo pidió"""
+
+    def __init__(self, content=None, *args, **kwargs):
+        self.media_type = _formato_respuesta.get()
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content) -> bytes:
+        if self.media_type == MEDIA_JSON:
+            return super().render(content)
+        return codificar(content, self.media_type)
+
+
+class NegociacionMiddleware:
+    """Middleware ASGI que fija el formato de respuesta según el header Accept"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        formato = elegir_formato(Headers(scope=scope).get("accept", ""))
+        token = _formato_respuesta.set(formato)
+
+        async def send_con_vary(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).add_vary_header("Accept")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_vary)
+        finally:
+            _formato_respuesta.reset(token)
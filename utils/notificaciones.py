@@ -0,0 +1,80 @@
+"""
+Escucha de notificaciones de Postgres (LISTEN/NOTIFY) compartida por el worker.
+
+Un hilo mantiene una conexión dedicada fuera del pool y reparte cada
+notificación a los callbacks suscritos a su canal. Si la conexión se pierde
+se reconecta y avisa a los suscriptores, que pueden haber perdido mensajes.
+"""
+import logging
+import threading
+
+import psycopg
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+ESPERA_RECONEXION = 5  # Segundos entre intentos de reconexión
+ESPERA_NOTIFICACIONES = 1  # Segundos de cada espera de notificaciones (para revisar si se detuvo)
+
+
+def _conninfo() -> str:
+    """URL de conexión de libpq a partir de la del engine (sin el driver de SQLAlchemy)"""
+    return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class EscuchaNotificaciones:
+    """Hilo que ejecuta LISTEN en los canales suscritos y despacha las notificaciones"""
+
+    def __init__(self):
+        self.suscriptores = {}
+        self.al_reconectar = []
+        self.hilo = None
+        self.detenida = threading.Event()
+
+    def suscribir(self, canal: str, callback, al_reconectar=None):
+        """Registrar ``callback(payload)`` para un canal (antes de iniciar la escucha)"""
+        self.suscriptores.setdefault(canal, []).append(callback)
+        if al_reconectar is not None:
+            self.al_reconectar.append(al_reconectar)
+
+    def iniciar(self):
+        if self.hilo is None and self.suscriptores:
+            self.detenida.clear()
+            self.hilo = threading.Thread(target=self._escuchar, name="escucha-notificaciones", daemon=True)
+            self.hilo.start()
+
+    def detener(self):
+        self.detenida.set()
+        if self.hilo is not None:
+            self.hilo.join(ESPERA_NOTIFICACIONES * 2)
+        self.hilo = None
+
+    def _escuchar(self):
+        primera = True
+        while not self.detenida.is_set():
+            try:
+                with psycopg.connect(_conninfo(), autocommit=True) as conexion:
+                    for canal in self.suscriptores:
+                        conexion.execute(f'LISTEN "{canal}"')
+                    if not primera:
+                        for callback in self.al_reconectar:
+                            callback()
+                    primera = False
+                    # Esperas cortas: cancel() no interrumpe notifies(), el timeout sí
+                    while not self.detenida.is_set():
+                        for notificacion in conexion.notifies(timeout=ESPERA_NOTIFICACIONES):
+                            for callback in self.suscriptores.get(notificacion.channel, []):
+                                try:
+                                    callback(notificacion.payload)
+                                except Exception:
+                                    logger.exception("Error procesando notificación de %s", notificacion.channel)
+            except Exception:
+                if self.detenida.is_set():
+                    break
+                logger.warning("Conexión de notificaciones perdida; reintentando", exc_info=True)
+                primera = False
+            self.detenida.wait(ESPERA_RECONEXION)
+
+
+escucha = EscuchaNotificaciones()
@@ -0,0 +1,60 @@
+"""
+Mantenimiento de las particiones mensuales de ESTADO_RESERVA y
+REGISTRO_HOSPEDAJE (ver sql/006_particiones.sql).
+"""
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+TABLAS_PARTICIONADAS = ("estado_reserva", "registro_hospedaje")
+MESES_FUTUROS = 3
+
+
+def crear_particiones_futuras(conexion, meses: int = MESES_FUTUROS) -> None:
+    """Crear las particiones del mes actual y de los ``meses`` siguientes (idempotente)"""
+    conexion.execute(text("SELECT crear_particiones_futuras(:meses)"), {"meses": meses})
+
+
+def particiones_antiguas(conexion, tabla: str, meses_retener: int) -> list:
+    """Particiones mensuales de ``tabla`` anteriores a los últimos ``meses_retener`` meses"""
+    hoy = date.today()
+    total = hoy.year * 12 + hoy.month - 1 - meses_retener
+    limite = f"{total // 12:04d}{total % 12 + 1:02d}"
+    query = """
+    SELECT c.relname
+    FROM pg_inherits i
+    INNER JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = CAST(:tabla AS REGCLASS)
+    ORDER BY c.relname
+    """
+    patron = re.compile(rf"^{tabla}_p(\d{{6}})$")
+    nombres = [row[0] for row in conexion.execute(text(query), {"tabla": tabla}).fetchall()]
+    return [n for n in nombres if patron.match(n) and patron.match(n).group(1) < limite]
+
+
+def archivar_particiones(conexion, meses_retener: int, esquema: str = None) -> list:
+    """
+    Separar (DETACH) las particiones antiguas y, si se indica, moverlas al esquema de archivo.
+
+    Las filas separadas dejan de verse en la API pero siguen consultables como tablas.
+    """
+    if esquema:
+        conexion.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{esquema}"'))
+    archivadas = []
+    for tabla in TABLAS_PARTICIONADAS:
+        for particion in particiones_antiguas(conexion, tabla, meses_retener):
+            # REGISTRO_HOSPEDAJE va por mes de check-in: no archivar hospedajes aún activos
+            if tabla == "registro_hospedaje":
+                query_activos = f'SELECT EXISTS (SELECT 1 FROM "{particion}" WHERE fecha_checkout IS NULL)'
+                if conexion.execute(text(query_activos)).scalar():
+                    continue
+            conexion.execute(text(f'ALTER TABLE {tabla} DETACH PARTITION "{particion}"'))
+            # Las FK heredadas quedan en la tabla separada y bloquearían borrar reservas o huéspedes
+            query_fk = "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:tabla AS REGCLASS) AND contype = 'f'"
+            for row in conexion.execute(text(query_fk), {"tabla": particion}).fetchall():
+                conexion.execute(text(f'ALTER TABLE "{particion}" DROP CONSTRAINT "{row[0]}"'))
+            if esquema:
+                conexion.execute(text(f'ALTER TABLE "{particion}" SET SCHEMA "{esquema}"'))
+            archivadas.append(particion)
+    return archivadas
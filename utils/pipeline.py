@@ -0,0 +1,160 @@
+"""
+Round trips a Postgres por request y modo pipeline opcional para escrituras.
+
+``ViajesMiddleware`` cuenta los viajes de ida y vuelta de cada request, al
+primario y a las réplicas de lectura (BEGIN
+implícito, cada sentencia, COMMIT/ROLLBACK y cada sincronización de un
+pipeline) y los informa en el header ``X-Round-Trips``; no incluye el ping de
+verificación del pool.
+
+``Ejecucion`` permite escribir el handler una sola vez: las sentencias se
+encolan con ``ejecutar`` y sus resultados se leen al salir del bloque. Con
+DB_PIPELINE se envían juntas con el modo pipeline de psycopg (el BEGIN y todas
+las sentencias en un solo round trip); sin él se ejecutan una a una con la
+sesión. Las sentencias del bloque no pueden depender de resultados de otras
+del mismo bloque (usar RETURNING, CTEs o currval).
+"""
+import contextvars
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from config import DB_PIPELINE
+
+_contador = contextvars.ContextVar("contador_viajes", default=None)
+
+
+class ContadorViajes:
+    def __init__(self):
+        self.viajes = 0
+        self.sentencias = 0
+
+
+def contar(viajes: int, sentencias: int = 0) -> None:
+    contador = _contador.get()
+    if contador is not None:
+        contador.viajes += viajes
+        contador.sentencias += sentencias
+
+
+def _iniciar_transaccion(info: dict) -> int:
+    """Marcar como enviado el BEGIN pendiente; devuelve 1 si había uno"""
+    if info.pop("begin_pendiente", False):
+        info["en_transaccion"] = True
+        return 1
+    return 0
+
+
+@event.listens_for(Engine, "begin")
+def _al_iniciar(conexion):
+    # psycopg no envía el BEGIN hasta la primera sentencia (ni ninguno en autocommit)
+    if not conexion.connection.dbapi_connection.autocommit:
+        conexion.info["begin_pendiente"] = True
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _al_ejecutar(conexion, cursor, statement, parameters, context, executemany):
+    contar(1 + _iniciar_transaccion(conexion.info), 1)
+
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+def _al_terminar(conexion):
+    conexion.info.pop("begin_pendiente", None)
+    if conexion.info.pop("en_transaccion", False):
+        contar(1)
+
+
+class ViajesMiddleware:
+    """Middleware ASGI que informa los round trips a Postgres de cada request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        contador = ContadorViajes()
+        token = _contador.set(contador)
+
+        async def send_con_viajes(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Round-Trips"] = str(contador.viajes)
+                headers["X-Sentencias-SQL"] = str(contador.sentencias)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_viajes)
+        finally:
+            _contador.reset(token)
+
+
+class Resultado:
+    """Filas de una sentencia de ``Ejecucion`` (disponibles al salir del bloque)"""
+
+    def __init__(self, al_recibir=None):
+        self.filas = None
+        self.al_recibir = al_recibir
+
+    def recibir(self, filas) -> None:
+        self.filas = filas
+        if self.al_recibir is not None:
+            self.al_recibir(filas)
+
+    def fila(self):
+        return self.filas[0] if self.filas else None
+
+    def escalar(self):
+        fila = self.fila()
+        return fila[0] if fila is not None else None
+
+
+class Ejecucion:
+    """Bloque de sentencias independientes, en pipeline si está activado"""
+
+    def __init__(self, db, pipeline: bool = None):
+        self.db = db
+        self.pipeline = DB_PIPELINE if pipeline is None else pipeline
+        self.pendientes = []
+
+    def ejecutar(self, sentencia, params: dict = None, al_recibir=None) -> Resultado:
+        """Ejecutar o encolar una sentencia; ``al_recibir(filas)`` se llama cuando llegan sus filas"""
+        resultado = Resultado(al_recibir)
+        if self.pipeline:
+            self.pendientes.append((sentencia, params or {}, resultado))
+        else:
+            result = self.db.execute(sentencia, params or {})
+            resultado.recibir(result.fetchall() if result.returns_rows else [])
+        return resultado
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None and self.pendientes:
+            self._enviar()
+        return False
+
+    def _enviar(self):
+        conexion = self.db.connection()
+        driver = conexion.connection.driver_connection
+        cursores = []
+        _iniciar_transaccion(conexion.info)  # El BEGIN pendiente viaja en el mismo pipeline
+        try:
+            with driver.pipeline():
+                for sentencia, params, resultado in self.pendientes:
+                    compilada = sentencia.compile(dialect=conexion.dialect)
+                    cursor = driver.cursor()
+                    cursor.execute(compilada.string, compilada.construct_params(params))
+                    cursores.append((cursor, resultado))
+        finally:
+            contar(1, len(self.pendientes))
+            self.pendientes = []
+
+        for cursor, resultado in cursores:
+            resultado.recibir(cursor.fetchall() if cursor.description else [])
+            cursor.close()
@@ -0,0 +1,144 @@
+"""
+Réplicas de lectura: elección round-robin entre las disponibles y verificación
+periódica de su estado.
+
+Un hilo por worker consulta cada ``intervalo`` segundos si cada réplica responde
+y cuánto retraso de replicación tiene. ``elegir`` devuelve la siguiente réplica
+sana con retraso dentro de ``max_retraso``, o None para leer del primario (sin
+réplicas, todas caídas o atrasadas, o antes de la primera verificación).
+
+Una réplica está al día si ya aplicó el WAL hasta la posición que tenía el
+primario al empezar la verificación. Si no, su retraso es el tiempo desde la
+última transacción aplicada. Una réplica sin receptor de WAL conectado
+(``pg_stat_wal_receiver``) se considera caída: podría estar arbitrariamente
+atrasada sin que su posición recibida y aplicada difieran.
+"""
+import itertools
+import logging
+import threading
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+QUERY_POSICION_PRIMARIO = text("SELECT pg_current_wal_lsn()::TEXT")
+
+# En recuperación, estado del receptor de WAL, si aplicó hasta la posición del
+# primario (NULL si no se conoce) y segundos desde la última transacción aplicada
+QUERY_ESTADO_REPLICA = text("""
+SELECT pg_is_in_recovery(),
+       (SELECT status FROM pg_stat_wal_receiver),
+       pg_last_wal_replay_lsn() >= CAST(:posicion_primario AS PG_LSN),
+       EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+""")
+
+
+class ReplicaDesconectada(Exception):
+    """La réplica no recibe WAL del primario"""
+
+
+class Replica:
+    def __init__(self, motor):
+        self.motor = motor
+        self.sana = False
+        self.retraso = None
+        self.error = None
+
+    @property
+    def nombre(self) -> str:
+        return self.motor.url.render_as_string(hide_password=True)
+
+
+class ConjuntoReplicas:
+    """Réplicas de lectura del worker y su hilo de verificación"""
+
+    def __init__(self, motores, max_retraso: float, intervalo: float, primario=None):
+        self.replicas = [Replica(motor) for motor in motores]
+        self.primario = primario
+        self.max_retraso = max_retraso
+        self.intervalo = intervalo
+        self.turno = itertools.count()
+        self.hilo = None
+        self.detenida = threading.Event()
+
+    def elegir(self):
+        """Siguiente réplica sana y al día (None: usar el primario)"""
+        disponibles = [
+            r for r in self.replicas
+            if r.sana and r.retraso is not None and r.retraso <= self.max_retraso
+        ]
+        if not disponibles:
+            return None
+        return disponibles[next(self.turno) % len(disponibles)]
+
+    def marcar_caida(self, replica: Replica, error) -> None:
+        """Sacar una réplica de la rotación hasta la próxima verificación exitosa"""
+        if replica.sana:
+            logger.warning("Réplica %s no disponible: %s", replica.nombre, error)
+        replica.sana = False
+        replica.error = str(error)
+
+    def _posicion_primario(self):
+        """Posición actual del WAL en el primario (None si no se puede consultar)"""
+        if self.primario is None:
+            return None
+        try:
+            with self.primario.connect() as conexion:
+                return conexion.execute(QUERY_POSICION_PRIMARIO).scalar()
+        except Exception:
+            logger.warning("No se pudo leer la posición del WAL del primario", exc_info=True)
+            return None
+
+    @staticmethod
+    def _retraso(conexion, posicion_primario) -> float:
+        en_recuperacion, receptor, al_dia, desde_ultima = conexion.execute(
+            QUERY_ESTADO_REPLICA, {"posicion_primario": posicion_primario}
+        ).fetchone()
+        if not en_recuperacion:
+            return 0.0
+        if receptor != "streaming":
+            raise ReplicaDesconectada(f"Receptor de WAL {receptor or 'inexistente'}")
+        if al_dia:
+            return 0.0
+        # Sin transacciones aplicadas desde que arrancó no se puede medir: atrasada
+        return float(desde_ultima) if desde_ultima is not None else float("inf")
+
+    def verificar(self) -> None:
+        # Antes que las réplicas: lo que ya tenía el primario en este momento
+        posicion_primario = self._posicion_primario()
+        for replica in self.replicas:
+            try:
+                with replica.motor.connect() as conexion:
+                    retraso = self._retraso(conexion, posicion_primario)
+            except Exception as e:
+                self.marcar_caida(replica, e)
+                continue
+            if replica.sana and retraso > self.max_retraso >= replica.retraso:
+                logger.warning("Réplica %s atrasada %.1f s; se lee del resto", replica.nombre, retraso)
+            replica.retraso = retraso
+            replica.sana = True
+            replica.error = None
+
+    def estado(self) -> list:
+        return [
+            {"replica": r.nombre, "sana": r.sana, "retraso_segundos": r.retraso, "error": r.error}
+            for r in self.replicas
+        ]
+
+    def iniciar(self):
+        if self.hilo is None and self.replicas:
+            self.detenida.clear()
+            self.hilo = threading.Thread(target=self._verificar_periodicamente, name="verificacion-replicas", daemon=True)
+            self.hilo.start()
+
+    def detener(self):
+        self.detenida.set()
+        self.hilo = None
+
+    def _verificar_periodicamente(self):
+        while not self.detenida.is_set():
+            try:
+                self.verificar()
+            except Exception:
+                logger.exception("Error verificando réplicas")
+            self.detenida.wait(self.intervalo)
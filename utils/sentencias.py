@@ -0,0 +1,102 @@
+"""
+Registro central de sentencias SQL con nombre.
+
+Solo lo usan los routers de catálogo (hoteles, habitaciones, tipos de
+habitación, categorías, servicios, agencias y huéspedes) para sus borrados y
+actualizaciones parciales: las registran al importarse y reutilizan el mismo
+``TextClause`` en cada request, de modo que SQLAlchemy compila cada una una
+sola vez y el texto enviado a Postgres es siempre idéntico; con
+``prepare_threshold`` (ver database.py) psycopg la prepara en el servidor y
+las ejecuciones siguientes en esa conexión se saltan el parse y el plan.
+
+El resto de las sentencias (las demás de esos routers y las de reservas,
+registro de hospedaje, sync y eventos) no pasan por aquí. Las constantes de
+módulo también llegan con texto fijo y psycopg las prepara igual, pero los
+listados que arman el WHERE con f-strings según los filtros envían un texto
+por combinación: solo se preparan las combinaciones repetidas y ocupan
+lugares de ``prepared_max``.
+
+Las actualizaciones parciales (PUT con campos opcionales) usan
+``ActualizacionParcial``, que genera y registra una sentencia por cada
+conjunto de campos, siempre con las columnas en el mismo orden, y devuelve la
+fila actualizada en la misma sentencia.
+"""
+import threading
+
+from sqlalchemy import text
+
+_sentencias = {}
+_lock = threading.Lock()
+
+
+def registrar(nombre: str, sql: str):
+    """Registrar una sentencia con nombre y devolver su TextClause compartido"""
+    with _lock:
+        existente = _sentencias.get(nombre)
+        if existente is not None:
+            if existente.text != sql:
+                raise ValueError(f"Sentencia '{nombre}' ya registrada con otro SQL")
+            return existente
+        _sentencias[nombre] = text(sql)
+        return _sentencias[nombre]
+
+
+def sentencia(nombre: str):
+    """TextClause de una sentencia registrada"""
+    return _sentencias[nombre]
+
+
+def sentencias_registradas() -> dict:
+    """Copia del registro {nombre: sql}"""
+    with _lock:
+        return {nombre: s.text for nombre, s in _sentencias.items()}
+
+
+class ActualizacionParcial:
+    """
+    UPDATE de una fila por clave con solo los campos informados, que devuelve la fila.
+
+    ``columnas`` fija las columnas actualizables y su orden en el SET;
+    ``retorno`` es la lista del SELECT final sobre la fila actualizada (alias
+    ``fila``) y puede incluir subconsultas de tablas hijas; ``adicional`` es
+    una asignación fija opcional (p. ej. "fecha_cambio = NOW()") y
+    ``publicar`` una columna extra solo cuando hay cambios (p. ej. un
+    pg_notify de invalidación de caché).
+    """
+
+    def __init__(self, tabla: str, clave: str, columnas, retorno: str, adicional: str = None, publicar: str = None):
+        self.tabla = tabla
+        self.clave = clave
+        self.columnas = list(columnas)
+        self.retorno = retorno
+        self.adicional = adicional
+        self.publicar = publicar
+
+    def sentencia(self, valores: dict):
+        """
+        Sentencia registrada para las columnas de ``valores``; sin columnas es
+        la lectura de la fila. No devuelve filas si la clave no existe.
+        """
+        campos = [c for c in self.columnas if c in valores]
+        invalidos = set(valores) - set(self.columnas)
+        if invalidos:
+            raise ValueError(f"Columnas no actualizables en {self.tabla}: {', '.join(sorted(invalidos))}")
+
+        nombre = f"{self.tabla.lower()}.actualizar[{','.join(campos)}]" if campos else f"{self.tabla.lower()}.leer"
+        existente = _sentencias.get(nombre)
+        if existente is not None:
+            return existente
+
+        if not campos:
+            sql = f"SELECT {self.retorno} FROM {self.tabla} fila WHERE fila.{self.clave} = :{self.clave}"
+            return registrar(nombre, sql)
+
+        asignaciones = [f"{c} = :{c}" for c in campos]
+        if self.adicional:
+            asignaciones.append(self.adicional)
+        retorno = f"{self.retorno}, {self.publicar}" if self.publicar else self.retorno
+        sql = (
+            f"WITH fila AS (UPDATE {self.tabla} SET {', '.join(asignaciones)} "
+            f"WHERE {self.clave} = :{self.clave} RETURNING *) SELECT {retorno} FROM fila"
+        )
+        return registrar(nombre, sql)